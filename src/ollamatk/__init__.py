@@ -1,18 +1,88 @@
-from .about import TkAboutWindow
-from .app import TkApp
-from .chat import (
-    StreamingChatHandler,
-    TkChat,
-    TkChatButtons,
-    TkChatControls,
-    TkLiveControls,
-    TkChatMenu,
-)
-from .event_thread import EventThread
-from .http import DoneStreamingChat, HTTPClient, Message, StreamingChat
-from .installable import Installable
-from .logging import LogStore, TkAppLogHandler, TkLogWindow, configure_logging
-from .messages import Message, TkMessageFrame, TkMessageList, load_message_icons
-from .scrollable_frame import ScrollableFrame
-from .settings import Settings, TkSettingsControls
-from .wrap_label import WrapLabel
+# Exports are resolved lazily so that importing a single submodule,
+# like ollamatk.__main__, doesn't also import tkinter and httpx.
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .about import TkAboutWindow
+    from .app import TkApp
+    from .chat import (
+        StreamingChatHandler,
+        TkChat,
+        TkChatButtons,
+        TkChatControls,
+        TkLiveControls,
+        TkChatMenu,
+    )
+    from .event_thread import EventThread
+    from .http import DoneStreamingChat, HTTPClient, StreamingChat
+    from .installable import InstallGroup, Installable, InstallTiming
+    from .logging import LogStore, TkAppLogHandler, TkLogWindow, configure_logging
+    from .messages import (
+        Message,
+        TkMessageFrame,
+        TkMessageList,
+        load_message_icon,
+        load_message_icons,
+    )
+    from .recording import (
+        ChatRecorder,
+        ReplayTransport,
+        StreamRecording,
+        load_recording,
+    )
+    from .scrollable_frame import ScrollableFrame
+    from .settings import Settings, TkSettingsControls
+    from .startup import ImportTimer, StartupProfiler
+    from .wrap_label import WrapLabel
+
+_exports = {
+    "TkAboutWindow": ".about",
+    "TkApp": ".app",
+    "StreamingChatHandler": ".chat",
+    "TkChat": ".chat",
+    "TkChatButtons": ".chat",
+    "TkChatControls": ".chat",
+    "TkLiveControls": ".chat",
+    "TkChatMenu": ".chat",
+    "EventThread": ".event_thread",
+    "DoneStreamingChat": ".http",
+    "HTTPClient": ".http",
+    "StreamingChat": ".http",
+    "InstallGroup": ".installable",
+    "Installable": ".installable",
+    "InstallTiming": ".installable",
+    "LogStore": ".logging",
+    "TkAppLogHandler": ".logging",
+    "TkLogWindow": ".logging",
+    "configure_logging": ".logging",
+    "Message": ".messages",
+    "TkMessageFrame": ".messages",
+    "TkMessageList": ".messages",
+    "load_message_icon": ".messages",
+    "load_message_icons": ".messages",
+    "ChatRecorder": ".recording",
+    "ReplayTransport": ".recording",
+    "StreamRecording": ".recording",
+    "load_recording": ".recording",
+    "ScrollableFrame": ".scrollable_frame",
+    "Settings": ".settings",
+    "TkSettingsControls": ".settings",
+    "ImportTimer": ".startup",
+    "StartupProfiler": ".startup",
+    "WrapLabel": ".wrap_label",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _exports.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_exports])
@@ -1,13 +1,22 @@
+# To show the window as soon as possible, this module should only import
+# lightweight modules at the top-level. Everything else is imported
+# on demand inside main().
+from __future__ import annotations
+
+import argparse
 import concurrent.futures
 import contextlib
 import functools
 import logging
 import sys
+import threading
+from typing import TYPE_CHECKING
+
+from .startup import StartupProfiler
 
-from .app import TkApp
-from .event_thread import EventThread
-from .http import HTTPClient
-from .logging import configure_logging
+if TYPE_CHECKING:
+    from .event_thread import EventThread
+    from .http import HTTPClient
 
 
 def suppress(*exceptions: type[BaseException]):
@@ -24,23 +33,160 @@ def suppress(*exceptions: type[BaseException]):
 
 @suppress(KeyboardInterrupt, concurrent.futures.CancelledError)
 def main() -> None:
+    args = parse_args()
+    if args.command == "batch":
+        from .batch import main as batch_main
+
+        return batch_main(args)
+
+    profiler = StartupProfiler(enabled=args.profile_startup)
+
+    with profiler.phase("import modules"):
+        from .app import TkApp
+        from .event_thread import EventThread, get_loop_factory
+        from .logging import configure_logging
+        from .loop_monitor import LoopMonitor
+
     configure_logging()
     enable_windows_dpi_awareness()
 
-    event_thread = EventThread()
-    http = HTTPClient()
-    with event_thread, http.install(event_thread):
-        app = TkApp(event_thread, http)
-        app.listen_to_logs_from(logging.getLogger())
+    event_thread = EventThread(
+        monitor=LoopMonitor(),
+        loop_factory=get_loop_factory(args.loop),
+    )
+    installs = contextlib.ExitStack()
+    with event_thread:
+        # Import, create and start installing the HTTP client in the
+        # event thread while the main thread is busy creating the window
+        http_fut = event_thread.submit(
+            install_http_client_async(args, event_thread, installs)
+        )
 
         try:
-            app.mainloop()
+            cpu_profiler = None
+            if args.profile_cpu is not None:
+                from .profiler import SamplingProfiler
+
+                cpu_profiler = SamplingProfiler(args.profile_cpu)
+                cpu_profiler.start(
+                    {"Tk": threading.current_thread(), "Event": event_thread}
+                )
+
+            with profiler.phase("create window"):
+                app = TkApp(event_thread, profiler=cpu_profiler)
+                app.listen_to_logs_from(logging.getLogger())
+        except BaseException:
+            concurrent.futures.wait([http_fut])
+            installs.close()
+            raise
+
+        try:
+            with installs:
+                with profiler.phase("create HTTP client"):
+                    http = http_fut.result()
+                with profiler.phase("show window"):
+                    app.update()
+                with profiler.phase("install HTTP client"):
+                    http.wait_until_ready()
+
+                app.http = http
+                app.warm_up()
+                app.after_idle(profiler.finish)
+                app.mainloop()
         except BaseException:
             app.destroy()
             app.mainloop()
             raise
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="ollamatk")
+    parser.add_argument(
+        "--record",
+        help="Record every chat completion stream to the given directory",
+        metavar="DIR",
+    )
+    parser.add_argument(
+        "--replay",
+        help="Respond to every chat with the given recording instead of a server",
+        metavar="FILE",
+    )
+    parser.add_argument(
+        "--replay-speed",
+        default=1,
+        help="Playback speed of --replay, or 0 to replay as fast as possible",
+        type=float,
+    )
+    parser.add_argument(
+        "--server-concurrency",
+        default=2,
+        help="The maximum number of requests to send to a server at once, "
+        "leaving one free for chats when above 1 (default: %(default)s)",
+        metavar="N",
+        type=int,
+    )
+    parser.add_argument(
+        "--loop",
+        choices=("auto", "asyncio", "uvloop"),
+        default="auto",
+        help="The event loop to use, where auto uses uvloop if installed "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Log how long each phase of startup and each import took",
+    )
+    parser.add_argument(
+        "--profile-cpu",
+        const="",
+        help="Sample where the GUI and event loop spend their time from startup "
+        "until profiling is stopped from the menu or the window is closed, "
+        "saving profiles to DIR (default: the data directory)",
+        metavar="DIR",
+        nargs="?",
+    )
+
+    commands = parser.add_subparsers(dest="command")
+    batch = commands.add_parser(
+        "batch",
+        description="Run prompts from a file or stdin without opening a window, "
+        "writing results to stdout as JSONL.",
+        help="Run prompts headlessly",
+    )
+    # The batch module is imported for its arguments on every run, but it
+    # only imports the standard library at the top level, mostly asyncio,
+    # which the window needs for its event thread anyway
+    from .batch import add_arguments
+
+    add_arguments(batch)
+
+    return parser.parse_args()
+
+
+async def install_http_client_async(
+    args: argparse.Namespace,
+    event_thread: EventThread,
+    installs: contextlib.ExitStack,
+) -> HTTPClient:
+    http = create_http_client(args)
+    return installs.enter_context(http.install(event_thread, wait=False))
+
+
+def create_http_client(args: argparse.Namespace) -> HTTPClient:
+    from .http import HTTPClient
+    from .recording import ChatRecorder, ReplayTransport
+    from .scheduler import RequestScheduler
+
+    recorder = ChatRecorder(args.record) if args.record else None
+    transport = None
+    if args.replay:
+        transport = ReplayTransport(args.replay, speed=args.replay_speed or None)
+
+    scheduler = RequestScheduler(per_server_limit=args.server_concurrency)
+    return HTTPClient(transport=transport, recorder=recorder, scheduler=scheduler)
+
+
 def enable_windows_dpi_awareness() -> None:
     if sys.platform == "win32":
         from ctypes import windll
@@ -1,20 +1,71 @@
+from __future__ import annotations
+
+import concurrent.futures
 import logging
+import threading
 from tkinter import Event, Menu, Tk
 from tkinter.ttk import Frame
+from typing import TYPE_CHECKING, Any, Callable, Coroutine, Iterable, TypeVar
 
 from .chat import TkChat, TkChatMenu
 from .event_thread import EventThread
-from .http import HTTPClient
+from .highlight import CodeHighlighter
+from .images import ImageEncoder
 from .logging import LogStore, TkAppLogHandler
+from .resources import ResourcePoller
+from .tools import ToolExecutor, create_default_tools
+
+if TYPE_CHECKING:
+    from .diagnostics import Diagnostics
+    from .history import ConversationHistory
+    from .http import HTTPClient
+    from .profiler import SamplingProfiler
+    from .semantic import SemanticIndex
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
 
 
 class TkApp(Tk):
-    def __init__(self, event_thread: EventThread, http: HTTPClient):
+    _http: HTTPClient | None
+    _history: ConversationHistory | None
+    _diagnostics: Diagnostics | None
+    _profiler: SamplingProfiler | None
+    _semantic_indexes: dict[str, SemanticIndex]
+
+    def __init__(
+        self,
+        event_thread: EventThread,
+        http: HTTPClient | None = None,
+        *,
+        profiler: SamplingProfiler | None = None,
+    ):
         super().__init__()
 
         self.event_thread = event_thread
-        self.http = http
+        self._http = http
+        self._history = None
+        self._diagnostics = None
+        self._profiler = profiler
+        self._semantic_indexes = {}
         self.logs = LogStore()
+        self.resources = ResourcePoller()
+        self.tools = create_default_tools()
+        self.tool_executor = ToolExecutor()
+
+        # For CPU-bound work that shouldn't block the GUI or event loop
+        self.workers = concurrent.futures.ThreadPoolExecutor(
+            thread_name_prefix="ollamatk-worker"
+        )
+        # History is written by a single thread so writes are stored in order
+        # and can be waited on at exit without waiting for other work
+        self.history_writer = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="ollamatk-history",
+        )
+        self.images = ImageEncoder(self.workers)
+        self.highlighter = CodeHighlighter(self.workers)
 
         self._connect_lifetime_with_event_thread(event_thread)
 
@@ -25,12 +76,113 @@ class TkApp(Tk):
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(0, weight=1)
 
-        self.frame = TkChat(self)
+        self.frame: Frame = TkChat(self)
         self.frame.grid(sticky="nesw")
         self.switch_menu(TkChatMenu(self))
 
         self.bind("<<Destroy>>", self._on_destroy)
 
+    @property
+    def http(self) -> HTTPClient:
+        # To show the window sooner, the HTTP client may be provided
+        # after the application has been created.
+        if self._http is None:
+            raise RuntimeError("HTTPClient has not been provided yet")
+        return self._http
+
+    @http.setter
+    def http(self, http: HTTPClient) -> None:
+        self._http = http
+
+    @property
+    def history(self) -> ConversationHistory:
+        # The database is opened on first use rather than during startup
+        if self._history is None:
+            from .history import ConversationHistory, get_data_dir
+
+            self._history = ConversationHistory(get_data_dir() / "history.db")
+        return self._history
+
+    @property
+    def diagnostics(self) -> Diagnostics:
+        if self._diagnostics is None:
+            from .diagnostics import Diagnostics
+
+            self._diagnostics = Diagnostics(self)
+        return self._diagnostics
+
+    @property
+    def profiler(self) -> SamplingProfiler:
+        if self._profiler is None:
+            from .profiler import SamplingProfiler
+
+            self._profiler = SamplingProfiler()
+        return self._profiler
+
+    @property
+    def profiling(self) -> bool:
+        return self._profiler is not None and self._profiler.running
+
+    def start_profiling(self) -> None:
+        """Start sampling this thread and the event thread."""
+        threads = {"Tk": threading.current_thread(), "Event": self.event_thread}
+        self.profiler.start(threads)
+
+    def get_semantic_index(self, model: str) -> SemanticIndex:
+        """Return the semantic index for the given embedding model.
+
+        This requires NumPy to be installed.
+
+        """
+        index = self._semantic_indexes.get(model)
+        if index is None:
+            from .history import get_data_dir
+            from .semantic import SemanticIndex
+
+            index = SemanticIndex(self.history, get_data_dir() / "vectors", model=model)
+            self._semantic_indexes[model] = index
+        return index
+
+    def submit_many(
+        self,
+        coros: Iterable[Coroutine[Any, Any, T]],
+        callback: Callable[[concurrent.futures.Future[list[T]]], object],
+        *,
+        return_exceptions: bool = False,
+    ) -> concurrent.futures.Future[list[T]]:
+        """Run a batch of coroutines in the event thread, calling back
+        once on this thread with the batch's future when all are done.
+
+        See :meth:`EventThread.submit_many()` for details.
+
+        """
+        return self.event_thread.submit_many(
+            coros,
+            return_exceptions=return_exceptions,
+            on_done=lambda fut: self.after(0, callback, fut),
+        )
+
+    def warm_up(self) -> None:
+        """Connect to the server in the background before the first chat."""
+        if isinstance(self.frame, TkChat):
+            self.frame.maybe_get_models()
+        fut = self.event_thread.submit(self.resources.run(self.http, self._get_address))
+        fut.add_done_callback(self._on_resources_done)
+
+    def _on_resources_done(self, fut: concurrent.futures.Future[None]) -> None:
+        # The poller runs until the event loop stops, so any other
+        # outcome means the Loaded Models window stopped updating
+        if fut.cancelled():
+            return
+        elif (exc := fut.exception()) is not None:
+            log.exception("Error occurred while polling loaded models", exc_info=exc)
+
+    def _get_address(self) -> str:
+        # Called from the event loop to find which servers to poll
+        if isinstance(self.frame, TkChat):
+            return self.frame.settings.ollama_address
+        return ""
+
     def switch_frame(self, frame: Frame) -> None:
         self.frame.destroy()
         self.frame = frame
@@ -62,4 +214,14 @@ class TkApp(Tk):
         self.event_thread.stop()
 
     def _on_destroy(self, event: Event) -> None:
+        # Cancel other work, but let every pending history write finish
+        # before closing the database
+        self.workers.shutdown(wait=self._history is not None, cancel_futures=True)
+        self.tool_executor.shutdown(wait=False)
+        self.history_writer.shutdown(wait=True)
+        if self._history is not None:
+            self._history.close()
+        if self._profiler is not None and self._profiler.running:
+            profile = self._profiler.stop_and_save()
+            log.info("%s", profile.format_report())
         super().destroy()
@@ -0,0 +1,217 @@
+"""Run chat completions headlessly, without importing tkinter.
+
+Prompts are read as JSONL where each line is an object with either
+a ``"prompt"`` string or a ``"messages"`` list, along with an optional
+``"id"`` and ``"model"``. Plain text input, where every non-empty line
+is a prompt, is also supported with ``--format text``.
+
+Results are written to stdout as JSONL in the order they complete,
+and a summary of the overall throughput is written to stderr.
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from dataclasses import dataclass
+from typing import IO, TYPE_CHECKING, Any, Iterator
+
+if TYPE_CHECKING:
+    from .http import DoneStreamingChat, HTTPClient
+
+
+@dataclass
+class BatchSummary:
+    requests: int = 0
+    failures: int = 0
+    elapsed: float = 0
+    prompt_tokens: int = 0
+    eval_tokens: int = 0
+
+    @property
+    def tokens_per_second(self) -> float:
+        if self.elapsed <= 0:
+            return 0
+        return self.eval_tokens / self.elapsed
+
+    def format(self) -> str:
+        return (
+            f"Completed {self.requests} requests ({self.failures} failed) "
+            f"in {self.elapsed:.2f}s, "
+            f"{self.prompt_tokens} prompt tokens, "
+            f"{self.eval_tokens} generated tokens, "
+            f"{self.tokens_per_second:.1f} generated tokens/s"
+        )
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "input",
+        default="-",
+        help="The file to read prompts from, or - for stdin (default)",
+        nargs="?",
+    )
+    parser.add_argument(
+        "--address",
+        default="http://localhost:11434",
+        help="The Ollama server to send requests to (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--model",
+        help="The model to use for prompts that don't specify one",
+        required=True,
+    )
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        default=4,
+        help="The maximum number of requests to run at once (default: %(default)s)",
+        type=int,
+    )
+    parser.add_argument(
+        "--format",
+        choices=("jsonl", "text"),
+        default="jsonl",
+        help="The format of the input (default: %(default)s)",
+    )
+
+
+def main(args: argparse.Namespace) -> None:
+    # Imported here so the GUI can parse arguments without importing httpx
+    from .event_thread import EventThread, get_loop_factory
+    from .http import HTTPClient
+
+    if args.concurrency < 1:
+        sys.exit("--concurrency must be at least 1")
+
+    if args.input == "-":
+        file = sys.stdin
+    else:
+        file = open(args.input, encoding="utf-8")
+
+    event_thread = EventThread(loop_factory=get_loop_factory(args.loop))
+    with file, event_thread:
+        http = HTTPClient()
+        with http.install(event_thread):
+            coro = run_batch(
+                http,
+                read_prompts(file, format=args.format),
+                address=args.address,
+                model=args.model,
+                concurrency=args.concurrency,
+                output=sys.stdout,
+            )
+            summary = event_thread.submit(coro).result()
+
+    print(summary.format(), file=sys.stderr)
+
+
+def read_prompts(file: IO[str], *, format: str = "jsonl") -> Iterator[dict[str, Any]]:
+    for i, line in enumerate(file):
+        line = line.strip()
+        if not line:
+            continue
+        elif format == "text":
+            yield {"id": i, "prompt": line}
+            continue
+
+        prompt = json.loads(line)
+        if not isinstance(prompt, dict):
+            raise ValueError(f"Line {i + 1} must be a JSON object")
+        prompt.setdefault("id", i)
+        yield prompt
+
+
+async def run_batch(
+    http: HTTPClient,
+    prompts: Iterator[dict[str, Any]],
+    *,
+    address: str,
+    model: str,
+    concurrency: int,
+    output: IO[str],
+) -> BatchSummary:
+    """Run each prompt through the HTTP client with bounded concurrency."""
+    summary = BatchSummary()
+    semaphore = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+
+    async def run_one(prompt: dict[str, Any]) -> None:
+        try:
+            result = await run_prompt(http, prompt, address=address, model=model)
+        finally:
+            semaphore.release()
+
+        summary.requests += 1
+        if result.get("error") is not None:
+            summary.failures += 1
+
+        metrics = result.get("metrics") or {}
+        summary.prompt_tokens += metrics.get("prompt_eval_count", 0)
+        summary.eval_tokens += metrics.get("eval_count", 0)
+
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+
+    async with asyncio.TaskGroup() as tg:
+        # Reading may block (especially from stdin), so do it in a thread
+        # to keep running requests from stalling.
+        while True:
+            await semaphore.acquire()
+            prompt = await asyncio.to_thread(next, prompts, None)
+            if prompt is None:
+                semaphore.release()
+                break
+            tg.create_task(run_one(prompt))
+
+    summary.elapsed = time.perf_counter() - start
+    return summary
+
+
+async def run_prompt(
+    http: HTTPClient,
+    prompt: dict[str, Any],
+    *,
+    address: str,
+    model: str,
+) -> dict[str, Any]:
+    messages = prompt.get("messages")
+    if messages is None:
+        messages = [{"role": "user", "content": prompt.get("prompt", "")}]
+
+    model = prompt.get("model", model)
+    result: dict[str, Any] = {"id": prompt["id"], "model": model}
+    content: list[str] = []
+
+    try:
+        done = await http.generate_chat_completion(
+            address=address,
+            model=model,
+            messages=messages,
+            stream_callback=lambda data: content.append(data["message"]["content"]),
+        )
+    except Exception as e:
+        result["content"] = "".join(content)
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    result["content"] = "".join(content)
+    result["error"] = None
+    result["metrics"] = get_metrics(done)
+    return result
+
+
+def get_metrics(done: DoneStreamingChat | None) -> dict[str, int]:
+    if done is None:
+        return {}
+
+    return {
+        key: value
+        for key, value in done.items()
+        if key not in ("model", "created_at", "done", "done_reason", "message")
+        and isinstance(value, int)
+    }
@@ -1,28 +1,55 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
+import uuid
+from collections import deque
 from concurrent.futures import Future
-from tkinter import Menu, Text
-from tkinter.ttk import Button, Frame
-from typing import TYPE_CHECKING, Any
-
-import httpx
-
-from .about import TkAboutWindow
-from .http import StreamingChat
-from .logging import TkLogWindow
-from .messages import Message, TkMessageFrame, TkMessageList
+from dataclasses import dataclass, field
+from pathlib import Path
+from tkinter import Menu, Text, Toplevel, filedialog
+from tkinter.ttk import Button, Frame, Label
+from typing import TYPE_CHECKING, Any, cast
+
+from .compaction import (
+    COMPACTION_THRESHOLD,
+    PromptStats,
+    find_compaction_point,
+    summarize,
+)
+from .documents import DOCUMENT_FILETYPES, TkDocuments
+from .images import IMAGE_FILETYPES, TkAttachments
+from .messages import Message, Role, TkMessageFrame, TkMessageList
 from .settings import Settings, TkSettingsControls
+from .tools import generate_with_tools
+from .tree import ConversationTree, MessageNode
 
 if TYPE_CHECKING:
+    import httpx
+
     from .app import TkApp
+    from .history import ConversationHistory, StoredMessage
+    from .documents import DocumentIndex
+    from .http import DoneStreamingChat, StreamingChat, ToolCall
+    from .tools import ToolRegistry, ToolResult
 
 log = logging.getLogger(__name__)
 
+STATUS_REFRESH_INTERVAL = 250
+
+
+@dataclass
+class QueuedPrompt:
+    message: Message
+    queued_at: float = field(default_factory=time.monotonic)
+
 
 class TkChat(Frame):
     chat_fut: Future | None
     chat_handler: StreamingChatHandler | None
+    compaction_fut: Future[str] | None
+    prompt_queue: deque[QueuedPrompt]
 
     def __init__(self, app: TkApp) -> None:
         super().__init__(app)
@@ -50,44 +77,358 @@ class TkChat(Frame):
 
         self.chat_fut = None
         self.chat_handler = None
+        self.compaction_fut = None
+        self._compacted_from: PromptStats | None = None
+        self.prompt_queue = deque()
+        self.conversation_id = uuid.uuid4().hex
+
+    def new_conversation(self) -> None:
+        self.message_list.clear()
+        self.chat_controls.documents.clear()
+        self.prompt_queue.clear()
+        self._compacted_from = None
+        self.conversation_id = uuid.uuid4().hex
+
+    def enqueue_prompt(self, message: Message) -> None:
+        """Send a message once the current response finishes."""
+        self.prompt_queue.append(QueuedPrompt(message))
+        self.live_controls.refresh_status()
+
+    def clear_prompt_queue(self) -> None:
+        self.prompt_queue.clear()
+        self.live_controls.refresh_status()
+
+    def _send_next_prompt(self) -> None:
+        if not self.prompt_queue:
+            return
 
-    def send_chat(self, *, source: TkMessageFrame | None) -> None:
-        message = Message("assistant", "Waiting for response...")
-        frame = self.message_list.add_message(message)
+        prompt = self.prompt_queue.popleft()
+        log.info(
+            "Sending queued prompt after %.1fs",
+            time.monotonic() - prompt.queued_at,
+        )
+        source = self.message_list.add_message(prompt.message)
+        self.send_chat(source=source)
+
+    def format_queue_status(self) -> str:
+        parts = []
+        if self.prompt_queue:
+            prompt = self.prompt_queue[0]
+            waited = time.monotonic() - prompt.queued_at
+            parts.append(
+                f"{len(self.prompt_queue)} prompt(s) queued, "
+                f"next waiting {waited:.0f}s"
+            )
+
+        scheduler = self.app.http.scheduler
+        if scheduler is not None:
+            from .http import get_server_key
+            from .pool import parse_addresses
+
+            addresses = parse_addresses(self.settings.ollama_address)
+            stats = [scheduler.stats(get_server_key(a)) for a in addresses]
+            waiting = sum(s.waiting for s in stats)
+            completed = sum(s.completed for s in stats)
+            if waiting > 0:
+                parts.append(f"{waiting} request(s) waiting for server")
+            if completed > 0:
+                mean_wait = sum(s.total_wait for s in stats) / completed
+                parts.append(f"mean wait {mean_wait * 1000:.0f}ms")
+
+        return ", ".join(parts)
+
+    def send_chat(
+        self,
+        *,
+        source: TkMessageFrame | None,
+        target: TkMessageFrame | None = None,
+    ) -> None:
+        if target is None:
+            message = Message("assistant", "Waiting for response...")
+            target = self.message_list.add_message(message)
+            messages = self.message_list.dump(
+                exclude=[target],
+                compact=self.settings.compaction_enabled,
+            )
+        else:
+            # Keep the previous response as another branch
+            message = Message("assistant", "Waiting for response...")
+            target = self.message_list.branch(target, message)
+            messages = self.message_list.dump(
+                until=target,
+                compact=self.settings.compaction_enabled,
+            )
 
-        self.chat_handler = StreamingChatHandler(target=frame, source=source)
+        self.chat_handler = StreamingChatHandler(target=target, source=source)
+        tools = self.app.tools if self.settings.tools_enabled else None
 
-        coro = self.app.http.generate_chat_completion(
+        coro = self._generate_chat_completion(
             address=self.settings.ollama_address,
             model=self.settings.ollama_model,
-            messages=self.message_list.dump(exclude=[frame]),
-            stream_callback=self.chat_handler,
-            connect_callback=self.chat_handler.handle_connect,
+            messages=messages,
+            handler=self.chat_handler,
+            documents=self.chat_controls.documents.index,
+            tools=tools,
         )
-
         fut = self.chat_fut = self.app.event_thread.submit(coro)
         fut.add_done_callback(self._on_send_chat_done)
 
         self.settings_controls.disable()
         self.live_controls.show()
-        self.chat_controls.disable()
+        self.chat_controls.refresh()
+        self.app.resources.set_active(self, True)
+
+    async def _generate_chat_completion(
+        self,
+        *,
+        address: str,
+        model: str,
+        messages: list[dict[str, Any]],
+        handler: StreamingChatHandler,
+        documents: DocumentIndex | None,
+        tools: ToolRegistry | None,
+    ) -> DoneStreamingChat | None:
+        http = self.app.http
+        if documents is not None and len(documents) > 0:
+            messages = await documents.inject_context(http, address, messages)
+
+        try:
+            if tools is None or len(tools) == 0:
+                return await http.generate_chat_completion(
+                    address=address,
+                    model=model,
+                    messages=messages,
+                    stream_callback=handler,
+                    connect_callback=handler.handle_connect,
+                )
+
+            return await generate_with_tools(
+                http,
+                tools,
+                address=address,
+                model=model,
+                messages=messages,
+                stream_callback=handler,
+                connect_callback=handler.handle_connect,
+                results_callback=handler.handle_tool_results,
+                executor=self.app.tool_executor,
+            )
+        except asyncio.CancelledError:
+            # By now the response has been closed, so the server knows
+            # to stop generating
+            handler.handle_closed()
+            raise
+
+    def stop_chat(self) -> None:
+        """Stop the current response, keeping whatever was generated so far."""
+        if self.chat_fut is None or self.chat_handler is None:
+            return
+
+        self.chat_handler.request_stop()
+        self.chat_fut.cancel()
+
+    def regenerate(self, target: TkMessageFrame) -> None:
+        self.send_chat(source=None, target=target)
+
+    def edit(self, source: TkMessageFrame) -> None:
+        TkEditWindow(self, source)
+
+    def send_edit(self, source: TkMessageFrame, content: str) -> None:
+        """Send an edited copy of a message as a new branch."""
+        if self.chat_fut is not None:
+            return
+
+        message = Message("user", content, images=source.message.images.copy())
+        self.send_chat(source=self.message_list.branch(source, message))
 
     def _on_send_chat_done(self, fut: Future[Any]) -> None:
+        self.chat_fut = None
         self.settings_controls.enable()
-        self.live_controls.grid_remove()
-        self.chat_controls.enable()
+        self.live_controls.hide()
+        self.chat_controls.refresh()
+        self.app.resources.set_active(self, False)
 
         assert self.chat_handler is not None
         if fut.cancelled():
-            self.chat_handler.handle_cancel()
+            if self.chat_handler.handle_cancel():
+                self._save_to_history(self.chat_handler)
         elif (exc := fut.exception()) is not None:
             self.chat_handler.handle_error(exc)
+        else:
+            done = fut.result()
+            self.chat_handler.handle_done(done)
+            self._save_to_history(self.chat_handler)
+            if done is not None:
+                self._on_prompt_stats(PromptStats.from_response(done))
+
+        # Stopping only applies to the current response, so any queued
+        # follow-ups are still sent afterwards
+        self._send_next_prompt()
+
+    def _on_prompt_stats(self, stats: PromptStats) -> None:
+        if self._compacted_from is not None:
+            log.info(
+                "Prompt went from %s before compaction to %s after",
+                self._compacted_from.format(),
+                stats.format(),
+            )
+            self._compacted_from = None
+
+        if self.settings.compaction_enabled and stats.tokens > COMPACTION_THRESHOLD:
+            self.compact(stats)
+
+    def compact(self, stats: PromptStats) -> None:
+        """Summarize older messages in the background so later prompts
+        can send the summary instead.
+        """
+        if self.compaction_fut is not None:
+            return
+
+        frames = list(self.message_list)
+        index = find_compaction_point(
+            [frame.message.summary is not None for frame in frames]
+        )
+        if index is None:
+            return
+
+        end = frames[index]
+        covered = [frame.node for frame in frames[:index]]
+        messages = self.message_list.dump(until=frames[index + 1], compact=True)
+        coro = summarize(
+            self.app.http,
+            address=self.settings.ollama_address,
+            model=self.settings.summary_model or self.settings.ollama_model,
+            messages=messages,
+        )
+        fut = self.compaction_fut = self.app.event_thread.submit(coro)
+        fut.add_done_callback(
+            lambda fut: self._on_compact_done(fut, end, covered, stats)
+        )
+
+    def _on_compact_done(
+        self,
+        fut: Future[str],
+        end: TkMessageFrame,
+        covered: list[MessageNode[Message]],
+        stats: PromptStats,
+    ) -> None:
+        self.compaction_fut = None
+        if fut.cancelled():
+            return
+        elif (exc := fut.exception()) is not None:
+            return log.exception(
+                "Error occurred while summarizing messages", exc_info=exc
+            )
+
+        # A message deleted while summarizing would still be in the summary
+        if end.node.ancestors() != covered:
+            log.info("Discarding summary of messages that have since changed")
+            return
+
+        # The message keeps its summary even if its frame was replaced by
+        # switching branches, until a message before it is deleted
+        end.message.summary = fut.result()
+        self._compacted_from = stats
+        if end.winfo_exists():
+            end.refresh()
+
+    def _save_to_history(self, handler: StreamingChatHandler) -> None:
+        # Only completed or stopped exchanges are stored, so failed
+        # responses never show up in search results
+        frames = [*handler.tool_frames, handler.target]
+        if handler.source is not None:
+            frames.insert(0, handler.source)
+
+        entries = [
+            (frame.message, get_history_ancestors(frame.node))
+            for frame in frames
+            if frame.message.history_id is None
+        ]
+        fut = self.app.history_writer.submit(
+            write_history,
+            self.app.history,
+            self.conversation_id,
+            entries,
+        )
+        fut.add_done_callback(self._on_save_to_history_done)
+
+    def _on_save_to_history_done(self, fut: Future[list[int]]) -> None:
+        if fut.cancelled():
+            return
+        elif (exc := fut.exception()) is not None:
+            log.exception("Error occurred while saving chat history", exc_info=exc)
+
+    def show_history_message(self, stored: StoredMessage) -> bool:
+        """Scroll to a message from the history, loading its conversation
+        if it isn't the current one.
+
+        Returns False if the conversation can't be switched right now.
+
+        """
+        if stored.conversation != self.conversation_id:
+            if self.chat_fut is not None:
+                return False
+            self.load_conversation(stored.conversation, selected=stored.id)
+
+        frame = self._find_history_frame(stored.id)
+        if frame is None:
+            # The message is on another branch of the current conversation
+            node = next(
+                (
+                    n
+                    for n in self.message_list.tree
+                    if n.message.history_id == stored.id
+                ),
+                None,
+            )
+            if node is None:
+                return True
+            elif self.chat_fut is not None:
+                return False
+            self.message_list.select(node)
+            frame = self._find_history_frame(stored.id)
+
+        if frame is not None:
+            self.message_list.scroll_to(frame)
+        return True
+
+    def _find_history_frame(self, id: int) -> TkMessageFrame | None:
+        for frame in self.message_list:
+            if frame.message.history_id == id:
+                return frame
+        return None
+
+    def load_conversation(
+        self,
+        conversation: str,
+        *,
+        selected: int | None = None,
+    ) -> None:
+        """Replace the current messages with a conversation from the history.
+
+        The latest branch at each fork is shown, unless the ID of
+        a message to show instead is given.
+
+        """
+        self.prompt_queue.clear()
+        self._compacted_from = None
+        self.conversation_id = conversation
+
+        stored = self.app.history.get_conversation(conversation)
+        tree = build_conversation_tree(stored, selected=selected)
+        self.message_list.load(tree)
 
     def maybe_get_models(self) -> None:
         # FIXME: update models any time address is changed
         if self.settings_controls.model["values"]:
             return
 
+        coro = self.app.http.warm_up(self.settings.ollama_address)
+        fut = self.app.event_thread.submit(coro)
+        fut.add_done_callback(self._on_maybe_get_models_done)
+
+    def refresh_models(self) -> None:
+        """Fetch the available models again after they have changed."""
         coro = self.app.http.list_local_models(self.settings.ollama_address)
         fut = self.app.event_thread.submit(coro)
         fut.add_done_callback(self._on_maybe_get_models_done)
@@ -101,7 +442,79 @@ class TkChat(Frame):
                 exc_info=fut.exception(),
             )
 
-        self.settings_controls.model.configure(values=fut.result())
+        self.settings_controls.set_model_options(fut.result())
+
+
+def build_conversation_tree(
+    messages: list[StoredMessage],
+    *,
+    selected: int | None = None,
+) -> ConversationTree[Message]:
+    """Rebuild a conversation's branches from its stored messages.
+
+    Each reply is selected as it's added, so the latest branch at each
+    fork is selected unless the ID of another message is given.
+
+    """
+    tree: ConversationTree[Message] = ConversationTree()
+    nodes: dict[int, MessageNode[Message]] = {}
+    for stored in messages:
+        message = Message(
+            cast(Role, stored.role),
+            stored.content,
+            history_id=stored.id,
+            tool_calls=cast("list[ToolCall]", stored.tool_calls or []),
+            tool_name=stored.tool_name,
+        )
+        parent = nodes.get(stored.parent_id) if stored.parent_id is not None else None
+        nodes[stored.id] = tree.add(message, parent)
+
+    if selected is not None and selected in nodes:
+        tree.select(nodes[selected])
+    return tree
+
+
+def get_history_ancestors(node: MessageNode[Message]) -> list[Message]:
+    """Return the messages before a node, nearest first, up to and
+    including the nearest one that was already stored.
+    """
+    ancestors = []
+    parent = node.parent
+    while isinstance(parent, MessageNode):
+        ancestors.append(parent.message)
+        if parent.message.history_id is not None:
+            break
+        parent = parent.parent
+    return ancestors
+
+
+def write_history(
+    history: ConversationHistory,
+    conversation: str,
+    entries: list[tuple[Message, list[Message]]],
+) -> list[int]:
+    """Store each message as a reply to its nearest stored ancestor.
+
+    Ancestors that were never stored, such as prompts whose response
+    failed, are skipped. Writes are made one at a time, so ancestors
+    saved by an earlier write have their IDs by the time they're needed.
+
+    """
+    ids = []
+    for message, ancestors in entries:
+        parent_id = next(
+            (m.history_id for m in ancestors if m.history_id is not None), None
+        )
+        message.history_id = history.add_message(
+            conversation,
+            message.role,
+            message.content,
+            tool_calls=cast(list[dict[str, Any]], message.tool_calls),
+            tool_name=message.tool_name,
+            parent_id=parent_id,
+        )
+        ids.append(message.history_id)
+    return ids
 
 
 class StreamingChatHandler:
@@ -113,23 +526,96 @@ class StreamingChatHandler:
     ) -> None:
         self.target = target
         self.source = source
+        self.tool_frames: list[TkMessageFrame] = []
+        """Tool calls and their results, which precede the current target."""
+        self.stop_latency: float | None = None
         self._started = False
+        self._stop_requested_at: float | None = None
 
     def __call__(self, data: StreamingChat) -> None:
+        if self._stop_requested_at is not None:
+            return  # A few tokens may still arrive before the stream is closed
+
         self.target.message.role = data["message"]["role"]
-        self.target.message.content += data["message"]["content"]
-        self.target.refresh()
+        self.target.append_content(data["message"]["content"])
+
+        tool_calls = data["message"].get("tool_calls")
+        if tool_calls:
+            self.target.message.tool_calls.extend(tool_calls)
+            self.target.refresh()
 
     def handle_connect(self) -> None:
         self._started = True
         self.target.message.content = ""
         self.target.refresh()
 
-    def handle_cancel(self) -> None:
+    def handle_done(self, done: DoneStreamingChat | None = None) -> None:
+        if done is not None:
+            self.target.message.prompt_stats = PromptStats.from_response(done)
+            self.target.refresh()
+        self.target.finish_content()
+
+    def handle_tool_results(self, results: list[ToolResult]) -> None:
+        """Show the results of the target's tool calls, then wait for
+        the response that follows them in a new message.
+
+        This is called from the event loop rather than the GUI.
+
+        """
+        self.target.finish_content()
+        self.tool_frames.append(self.target)
+
+        message_list = self.target.message_list
+        for result in results:
+            message = Message(
+                "tool",
+                result.content,
+                tool_name=result.name,
+                latency=result.latency,
+            )
+            self.tool_frames.append(message_list.add_message(message))
+
+        message = Message("assistant", "Waiting for response...")
+        self.target = message_list.add_message(message)
+        self._started = False
+
+    def request_stop(self) -> None:
+        self._stop_requested_at = time.perf_counter()
+
+    def handle_closed(self) -> None:
+        """Record how long the stream took to close after a stop was requested.
+
+        This is called from the event loop rather than the GUI.
+
+        """
+        if self._stop_requested_at is None:
+            return
+
+        self.stop_latency = time.perf_counter() - self._stop_requested_at
+        log.info(
+            "Response stream closed %.1fms after stopping", self.stop_latency * 1000
+        )
+
+    def handle_cancel(self) -> bool:
+        """Keep the partial response if one was received, otherwise hide
+        the messages.
+
+        Returns True if the partial response was kept.
+
+        """
+        if self._started and self.target.message.content.strip():
+            self.target.message.stopped = True
+            self.target.finish_content()
+            self.target.refresh()
+            return True
+
         self._show_error("(Response cancelled)")
         self._hide_messages()
+        return False
 
     def handle_error(self, exc: BaseException) -> None:
+        import httpx
+
         if isinstance(exc, httpx.ConnectError):
             self._show_error(
                 "Could not connect to the given address. Is the server running?"
@@ -172,6 +658,9 @@ class StreamingChatHandler:
         # Make sure a followup chat doesn't remember the failed messages
         self.target.message.hidden = True
         self.target.refresh()
+        for frame in self.tool_frames:
+            frame.message.hidden = True
+            frame.refresh()
         if self.source is not None:
             self.source.message.hidden = True
             self.source.refresh()
@@ -182,20 +671,90 @@ class TkLiveControls(Frame):
         super().__init__(chat)
 
         self.chat = chat
+        self._refresh_id: str | None = None
 
-        self.grid_columnconfigure(0, weight=1)
+        self.stop = Button(self, command=self.do_stop, text="Stop")
+        self.stop.grid(row=0, column=0)
+
+        self.clear_queue = Button(
+            self,
+            command=self.chat.clear_prompt_queue,
+            text="Clear Queue",
+        )
+        self.clear_queue.grid(row=0, column=1, padx=(10, 0))
 
-        self.cancel = Button(self, command=self.do_cancel, text="Cancel")
-        self.cancel.grid(row=0, column=0)
+        self.status = Label(self)
+        self.status.grid(row=0, column=2, padx=(10, 0))
 
-    def do_cancel(self) -> None:
+    def do_stop(self) -> None:
         if self.chat.chat_fut is not None:
-            self.chat.chat_fut.cancel()
-            self.cancel.state(["disabled"])
+            self.chat.stop_chat()
+            self.stop.state(["disabled"])
 
     def show(self) -> None:
-        self.cancel.state(["!disabled"])
+        self.stop.state(["!disabled"])
         self.grid()
+        self.refresh_status()
+
+    def hide(self) -> None:
+        self._cancel_refresh()
+        self.grid_remove()
+
+    def refresh_status(self) -> None:
+        """Update the queue status, repeating until hidden."""
+        self._cancel_refresh()
+        if self.chat.chat_fut is None:
+            return
+
+        self.status.configure(text=self.chat.format_queue_status())
+        if self.chat.prompt_queue:
+            self.clear_queue.state(["!disabled"])
+        else:
+            self.clear_queue.state(["disabled"])
+        self._refresh_id = self.after(STATUS_REFRESH_INTERVAL, self.refresh_status)
+
+    def destroy(self) -> None:
+        self._cancel_refresh()
+        super().destroy()
+
+    def _cancel_refresh(self) -> None:
+        if self._refresh_id is not None:
+            self.after_cancel(self._refresh_id)
+            self._refresh_id = None
+
+
+class TkEditWindow(Toplevel):
+    def __init__(self, chat: TkChat, source: TkMessageFrame) -> None:
+        super().__init__(chat)
+
+        self.chat = chat
+        self.source = source
+
+        self.title("Edit Message")
+        self.geometry("480x240")
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        self.text = Text(self, font="TkDefaultFont", width=0, height=0)
+        self.text.insert("1.0", source.message.content)
+        self.text.grid(row=0, column=0, columnspan=2, sticky="nesw", padx=10, pady=10)
+        self.text.focus_set()
+
+        self.cancel_button = Button(self, command=self.destroy, text="Cancel")
+        self.cancel_button.grid(row=1, column=0, sticky="e", padx=(0, 5), pady=(0, 10))
+
+        self.send_button = Button(self, command=self.do_send, text="Send")
+        self.send_button.grid(row=1, column=1, padx=(0, 10), pady=(0, 10))
+
+    def do_send(self) -> None:
+        content = self.text.get("1.0", "end").strip()
+        if content == "":
+            return
+
+        if self.source.winfo_exists():
+            self.chat.send_edit(self.source, content)
+        self.destroy()
 
 
 class TkChatControls(Frame):
@@ -212,15 +771,24 @@ class TkChatControls(Frame):
         self._init_text_bindings()
 
         self.buttons = TkChatButtons(self)
-        self.buttons.grid(row=0, column=1, sticky="ns")
+        self.buttons.grid(row=0, column=1, rowspan=3, sticky="ns")
 
-    def disable(self) -> None:
-        self.text.configure(state="disabled")
-        self.buttons.disable()
+        self.attachments = TkAttachments(
+            self,
+            chat.app.images,
+            on_change=self._on_attachments_change,
+        )
+        self.attachments.grid(row=1, column=0, sticky="w", pady=(5, 0))
+
+        self.documents = TkDocuments(self, chat)
+        self.documents.grid(row=2, column=0, sticky="w", pady=(5, 0))
+
+    def refresh(self) -> None:
+        self.buttons.refresh()
 
-    def enable(self) -> None:
-        self.text.configure(state="normal")
-        self.buttons.enable()
+    def _on_attachments_change(self) -> None:
+        # Prevent sending until every attachment has been encoded
+        self.buttons.refresh()
 
     def _init_text_bindings(self) -> None:
         self.text.bind("<Shift-Return>", lambda event: self.text.insert("insert", ""))
@@ -234,40 +802,138 @@ class TkChatButtons(Frame):
         self.controls = controls
 
         self.grid_columnconfigure(0, weight=1)
-        self.grid_rowconfigure("0 1", weight=1)
+        self.grid_rowconfigure("0 2", weight=1)
 
         self.send_button = Button(self, command=self.do_send, text="Send")
         self.send_button.grid(row=0, column=0, sticky="new")
 
+        self.attach_button = Button(self, command=self.do_attach, text="Attach")
+        self.attach_button.grid(row=1, column=0, sticky="ew")
+
         self.clear_button = Button(self, command=self.do_clear, text="Clear")
-        self.clear_button.grid(row=1, column=0, sticky="sew")
+        self.clear_button.grid(row=2, column=0, sticky="sew")
 
     def do_send(self) -> None:
+        attachments = self.controls.attachments
+        if attachments.pending > 0:
+            return
+
         content = self.controls.text.get("1.0", "end").strip()
-        if content == "":
+        if content == "" and not attachments.attachments:
             return
 
-        message = Message("user", content)
-        message = self.controls.chat.message_list.add_message(message)
+        chat = self.controls.chat
+        message = Message("user", content, images=attachments.take())
         self.controls.text.delete("1.0", "end")
-        self.controls.chat.send_chat(source=message)
-        self.controls.chat.maybe_get_models()
+        if chat.chat_fut is not None:
+            # Let the user write follow-ups while a response is streaming
+            chat.enqueue_prompt(message)
+            return
+
+        frame = chat.message_list.add_message(message)
+        chat.send_chat(source=frame)
+        chat.maybe_get_models()
+
+    def do_attach(self) -> None:
+        paths = filedialog.askopenfilenames(
+            filetypes=IMAGE_FILETYPES[:1] + DOCUMENT_FILETYPES + IMAGE_FILETYPES[1:],
+            parent=self,
+            title="Attach images or documents",
+        )
+        image_suffixes = IMAGE_FILETYPES[0][1].replace("*", "").split()
+        for path in paths:
+            # Images are sent with the next message, whereas documents
+            # are searched for context for the rest of the conversation
+            if Path(path).suffix.lower() in image_suffixes:
+                self.controls.attachments.add(path)
+            else:
+                self.controls.documents.add(path)
 
     def do_clear(self) -> None:
-        self.controls.chat.message_list.clear()
+        self.controls.chat.new_conversation()
+
+    def refresh(self) -> None:
+        streaming = self.controls.chat.chat_fut is not None
+        self.send_button.configure(text="Queue" if streaming else "Send")
 
-    def disable(self) -> None:
-        self.send_button.state(["disabled"])
-        self.clear_button.state(["disabled"])
+        if self.controls.attachments.pending > 0:
+            self.send_button.state(["disabled"])
+        else:
+            self.send_button.state(["!disabled"])
 
-    def enable(self) -> None:
-        self.send_button.state(["!disabled"])
-        self.clear_button.state(["!disabled"])
+        if streaming:
+            self.clear_button.state(["disabled"])
+        else:
+            self.clear_button.state(["!disabled"])
 
 
 class TkChatMenu(Menu):
     def __init__(self, app: TkApp) -> None:
         super().__init__(app)
         self.app = app
-        self.add_command(command=lambda: TkLogWindow(app), label="Logs")
-        self.add_command(command=lambda: TkAboutWindow(app), label="About")
+        self.add_command(command=self.open_search, label="Search")
+        self.add_command(command=self.open_servers, label="Servers")
+        self.add_command(command=self.open_models, label="Models")
+        self.add_command(command=self.open_resources, label="Loaded Models")
+        self.add_command(command=self.open_logs, label="Logs")
+        self.add_command(command=self.open_diagnostics, label="Diagnostics")
+        self.add_command(command=self.toggle_profiling, label="")
+        profiling_index = self.index("end")
+        assert profiling_index is not None
+        self.profiling_index = profiling_index
+        self.add_command(command=self.open_about, label="About")
+        self.refresh_profiling()
+
+    # Windows are imported on demand to reduce startup time
+
+    def open_search(self) -> None:
+        from .search import TkSearchWindow
+
+        if isinstance(self.app.frame, TkChat):
+            TkSearchWindow(self.app.frame)
+
+    def open_servers(self) -> None:
+        from .servers import TkServersWindow
+
+        TkServersWindow(self.app)
+
+    def open_models(self) -> None:
+        from .models import TkModelsWindow
+
+        if isinstance(self.app.frame, TkChat):
+            TkModelsWindow(self.app, self.app.frame)
+
+    def open_resources(self) -> None:
+        from .resources import TkResourcesWindow
+
+        TkResourcesWindow(self.app)
+
+    def open_logs(self) -> None:
+        from .logging import TkLogWindow
+
+        TkLogWindow(self.app)
+
+    def open_diagnostics(self) -> None:
+        from .diagnostics import TkDiagnosticsWindow
+
+        TkDiagnosticsWindow(self.app)
+
+    def toggle_profiling(self) -> None:
+        if not self.app.profiling:
+            self.app.start_profiling()
+            return self.refresh_profiling()
+
+        from .profiler import TkProfileWindow
+
+        profile = self.app.profiler.stop_and_save()
+        self.refresh_profiling()
+        TkProfileWindow(self.app, profile)
+
+    def refresh_profiling(self) -> None:
+        label = "Stop Profiling" if self.app.profiling else "Start Profiling"
+        self.entryconfigure(self.profiling_index, label=label)
+
+    def open_about(self) -> None:
+        from .about import TkAboutWindow
+
+        TkAboutWindow(self.app)
@@ -0,0 +1,125 @@
+"""Keep long conversations fast by summarizing their older turns.
+
+Once a response's prompt grows past a threshold, the messages before
+the most recent few are summarized in the background, optionally with
+a smaller model. The summary is stored on the last message it covers
+and sent in place of every message up to it, while the original messages
+stay in the conversation. Since a message's position in the conversation
+tree fixes every message before it, the summary stays valid for any branch
+continuing from that message.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Sequence
+
+from .scheduler import Priority
+
+if TYPE_CHECKING:
+    from .http import DoneStreamingChat, HTTPClient
+
+log = logging.getLogger(__name__)
+
+COMPACTION_THRESHOLD = 4096
+"""The number of prompt tokens that a response must exceed to start compacting."""
+KEEP_RECENT_MESSAGES = 4
+"""The number of recent messages that are always sent as they are."""
+MIN_SUMMARIZED_MESSAGES = 2
+
+SUMMARY_INSTRUCTIONS = (
+    "Summarize the conversation below so it can be continued without it. "
+    "Keep every fact, decision, name, number and piece of code that may be "
+    "referred to later, and note any open questions. Reply with only the summary."
+)
+SUMMARY_PREFIX = "Summary of the conversation so far:\n\n"
+
+
+@dataclass(frozen=True)
+class PromptStats:
+    tokens: int
+    eval_duration: float
+    """How long the server took to evaluate the prompt, in seconds."""
+
+    @classmethod
+    def from_response(cls, done: DoneStreamingChat) -> PromptStats:
+        # Counts may be left out if the prompt was cached
+        tokens = done.get("prompt_eval_count", 0)
+        duration = done.get("prompt_eval_duration", 0)
+        return cls(tokens=tokens, eval_duration=duration / 1e9)
+
+    def format(self) -> str:
+        return f"{self.tokens} prompt tokens in {self.eval_duration:.2f}s"
+
+
+def find_compaction_point(
+    summarized: Sequence[bool],
+    *,
+    keep_recent: int = KEEP_RECENT_MESSAGES,
+) -> int | None:
+    """Return the index of the last message to summarize, or None if
+    too few messages were added since the latest summary.
+
+    :param summarized: Whether each message in the conversation has a summary.
+
+    """
+    end = len(summarized) - keep_recent - 1
+    start = 0
+    for i in range(len(summarized) - 1, -1, -1):
+        if summarized[i]:
+            start = i + 1
+            break
+
+    if end - start + 1 < MIN_SUMMARIZED_MESSAGES:
+        return None
+    return end
+
+
+def build_summary_request(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    transcript = "\n\n".join(
+        f"{message['role'].title()}: {message['content']}" for message in messages
+    )
+    return [
+        {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+        {"role": "user", "content": transcript},
+    ]
+
+
+def summary_message(summary: str) -> dict[str, Any]:
+    """Return the message sent in place of the summarized messages."""
+    return {"role": "system", "content": SUMMARY_PREFIX + summary}
+
+
+async def summarize(
+    http: HTTPClient,
+    *,
+    address: str,
+    model: str,
+    messages: list[dict[str, Any]],
+) -> str:
+    """Summarize messages, including any earlier summary among them.
+
+    This runs at background priority so it never delays a chat.
+
+    """
+    start = time.perf_counter()
+    content: list[str] = []
+    await http.generate_chat_completion(
+        address=address,
+        model=model,
+        messages=build_summary_request(messages),
+        stream_callback=lambda data: content.append(data["message"]["content"]),
+        priority=Priority.BACKGROUND,
+    )
+
+    summary = "".join(content).strip()
+    log.info(
+        "Summarized %d message(s) into %d characters with %s in %.1fs",
+        len(messages),
+        len(summary),
+        model,
+        time.perf_counter() - start,
+    )
+    return summary
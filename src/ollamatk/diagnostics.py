@@ -0,0 +1,349 @@
+"""Find memory growth and leaked widgets in long-running sessions.
+
+Snapshots combine ``tracemalloc`` statistics with counts of live Tk widgets,
+registered Tcl commands and callbacks held by the application. Comparing
+two snapshots shows which source lines allocated the most memory between
+them, along with any widgets or callbacks that outlived their owners.
+"""
+
+from __future__ import annotations
+
+import gc
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass, field
+from tkinter import Misc, TclError, Text, Toplevel
+from tkinter.ttk import Button, Label, Scrollbar
+from typing import TYPE_CHECKING, Callable, Iterable
+
+if TYPE_CHECKING:
+    from .app import TkApp
+
+TRACE_FRAMES = 5
+TOP_ALLOCATIONS = 10
+LOOP_STATS_INTERVAL = 1000
+
+# Allocations made by tracemalloc itself or while importing modules
+# aren't interesting when looking for leaks
+IGNORED_ALLOCATIONS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+@dataclass(frozen=True)
+class AllocationDiff:
+    location: str
+    size: int
+    size_diff: int
+    count_diff: int
+
+
+@dataclass
+class Snapshot:
+    taken_at: float
+    traced_size: int
+    widgets: Counter[str] = field(default_factory=Counter)
+    tcl_commands: int = 0
+    stale_widgets: Counter[str] = field(default_factory=Counter)
+    stale_callbacks: list[str] = field(default_factory=list)
+    sizes: dict[str, int] = field(default_factory=dict)
+    """The sizes of collections known to grow over a session."""
+    traces: tracemalloc.Snapshot | None = None
+
+
+def widget_exists(widget: Misc) -> bool:
+    try:
+        return bool(widget.winfo_exists())
+    except TclError:
+        return False  # The whole application was destroyed
+
+
+def count_widgets(root: Misc) -> Counter[str]:
+    """Count the widgets under the given root by class name."""
+    counts = Counter()
+    pending = [root]
+    while pending:
+        widget = pending.pop()
+        counts[type(widget).__name__] += 1
+        pending.extend(widget.children.values())
+    return counts
+
+
+def find_stale_widgets() -> Counter[str]:
+    """Count widgets that were destroyed but are still referenced somewhere."""
+    gc.collect()
+    counts = Counter()
+    for obj in gc.get_objects():
+        if isinstance(obj, Misc) and not widget_exists(obj):
+            counts[type(obj).__name__] += 1
+    return counts
+
+
+def find_stale_callbacks(callbacks: Iterable[Callable]) -> list[str]:
+    """Return the names of callbacks bound to widgets that no longer exist."""
+    stale = []
+    for callback in callbacks:
+        owner = getattr(callback, "__self__", None)
+        if isinstance(owner, Misc) and not widget_exists(owner):
+            stale.append(getattr(callback, "__qualname__", repr(callback)))
+    return stale
+
+
+def compare_traces(
+    old: tracemalloc.Snapshot,
+    new: tracemalloc.Snapshot,
+    *,
+    limit: int = TOP_ALLOCATIONS,
+) -> list[AllocationDiff]:
+    """Return the source lines whose allocations grew the most."""
+    old = old.filter_traces(IGNORED_ALLOCATIONS)
+    new = new.filter_traces(IGNORED_ALLOCATIONS)
+    diffs = []
+    for stat in new.compare_to(old, "lineno")[:limit]:
+        if stat.size_diff <= 0:
+            continue
+        frame = stat.traceback[0]
+        diffs.append(
+            AllocationDiff(
+                location=f"{frame.filename}:{frame.lineno}",
+                size=stat.size,
+                size_diff=stat.size_diff,
+                count_diff=stat.count_diff,
+            )
+        )
+    return diffs
+
+
+def measure_growth(
+    step: Callable[[], object],
+    *,
+    iterations: int,
+    warmup: int = 3,
+) -> float:
+    """Return the mean traced memory retained by each call to ``step``.
+
+    Warmup calls are made first so caches and lazy imports don't count
+    as growth. Tracing is started if it isn't already running.
+
+    """
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(TRACE_FRAMES)
+
+    try:
+        for _ in range(warmup):
+            step()
+        gc.collect()
+        before = tracemalloc.get_traced_memory()[0]
+
+        for _ in range(iterations):
+            step()
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        if started:
+            tracemalloc.stop()
+
+    return (after - before) / iterations
+
+
+def format_bytes(size: float) -> str:
+    if abs(size) < 1024:
+        return f"{size:.0f} B"
+
+    for unit in ("KB", "MB", "GB"):
+        size /= 1024
+        if abs(size) < 1024:
+            break
+    return f"{size:.1f} {unit}"
+
+
+def format_change(
+    new: float,
+    old: float | None,
+    format: Callable[[float], str] = str,
+) -> str:
+    if old is None or new == old:
+        return format(new)
+    sign = "+" if new > old else ""
+    return f"{format(new)} ({sign}{format(new - old)})"
+
+
+class Diagnostics:
+    """Takes snapshots of the application's memory usage on demand.
+
+    Tracing starts with the first snapshot, so allocations made before then
+    can't be attributed to source lines.
+
+    """
+
+    snapshots: list[Snapshot]
+
+    def __init__(self, app: TkApp) -> None:
+        self.app = app
+        self.snapshots = []
+
+    def take_snapshot(self) -> Snapshot:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+
+        app = self.app
+        callbacks = [*app.logs.callbacks, *app.resources.subscribers]
+        snapshot = Snapshot(
+            taken_at=time.monotonic(),
+            traced_size=tracemalloc.get_traced_memory()[0],
+            widgets=count_widgets(app),
+            tcl_commands=len(app.tk.splitlist(app.tk.call("info", "commands"))),
+            stale_widgets=find_stale_widgets(),
+            stale_callbacks=find_stale_callbacks(callbacks),
+            sizes=self._measure_sizes(),
+            traces=tracemalloc.take_snapshot(),
+        )
+        self.snapshots.append(snapshot)
+
+        # Traces are large, and only the latest two are ever compared
+        for old in self.snapshots[:-2]:
+            old.traces = None
+        return snapshot
+
+    def format_report(self, snapshot: Snapshot) -> str:
+        """Describe a snapshot and how it changed since the one before it."""
+        index = self.snapshots.index(snapshot)
+        previous = self.snapshots[index - 1] if index > 0 else None
+
+        lines = [f"Snapshot {index + 1}"]
+        if previous is not None:
+            elapsed = snapshot.taken_at - previous.taken_at
+            lines[0] += f", {elapsed:.0f}s after snapshot {index}"
+
+        old_size = previous.traced_size if previous else None
+        lines.append(
+            "Traced memory: "
+            + format_change(snapshot.traced_size, old_size, format_bytes)
+        )
+        total = sum(snapshot.widgets.values())
+        old_total = sum(previous.widgets.values()) if previous else None
+        lines.append("Widgets: " + format_change(total, old_total))
+        for name, count in snapshot.widgets.most_common(8):
+            old_count = previous.widgets[name] if previous else None
+            lines.append(f"  {name}: " + format_change(count, old_count))
+
+        old_commands = previous.tcl_commands if previous else None
+        lines.append(
+            "Tcl commands: " + format_change(snapshot.tcl_commands, old_commands)
+        )
+        for name, size in snapshot.sizes.items():
+            old_sizes = previous.sizes.get(name) if previous else None
+            lines.append(f"{name}: " + format_change(size, old_sizes))
+
+        lines.append("")
+        if snapshot.stale_widgets:
+            lines.append("Destroyed widgets still referenced:")
+            for name, count in snapshot.stale_widgets.most_common():
+                lines.append(f"  {name}: {count}")
+        else:
+            lines.append("No destroyed widgets are still referenced.")
+
+        if snapshot.stale_callbacks:
+            lines.append("Callbacks outliving their widgets:")
+            lines.extend(f"  {name}" for name in snapshot.stale_callbacks)
+        else:
+            lines.append("No callbacks are outliving their widgets.")
+
+        if previous is None or previous.traces is None or snapshot.traces is None:
+            lines.append("")
+            lines.append("Take another snapshot to compare allocations.")
+            return "\n".join(lines)
+
+        lines.append("")
+        lines.append("Top allocations since the last snapshot:")
+        for diff in compare_traces(previous.traces, snapshot.traces):
+            lines.append(
+                f"  +{format_bytes(diff.size_diff)} "
+                f"({diff.count_diff:+d} blocks) {diff.location}"
+            )
+        return "\n".join(lines)
+
+    def _measure_sizes(self) -> dict[str, int]:
+        from .chat import TkChat
+
+        sizes = {"Log messages": len(self.app.logs)}
+        if isinstance(self.app.frame, TkChat):
+            chat = self.app.frame
+            sizes["Chat messages"] = len(chat.message_list)
+            sizes["Queued prompts"] = len(chat.prompt_queue)
+        return sizes
+
+
+class TkDiagnosticsWindow(Toplevel):
+    def __init__(self, app: TkApp) -> None:
+        super().__init__(app)
+
+        self.app = app
+        self.diagnostics = app.diagnostics
+        self._refresh_id: str | None = None
+
+        self.title("Diagnostics")
+        self.geometry("640x550")
+
+        self.snapshot = Button(self, command=self.do_snapshot, text="Take Snapshot")
+        self.snapshot.pack(side="bottom", anchor="e", padx=(0, 10), pady=10)
+
+        self.loop_stats = Label(self)
+        self.loop_stats.pack(side="bottom", anchor="w", padx=10, pady=(10, 0))
+
+        self.text = Text(
+            self,
+            font="TkFixedFont",
+            width=0,
+            height=0,
+            state="disabled",
+        )
+        self.text.pack(
+            side="left",
+            expand=True,
+            fill="both",
+            padx=(10, 0),
+            pady=(10, 0),
+        )
+
+        self.scrollbar = Scrollbar(self, command=self.text.yview)
+        self.text.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(expand=True, fill="y", padx=(0, 10), pady=(10, 0))
+
+        if self.diagnostics.snapshots:
+            self.show(self.diagnostics.format_report(self.diagnostics.snapshots[-1]))
+        else:
+            self.show("Take a snapshot to start tracing memory allocations.")
+
+        self.refresh_loop_stats()
+
+    def do_snapshot(self) -> None:
+        snapshot = self.diagnostics.take_snapshot()
+        self.show(self.diagnostics.format_report(snapshot))
+
+    def refresh_loop_stats(self) -> None:
+        """Show the event loop's latest stats, repeating until closed."""
+        monitor = self.app.event_thread.monitor
+        if monitor is None:
+            self.loop_stats.configure(text="The event loop is not being monitored.")
+        else:
+            self.loop_stats.configure(text=monitor.stats.format())
+
+        self._refresh_id = self.after(LOOP_STATS_INTERVAL, self.refresh_loop_stats)
+
+    def destroy(self) -> None:
+        if self._refresh_id is not None:
+            self.after_cancel(self._refresh_id)
+            self._refresh_id = None
+        super().destroy()
+
+    def show(self, report: str) -> None:
+        self.text.configure(state="normal")
+        self.text.delete("1.0", "end")
+        self.text.insert("1.0", report)
+        self.text.configure(state="disabled")
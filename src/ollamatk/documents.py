@@ -0,0 +1,348 @@
+"""Retrieval-augmented generation over local documents.
+
+Documents are read through memory-mapped files, split into overlapping
+chunks and embedded in batches, with only a few batches in flight at once.
+Before each chat, the chunks most similar to the latest user message
+are inserted into the conversation as context.
+
+NumPy is required, which is installed with the ``search`` extra.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import codecs
+import concurrent.futures
+import hashlib
+import itertools
+import logging
+import mmap
+from dataclasses import dataclass, field
+from pathlib import Path
+from tkinter import Event
+from tkinter.ttk import Frame, Label
+from typing import TYPE_CHECKING, Any, Iterator
+
+from .scheduler import Priority
+from .vectors import VectorIndex
+
+if TYPE_CHECKING:
+    from .chat import TkChat
+    from .http import HTTPClient
+
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1500
+CHUNK_OVERLAP = 200
+READ_SIZE = 1 << 20
+EMBED_BATCH_SIZE = 16
+EMBED_CONCURRENCY = 2
+RETRIEVE_COUNT = 4
+
+DOCUMENT_FILETYPES = [
+    ("Documents", "*.txt *.md *.rst *.csv *.json *.html *.py"),
+]
+
+CONTEXT_PROMPT = (
+    "Use the following excerpts from documents provided by the user "
+    "to answer their next message, if they are relevant.\n\n{excerpts}"
+)
+
+
+@dataclass(frozen=True)
+class Chunk:
+    path: str
+    index: int
+    text: str
+
+
+@dataclass
+class Document:
+    path: str
+    digest: str
+    chunk_ids: list[int] = field(default_factory=list)
+
+    @property
+    def name(self) -> str:
+        return Path(self.path).name
+
+
+def read_document(
+    path: Path | str,
+    *,
+    size: int = CHUNK_SIZE,
+    overlap: int = CHUNK_OVERLAP,
+) -> tuple[str, list[str]]:
+    """Hash and chunk a UTF-8 text file, returning ``(digest, chunks)``.
+
+    The file is memory-mapped so it is never read into memory all at once.
+
+    """
+    with open(path, "rb") as f:
+        if f.seek(0, 2) == 0:
+            return hashlib.sha256().hexdigest(), []
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            digest = hashlib.sha256(m).hexdigest()
+            chunks = list(iter_chunks(m, size=size, overlap=overlap))
+
+    return digest, chunks
+
+
+def iter_chunks(
+    data: mmap.mmap | bytes,
+    *,
+    size: int = CHUNK_SIZE,
+    overlap: int = CHUNK_OVERLAP,
+) -> Iterator[str]:
+    """Decode and split text into chunks of up to ``size`` characters.
+
+    Chunks are split on paragraph, line or word boundaries when possible,
+    and each chunk repeats up to ``overlap`` characters of the last one
+    so that sentences cut at a boundary still appear whole in one chunk.
+
+    """
+    if not 0 <= overlap < size // 2:
+        raise ValueError("overlap must be less than half of size")
+
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+
+    for start in range(0, len(data), READ_SIZE):
+        buffer += decoder.decode(data[start : start + READ_SIZE])
+
+        # Track an offset rather than slicing the buffer after every chunk,
+        # which would copy the rest of the buffer each time
+        position = 0
+        while len(buffer) - position >= size:
+            cut = _find_cut(buffer, position, size)
+            yield buffer[position:cut].strip()
+            position = cut - overlap
+        buffer = buffer[position:]
+
+    buffer += decoder.decode(b"", final=True)
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def _find_cut(text: str, start: int, size: int) -> int:
+    for separator in ("\n\n", "\n", " "):
+        i = text.rfind(separator, start + size // 2, start + size)
+        if i != -1:
+            return i + len(separator)
+    return start + size
+
+
+class DocumentIndex:
+    """Embeds chunks of local documents for retrieval during a conversation."""
+
+    documents: dict[str, Document]
+    chunks: dict[int, Chunk]
+
+    def __init__(
+        self,
+        *,
+        model: str,
+        batch_size: int = EMBED_BATCH_SIZE,
+        concurrency: int = EMBED_CONCURRENCY,
+    ) -> None:
+        self.model = model
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.documents = {}
+        self.chunks = {}
+        self.vectors = VectorIndex(model=model)
+        self._ids = itertools.count(1)
+        self._semaphore: asyncio.Semaphore | None = None
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    async def ingest(self, http: HTTPClient, address: str, path: Path | str) -> bool:
+        """Read and embed a document, replacing any previous version.
+
+        Returns False if the document was unchanged since it was last ingested.
+
+        """
+        path = str(Path(path).resolve())
+        digest, texts = await asyncio.to_thread(read_document, path)
+
+        document = self.documents.get(path)
+        if document is not None and document.digest == digest:
+            return False
+
+        batches = [
+            texts[i : i + self.batch_size]
+            for i in range(0, len(texts), self.batch_size)
+        ]
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(self._embed(http, address, b)) for b in batches]
+        embeddings = [e for task in tasks for e in task.result()]
+
+        # Another ingestion of the same file may have finished first
+        document = self.documents.get(path)
+        if document is not None and document.digest == digest:
+            return False
+        elif document is not None:
+            self._remove_chunks(document)
+
+        document = Document(path, digest)
+        for i, text in enumerate(texts):
+            id = next(self._ids)
+            self.chunks[id] = Chunk(path, i, text)
+            document.chunk_ids.append(id)
+
+        await asyncio.to_thread(self.vectors.add, document.chunk_ids, embeddings)
+        self.documents[path] = document
+        log.info("Ingested %s as %d chunk(s)", document.name, len(texts))
+        return True
+
+    def remove(self, path: Path | str) -> None:
+        document = self.documents.pop(str(Path(path).resolve()), None)
+        if document is not None:
+            self._remove_chunks(document)
+
+    async def retrieve(
+        self,
+        http: HTTPClient,
+        address: str,
+        query: str,
+        *,
+        k: int = RETRIEVE_COUNT,
+    ) -> list[Chunk]:
+        """Return up to ``k`` chunks most similar to the query."""
+        if not self.chunks or not query.strip():
+            return []
+
+        # The user is waiting on this query, so it shouldn't be queued
+        # behind any documents that are still being ingested
+        (embedding,) = await http.embed(
+            address=address,
+            model=self.model,
+            inputs=[query],
+            priority=Priority.INTERACTIVE,
+        )
+        matches = await asyncio.to_thread(self.vectors.search, embedding, k=k)
+        return [self.chunks[id] for id, score in matches if id in self.chunks]
+
+    async def inject_context(
+        self,
+        http: HTTPClient,
+        address: str,
+        messages: list[dict[str, Any]],
+    ) -> list[dict[str, Any]]:
+        """Insert relevant chunks before the last user message, if any."""
+        for i in range(len(messages) - 1, -1, -1):
+            if messages[i]["role"] == "user":
+                break
+        else:
+            return messages
+
+        chunks = await self.retrieve(http, address, messages[i]["content"])
+        if not chunks:
+            return messages
+
+        excerpts = "\n\n".join(
+            f"[{Path(chunk.path).name}, part {chunk.index + 1}]\n{chunk.text}"
+            for chunk in chunks
+        )
+        context = {
+            "role": "system",
+            "content": CONTEXT_PROMPT.format(excerpts=excerpts),
+        }
+        return messages[:i] + [context] + messages[i:]
+
+    async def _embed(
+        self,
+        http: HTTPClient,
+        address: str,
+        inputs: list[str],
+    ) -> list[list[float]]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        async with self._semaphore:
+            return await http.embed(address=address, model=self.model, inputs=inputs)
+
+    def _remove_chunks(self, document: Document) -> None:
+        for id in document.chunk_ids:
+            self.chunks.pop(id, None)
+        self.vectors.remove(document.chunk_ids)
+
+
+class TkDocuments(Frame):
+    """Shows documents attached to the current conversation.
+
+    Documents are ingested in the background when added, and remain
+    attached until the conversation is cleared. Clicking a document
+    detaches it.
+
+    """
+
+    index: DocumentIndex | None
+
+    def __init__(self, parent: Frame, chat: TkChat) -> None:
+        super().__init__(parent)
+
+        self.chat = chat
+        self.index = None
+        self._slots: dict[str, Label] = {}
+
+    def add(self, path: Path | str) -> None:
+        path = str(Path(path).resolve())
+        settings = self.chat.settings
+
+        if self.index is None or self.index.model != settings.embedding_model:
+            try:
+                self.index = DocumentIndex(model=settings.embedding_model)
+            except ImportError:
+                log.error("Attaching documents requires the optional search extra")
+                return
+            self._clear_slots()
+
+        slot = self._slots.get(path)
+        if slot is None:
+            slot = self._slots[path] = Label(self)
+            slot.pack(side="left", padx=(0, 5))
+            slot.bind("<1>", lambda event: self._on_slot_click(event, path))
+        slot.configure(text=f"Reading {Path(path).name}...")
+
+        index = self.index
+        coro = index.ingest(self.chat.app.http, settings.ollama_address, path)
+        fut = self.chat.app.event_thread.submit(coro)
+        fut.add_done_callback(lambda fut: self._on_ingest_done(fut, index, path))
+
+    def clear(self) -> None:
+        self.index = None
+        self._clear_slots()
+
+    def _clear_slots(self) -> None:
+        for slot in self._slots.values():
+            slot.destroy()
+        self._slots.clear()
+
+    def _on_ingest_done(
+        self,
+        fut: concurrent.futures.Future[bool],
+        index: DocumentIndex,
+        path: str,
+    ) -> None:
+        slot = self._slots.get(path)
+        if index is not self.index or fut.cancelled():
+            return
+        elif slot is None:
+            # Detached while it was being ingested
+            return index.remove(path)
+        elif (exc := fut.exception()) is not None:
+            log.exception("Error occurred while ingesting document", exc_info=exc)
+            slot.configure(text=f"{Path(path).name} (failed)")
+            return
+
+        slot.configure(text=Path(path).name)
+
+    def _on_slot_click(self, event: Event, path: str) -> None:
+        slot = self._slots.pop(path, None)
+        if slot is not None:
+            slot.destroy()
+        if self.index is not None:
+            self.index.remove(path)
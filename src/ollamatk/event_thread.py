@@ -1,11 +1,83 @@
 # https://gist.github.com/thegamecracks/564bd55af973827f8a05b48f197d5c09
+from __future__ import annotations
+
 import asyncio
 import concurrent.futures
+import functools
 import threading
-from typing import Any, Coroutine, Self, TypeVar
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Coroutine,
+    Iterable,
+    Literal,
+    ParamSpec,
+    Self,
+    TypeVar,
+)
+
+if TYPE_CHECKING:
+    from .loop_monitor import LoopMonitor
 
+P = ParamSpec("P")
 T = TypeVar("T")
 
+LoopPolicy = Literal["auto", "asyncio", "uvloop"]
+ExecutorKind = Literal["thread", "process"]
+
+
+def get_loop_factory(
+    policy: LoopPolicy = "auto",
+) -> Callable[[], asyncio.AbstractEventLoop] | None:
+    """Return a factory for the given event loop implementation.
+
+    With ``"auto"``, uvloop is used if it is installed, otherwise None is
+    returned to use the default loop. ``"uvloop"`` raises ImportError
+    if uvloop is not installed.
+
+    """
+    if policy == "asyncio":
+        return None
+
+    try:
+        import uvloop
+    except ImportError:
+        if policy == "uvloop":
+            raise
+        return None
+
+    return uvloop.new_event_loop
+
+
+def create_executor(
+    kind: ExecutorKind = "thread",
+    *,
+    max_workers: int | None = None,
+    name: str = "ollamatk-worker",
+) -> concurrent.futures.Executor:
+    """Create an executor for CPU-bound work.
+
+    Process pools avoid contention on the GIL, but can only run
+    picklable functions and arguments.
+
+    """
+    if kind == "process":
+        return concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+    return concurrent.futures.ThreadPoolExecutor(
+        max_workers=max_workers,
+        thread_name_prefix=name,
+    )
+
+
+async def _gather(
+    coros: Iterable[Coroutine[Any, Any, T]],
+    *,
+    return_exceptions: bool,
+) -> list[Any]:
+    # With return_exceptions=True, results may also include exceptions
+    return list(await asyncio.gather(*coros, return_exceptions=return_exceptions))
+
 
 class EventThread(threading.Thread):
     """Runs an asyncio event loop in a separate thread.
@@ -16,6 +88,16 @@ class EventThread(threading.Thread):
         ...     future = asyncio.run_coroutine_threadsafe(my_task(), loop)
         ...     result = future.result()
         >>> # Event loop will be cleaned up before exiting
+
+    If a :class:`LoopMonitor` is given, it will run alongside the loop
+    to report any callbacks that block it.
+
+    The loop can be created with a custom ``loop_factory``, such as
+    one returned by :func:`get_loop_factory()`. If an ``executor`` is given,
+    it is owned by the thread and shut down with the loop. A thread pool
+    also becomes the loop's default executor, which :func:`asyncio.to_thread()`
+    relies on, whereas a process pool can only be used through
+    :meth:`run_in_executor()` since ``to_thread()`` can't pickle its calls.
     """
 
     loop_fut: concurrent.futures.Future[asyncio.AbstractEventLoop]
@@ -26,11 +108,19 @@ class EventThread(threading.Thread):
         self,
         *args,
         loop_timeout: float | None = 5,
+        monitor: LoopMonitor | None = None,
+        loop_factory: Callable[[], asyncio.AbstractEventLoop] | None = None,
+        executor: concurrent.futures.Executor | None = None,
         **kwargs,
     ) -> None:
         super().__init__(*args, **kwargs)
 
         self.loop_timeout = loop_timeout
+        self.monitor = monitor
+        self.loop_factory = loop_factory
+        self.executor = executor
+        self.in_flight = 0
+        self._in_flight_lock = threading.Lock()
 
         self.loop_fut = concurrent.futures.Future()
         self.stop_fut = concurrent.futures.Future()
@@ -51,12 +141,67 @@ class EventThread(threading.Thread):
 
     def run(self) -> None:
         try:
-            asyncio.run(self._run_forever())
+            with asyncio.Runner(loop_factory=self.loop_factory) as runner:
+                if isinstance(self.executor, concurrent.futures.ThreadPoolExecutor):
+                    runner.get_loop().set_default_executor(self.executor)
+                runner.run(self._run_forever())
         finally:
+            if self.executor is not None:
+                self.executor.shutdown(wait=True, cancel_futures=True)
             self.finished_fut.set_result(None)
 
+    async def run_in_executor(
+        self,
+        func: Callable[P, T],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> T:
+        """Run a function in this thread's executor, or the loop's default
+        executor if none was given.
+
+        This must be awaited from the event loop.
+
+        """
+        call = functools.partial(func, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, call)
+
     def submit(self, coro: Coroutine[Any, Any, T]) -> concurrent.futures.Future[T]:
-        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+        fut = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        with self._in_flight_lock:
+            self.in_flight += 1
+        fut.add_done_callback(self._on_submission_done)
+        return fut
+
+    def submit_many(
+        self,
+        coros: Iterable[Coroutine[Any, Any, T]],
+        *,
+        return_exceptions: bool = False,
+        on_done: Callable[[concurrent.futures.Future[list[T]]], object] | None = None,
+    ) -> concurrent.futures.Future[list[T]]:
+        """Run several coroutines concurrently, returning a future for
+        a list of their results in the same order.
+
+        Unlike calling :meth:`submit()` for each coroutine, the whole batch
+        is scheduled with a single wakeup of the event loop and completes
+        with a single callback, which matters when there are many small
+        operations. Cancelling the future cancels every coroutine.
+
+        If ``on_done`` is given, it is called once with the future after
+        every coroutine has finished, from whichever thread finished it.
+        This can hand the whole batch to another thread in one notification,
+        like :meth:`TkApp.submit_many() <ollamatk.app.TkApp.submit_many>` does.
+
+        """
+        fut = self.submit(_gather(coros, return_exceptions=return_exceptions))
+        if on_done is not None:
+            fut.add_done_callback(on_done)
+        return fut
+
+    def _on_submission_done(self, fut: concurrent.futures.Future) -> None:
+        with self._in_flight_lock:
+            self.in_flight -= 1
 
     def stop(self) -> None:
         try:
@@ -65,5 +210,15 @@ class EventThread(threading.Thread):
             pass
 
     async def _run_forever(self) -> None:
+        monitor_task = None
+        if self.monitor is not None:
+            monitor_task = asyncio.create_task(
+                self.monitor.run(in_flight=lambda: self.in_flight)
+            )
+
         self.loop_fut.set_result(asyncio.get_running_loop())
-        await asyncio.wrap_future(self.stop_fut)
+        try:
+            await asyncio.wrap_future(self.stop_fut)
+        finally:
+            if monitor_task is not None:
+                monitor_task.cancel()
@@ -0,0 +1,106 @@
+"""Syntax highlighting for code blocks using Pygments, if installed.
+
+Code is lexed in an executor, producing spans of ``(tag, line, start, end)``
+where ``line`` is zero-indexed relative to the start of the code block
+and ``start``/``end`` are column offsets. Tags are named after the
+Pygments token type being highlighted, e.g. ``"hl.Keyword"``.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import hashlib
+import threading
+
+Span = tuple[str, int, int, int]
+
+# Token types to highlight. Sub-types not listed here use the colour
+# of their closest parent, e.g. Literal.String.Doc uses Literal.String.
+TOKEN_COLOURS = {
+    "Comment": "#6a737d",
+    "Keyword": "#d73a49",
+    "Literal": "#005cc5",
+    "Literal.String": "#032f62",
+    "Name.Builtin": "#005cc5",
+    "Name.Class": "#6f42c1",
+    "Name.Decorator": "#6f42c1",
+    "Name.Function": "#6f42c1",
+    "Operator": "#d73a49",
+}
+
+
+def _get_tag(token_type) -> str | None:
+    while token_type is not None and len(token_type) > 0:
+        name = ".".join(token_type)
+        if name in TOKEN_COLOURS:
+            return f"hl.{name}"
+        token_type = token_type.parent
+    return None
+
+
+def lex_code(language: str, code: str) -> list[Span]:
+    """Lex the given code into highlighted spans.
+
+    This is CPU-bound and should not be called on the Tk thread.
+    If Pygments is not installed or the language is not recognized,
+    an empty list is returned.
+
+    """
+    try:
+        from pygments.lexers import get_lexer_by_name
+        from pygments.util import ClassNotFound
+    except ImportError:
+        return []
+
+    try:
+        lexer = get_lexer_by_name(language or "text", stripnl=False, ensurenl=False)
+    except ClassNotFound:
+        return []
+
+    spans: list[Span] = []
+    line = column = 0
+    for token_type, value in lexer.get_tokens(code):
+        tag = _get_tag(token_type)
+        # Tokens like multi-line strings need to be split across lines
+        for i, part in enumerate(value.split("\n")):
+            if i > 0:
+                line += 1
+                column = 0
+            if tag is not None and part:
+                spans.append((tag, line, column, column + len(part)))
+            column += len(part)
+
+    return spans
+
+
+class CodeHighlighter:
+    """Lexes code in an executor, caching results per language and code hash."""
+
+    _cache: dict[tuple[str, str], list[Span]]
+
+    def __init__(self, executor: concurrent.futures.Executor) -> None:
+        self.executor = executor
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def highlight(
+        self,
+        language: str,
+        code: str,
+    ) -> concurrent.futures.Future[list[Span]]:
+        key = (language.lower(), hashlib.sha1(code.encode()).hexdigest())
+        with self._lock:
+            spans = self._cache.get(key)
+
+        if spans is not None:
+            fut = concurrent.futures.Future()
+            fut.set_result(spans)
+            return fut
+
+        return self.executor.submit(self._lex, key, language, code)
+
+    def _lex(self, key: tuple[str, str], language: str, code: str) -> list[Span]:
+        spans = lex_code(language, code)
+        with self._lock:
+            self._cache[key] = spans
+        return spans
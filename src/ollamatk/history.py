@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator
+
+# Control characters are used to mark matches in snippets since
+# they can't be confused with the message's own content
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+
+MESSAGE_COLUMNS = (
+    "message.id, message.conversation, message.role, message.content, "
+    "message.created_at, message.tool_calls, message.tool_name, message.parent_id"
+)
+
+
+def get_data_dir() -> Path:
+    """Return the directory where conversations and indexes are stored.
+
+    This can be overridden with the ``OLLAMATK_DATA_DIR`` environment variable.
+
+    """
+    if path := os.environ.get("OLLAMATK_DATA_DIR"):
+        return Path(path)
+    elif sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Application Support"
+    else:
+        base = os.environ.get("XDG_DATA_HOME") or Path.home() / ".local" / "share"
+    return Path(base) / "ollama-tk"
+
+
+@dataclass(frozen=True)
+class StoredMessage:
+    id: int
+    conversation: str
+    role: str
+    content: str
+    created_at: float
+    tool_calls: list[dict[str, Any]] | None = None
+    tool_name: str | None = None
+    parent_id: int | None = None
+    """The message this replies to, or None for the first message
+    of each branch at the start of the conversation."""
+
+    @classmethod
+    def from_row(cls, row: tuple[Any, ...]) -> StoredMessage:
+        *fields, tool_calls, tool_name, parent_id = row
+        if tool_calls is not None:
+            tool_calls = json.loads(tool_calls)
+        return cls(
+            *fields,
+            tool_calls=tool_calls,
+            tool_name=tool_name,
+            parent_id=parent_id,
+        )
+
+
+@dataclass(frozen=True)
+class TextMatch:
+    message: StoredMessage
+    snippet: str
+    """An excerpt of the message with matches wrapped in
+    :data:`MATCH_START` and :data:`MATCH_END`."""
+
+
+def build_fts_query(text: str) -> str:
+    """Convert user input into an FTS5 query matching every term.
+
+    Double-quoted parts of the input are matched as phrases, and any
+    other characters are treated literally instead of as query syntax.
+
+    """
+    terms = []
+    for m in re.finditer(r'"([^"]*)"?|(\S+)', text):
+        term = m.group(1) if m.group(1) is not None else m.group(2)
+        if term.strip():
+            terms.append('"' + term.replace('"', '""') + '"')
+    return " ".join(terms)
+
+
+class ConversationHistory:
+    """Stores finished messages from every conversation in an SQLite database.
+
+    Message IDs are assigned in increasing order, allowing indexes to
+    process new messages incrementally by remembering the last ID they saw.
+    A full-text index is kept up to date by a trigger on every insert.
+
+    Each message refers to the one it replies to, so every branch of
+    a conversation can be rebuilt rather than only the latest one.
+
+    The database may be accessed from any thread.
+
+    """
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        if str(path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._create_tables()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def add_message(
+        self,
+        conversation: str,
+        role: str,
+        content: str,
+        *,
+        tool_calls: list[dict[str, Any]] | None = None,
+        tool_name: str | None = None,
+        parent_id: int | None = None,
+    ) -> int:
+        encoded_calls = json.dumps(tool_calls) if tool_calls else None
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO message (conversation, role, content, created_at, "
+                "tool_calls, tool_name, parent_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    conversation,
+                    role,
+                    content,
+                    time.time(),
+                    encoded_calls,
+                    tool_name,
+                    parent_id,
+                ),
+            )
+            assert cursor.lastrowid is not None
+            return cursor.lastrowid
+
+    def get_message(self, id: int) -> StoredMessage | None:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {MESSAGE_COLUMNS} FROM message WHERE id = ?",
+                (id,),
+            ).fetchone()
+        return StoredMessage.from_row(row) if row is not None else None
+
+    def get_messages_after(
+        self,
+        id: int,
+        *,
+        limit: int = 1000,
+    ) -> list[StoredMessage]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {MESSAGE_COLUMNS} FROM message WHERE id > ? "
+                "ORDER BY id LIMIT ?",
+                (id, limit),
+            ).fetchall()
+        return [StoredMessage.from_row(row) for row in rows]
+
+    def get_conversation(self, conversation: str) -> list[StoredMessage]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {MESSAGE_COLUMNS} FROM message WHERE conversation = ? "
+                "ORDER BY id",
+                (conversation,),
+            ).fetchall()
+        return [StoredMessage.from_row(row) for row in rows]
+
+    def search_text(self, text: str, *, limit: int = 50) -> list[TextMatch]:
+        """Return messages containing every term in the given text,
+        with the most relevant messages first.
+        """
+        query = build_fts_query(text)
+        if not query:
+            return []
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {MESSAGE_COLUMNS}, snippet(message_fts, 0, ?, ?, '...', 16) "
+                "FROM message_fts JOIN message ON message.id = message_fts.rowid "
+                "WHERE message_fts MATCH ? ORDER BY rank LIMIT ?",
+                (MATCH_START, MATCH_END, query, limit),
+            ).fetchall()
+        return [TextMatch(StoredMessage.from_row(row[:-1]), row[-1]) for row in rows]
+
+    def iter_messages_after(self, id: int) -> Iterator[list[StoredMessage]]:
+        """Yield every message after the given ID in batches."""
+        while messages := self.get_messages_after(id):
+            yield messages
+            id = messages[-1].id
+
+    def _create_tables(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS message ("
+                "    id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                "    conversation TEXT NOT NULL,"
+                "    role TEXT NOT NULL,"
+                "    content TEXT NOT NULL,"
+                "    created_at REAL NOT NULL,"
+                "    tool_calls TEXT,"
+                "    tool_name TEXT,"
+                "    parent_id INTEGER"
+                ")"
+            )
+            self._add_missing_columns()
+
+            exists = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'message_fts'"
+            ).fetchone()
+            if exists:
+                return
+
+            # The index refers to the message table for its content
+            # rather than storing a second copy of every message
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE message_fts USING fts5("
+                "    content, content='message', content_rowid='id'"
+                ")"
+            )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS message_fts_insert AFTER INSERT ON message BEGIN"
+                "    INSERT INTO message_fts (rowid, content)"
+                "    VALUES (new.id, new.content);"
+                "END"
+            )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS message_fts_delete AFTER DELETE ON message BEGIN"
+                "    INSERT INTO message_fts (message_fts, rowid, content)"
+                "    VALUES ('delete', old.id, old.content);"
+                "END"
+            )
+            # Index any messages stored before full-text search was added
+            self._conn.execute(
+                "INSERT INTO message_fts (message_fts) VALUES ('rebuild')"
+            )
+
+    def _add_missing_columns(self) -> None:
+        """Upgrade a database created by an older version in place."""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(message)")}
+        # Tool calls are stored as JSON, and both are NULL for other messages
+        for name in ("tool_calls", "tool_name"):
+            if name not in columns:
+                self._conn.execute(f"ALTER TABLE message ADD COLUMN {name} TEXT")
+
+        if "parent_id" not in columns:
+            self._conn.execute("ALTER TABLE message ADD COLUMN parent_id INTEGER")
+            # Branches weren't stored before, so each older message is
+            # treated as a reply to the one before it
+            self._conn.execute(
+                "UPDATE message SET parent_id = ("
+                "    SELECT MAX(id) FROM message AS previous"
+                "    WHERE previous.conversation = message.conversation"
+                "    AND previous.id < message.id"
+                ")"
+            )
@@ -1,11 +1,34 @@
+from __future__ import annotations
+
 import asyncio
 import json
-from typing import Any, Callable, Literal, TypedDict, cast
+import logging
+import time
+from contextlib import AsyncExitStack, nullcontext
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncContextManager,
+    Callable,
+    ContextManager,
+    Literal,
+    NotRequired,
+    TypedDict,
+    cast,
+)
 
 import httpx
 
 from .installable import Installable
-from .messages import Role
+from .pool import ServerPool, normalize_model_name
+from .recording import ChatRecorder, StreamRecording
+from .scheduler import Priority, RequestScheduler
+
+if TYPE_CHECKING:
+    # Avoid importing tkinter so this module can be used headlessly
+    from .messages import Role
+
+log = logging.getLogger(__name__)
 
 
 # https://github.com/ollama/ollama/blob/main/docs/api.md#generate-a-chat-completion
@@ -13,6 +36,16 @@ class Message(TypedDict):
     role: Role
     content: str
     images: list[str] | None
+    tool_calls: NotRequired[list[ToolCall]]
+
+
+class ToolCallFunction(TypedDict):
+    name: str
+    arguments: dict[str, Any]
+
+
+class ToolCall(TypedDict):
+    function: ToolCallFunction
 
 
 class StreamingChat(TypedDict):
@@ -34,11 +67,53 @@ class DoneStreamingChat(TypedDict):
     eval_duration: int  # in nanoseconds
 
 
+# https://github.com/ollama/ollama/blob/main/docs/api.md#list-running-models
+class RunningModel(TypedDict):
+    name: str
+    model: str
+    size: int  # in bytes
+    size_vram: int  # in bytes
+    expires_at: str
+
+
+# https://github.com/ollama/ollama/blob/main/docs/api.md#pull-a-model
+class PullResponse(TypedDict, total=False):
+    status: str
+    digest: str
+    total: int  # in bytes
+    completed: int  # in bytes
+
+
+KEEPALIVE_EXPIRY = 300
+PULL_TIMEOUT = httpx.Timeout(10, read=300)
+
+
+def get_server_key(address: httpx.URL | str) -> str:
+    """Return the origin of an address, identifying its server."""
+    url = httpx.URL(address)
+    return f"{url.scheme}://{url.netloc.decode('ascii')}"
+
+
 class HTTPClient(Installable):
     _client: httpx.AsyncClient | None
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        *,
+        transport: httpx.AsyncBaseTransport | None = None,
+        recorder: ChatRecorder | None = None,
+        limits: httpx.Limits | None = None,
+        scheduler: RequestScheduler | None = None,
+        pool: ServerPool | None = None,
+    ) -> None:
         super().__init__()
+        self.transport = transport
+        self.recorder = recorder
+        self.scheduler = scheduler
+        self.pool = pool or ServerPool()
+        # Keep idle connections around for longer so a connection
+        # opened by warm_up() can still be reused by the first chat
+        self.limits = limits or httpx.Limits(keepalive_expiry=KEEPALIVE_EXPIRY)
         self._client = None
 
     @property
@@ -48,11 +123,17 @@ class HTTPClient(Installable):
         return self._client
 
     async def _install(self, ready_callback: Callable[[], asyncio.Future[Any]]) -> None:
-        self._client = httpx.AsyncClient(timeout=10)
+        self._client = httpx.AsyncClient(
+            limits=self.limits,
+            timeout=10,
+            transport=self.transport,
+        )
+        health_checks = asyncio.create_task(self.pool.run_health_checks(self._client))
         try:
             async with self._client:
                 await ready_callback()
         finally:
+            health_checks.cancel()
             self._client = None
 
     async def generate_chat_completion(
@@ -63,29 +144,229 @@ class HTTPClient(Installable):
         messages: list[dict[str, Any]],
         stream_callback: Callable[[StreamingChat], Any],
         connect_callback: Callable[[], Any] = lambda: True,
-    ) -> None:
-        address = httpx.URL(address).join("/api/chat")
-        payload = {"model": model, "messages": messages}
+        priority: Priority = Priority.INTERACTIVE,
+        tools: list[dict[str, Any]] | None = None,
+    ) -> DoneStreamingChat | None:
+        payload: dict[str, Any] = {"model": model, "messages": messages}
+        if tools:
+            payload["tools"] = tools
 
-        async with self.client.stream("POST", address, json=payload) as response:
+        async with AsyncExitStack() as stack:
+            response = await self._send(
+                stack,
+                "POST",
+                address,
+                "/api/chat",
+                model=model,
+                priority=priority,
+                json=payload,
+            )
             response.raise_for_status()
             connect_callback()
-            async for line in response.aiter_lines():  # NOTE: what if this hangs?
-                data = cast(StreamingChat | DoneStreamingChat, json.loads(line))
+            with self._record() as recording:
+                async for line in response.aiter_lines():  # NOTE: what if this hangs?
+                    if recording is not None:
+                        recording.write(line)
+
+                    data = cast(StreamingChat | DoneStreamingChat, json.loads(line))
+
+                    error = data.get("error")
+                    if error is not None:
+                        raise RuntimeError(error)
+
+                    if not data.get("done"):
+                        data = cast(StreamingChat, data)
+                        stream_callback(data)
+                    else:
+                        return cast(DoneStreamingChat, data)
+
+    def _record(self) -> ContextManager[StreamRecording | None]:
+        if self.recorder is None:
+            return nullcontext()
+        return self.recorder.record()
+
+    async def _send(
+        self,
+        stack: AsyncExitStack,
+        method: str,
+        address: httpx.URL | str,
+        path: str,
+        *,
+        model: str | None = None,
+        priority: Priority,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """Send a request to the best server in the given address,
+        trying the next server if a connection can't be made.
+
+        The response is streamed, and it stays open along with its slot
+        on the server until the exit stack is closed.
+
+        """
+        servers = self.pool.route(str(address), model)
+        if len(servers) > 1:
+            await self.pool.ensure_checked(self.client, servers)
+            servers = self.pool.route(str(address), model)
+
+        for i, server in enumerate(servers):
+            url = httpx.URL(server.address).join(path)
+            server_stack = AsyncExitStack()
+            try:
+                # Entered inside the try so the server's count is released
+                # even if the request is cancelled while waiting for a slot
+                server_stack.enter_context(self.pool.track(server))
+                await server_stack.enter_async_context(self._slot(url, priority))
+
+                start = time.perf_counter()
+                request = self.client.build_request(method, url, **kwargs)
+                response = await self.client.send(request, stream=True)
+            except BaseException as e:
+                await server_stack.aclose()
+                if isinstance(e, httpx.HTTPError):
+                    server.record_error(e)
+                if isinstance(e, httpx.ConnectError):
+                    server.healthy = False
+                if not isinstance(e, httpx.ConnectError) or i == len(servers) - 1:
+                    raise
+
+                log.warning(
+                    "Could not connect to %s, trying %s instead",
+                    server.address,
+                    servers[i + 1].address,
+                )
+                continue
+
+            server.record_latency(time.perf_counter() - start)
+            if response.is_error:
+                # Callers raise for the status, but it still counts
+                # towards the server's errors
+                server.record_error(
+                    f"{response.status_code} {response.reason_phrase} for {path}"
+                )
+            server_stack.push_async_callback(response.aclose)
+            await stack.enter_async_context(server_stack)
+            return response
 
+        raise AssertionError("unreachable")
+
+    def _slot(
+        self,
+        address: httpx.URL,
+        priority: Priority,
+    ) -> AsyncContextManager[Any]:
+        if self.scheduler is None:
+            return nullcontext()
+        return self.scheduler.slot(get_server_key(address), priority)
+
+    async def embed(
+        self,
+        *,
+        address: httpx.URL | str,
+        model: str,
+        inputs: list[str],
+        priority: Priority = Priority.BACKGROUND,
+    ) -> list[list[float]]:
+        """Generate an embedding for each input in a single request."""
+        payload = {"model": model, "input": inputs}
+        async with AsyncExitStack() as stack:
+            # Embedding a large batch may take longer than the default timeout,
+            # especially if the model has to be loaded first
+            response = await self._send(
+                stack,
+                "POST",
+                address,
+                "/api/embed",
+                model=model,
+                priority=priority,
+                json=payload,
+                timeout=60,
+            )
+            await response.aread()
+        response.raise_for_status()
+        return response.json()["embeddings"]
+
+    async def warm_up(self, address: httpx.URL | str) -> list[str]:
+        """Open a pooled connection to the given address ahead of time,
+        returning the available models in the process.
+        """
+        return await self.list_local_models(address, priority=Priority.BACKGROUND)
+
+    async def list_local_models(
+        self,
+        address: httpx.URL | str,
+        *,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> list[str]:
+        async with AsyncExitStack() as stack:
+            response = await self._send(
+                stack,
+                "GET",
+                address,
+                "/api/tags",
+                priority=priority,
+            )
+            await response.aread()
+        response.raise_for_status()
+        return [model["name"] for model in response.json()["models"]]
+
+    async def list_running_models(self, address: httpx.URL | str) -> list[RunningModel]:
+        """List the models loaded by a single server.
+
+        This is a cheap request, so it isn't scheduled or routed.
+
+        """
+        url = httpx.URL(address).join("/api/ps")
+        response = await self.client.get(url)
+        response.raise_for_status()
+        models = cast(list[RunningModel], response.json()["models"])
+
+        server = self.pool.servers.get(str(address))
+        if server is not None:
+            server.loaded = {normalize_model_name(model["name"]) for model in models}
+        return models
+
+    async def pull_model(
+        self,
+        *,
+        address: httpx.URL | str,
+        model: str,
+        progress_callback: Callable[[PullResponse], Any],
+    ) -> None:
+        """Download a model onto a single server, reporting each update.
+
+        Pulls only use network and disk, so they aren't scheduled.
+
+        """
+        url = httpx.URL(address).join("/api/pull")
+        payload = {"model": model, "stream": True}
+
+        async with self.client.stream(
+            "POST",
+            url,
+            json=payload,
+            timeout=PULL_TIMEOUT,
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+
+                data = cast(PullResponse, json.loads(line))
                 error = data.get("error")
                 if error is not None:
                     raise RuntimeError(error)
+                progress_callback(data)
 
-                if not data.get("done"):
-                    data = cast(StreamingChat, data)
-                    stream_callback(data)
-                else:
-                    data = cast(DoneStreamingChat, data)
-                    # Nothing to do here really
+        server = self.pool.servers.get(str(address))
+        if server is not None and server.models is not None:
+            server.models.add(normalize_model_name(model))
 
-    async def list_local_models(self, address: httpx.URL | str) -> list[str]:
-        address = httpx.URL(address).join("/api/tags")
-        response = await self.client.get(address)
+    async def delete_model(self, *, address: httpx.URL | str, model: str) -> None:
+        """Delete a model from a single server."""
+        url = httpx.URL(address).join("/api/delete")
+        response = await self.client.request("DELETE", url, json={"model": model})
         response.raise_for_status()
-        return [model["name"] for model in response.json()["models"]]
+
+        server = self.pool.servers.get(str(address))
+        if server is not None and server.models is not None:
+            server.models.discard(normalize_model_name(model))
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import base64
+import concurrent.futures
+import hashlib
+import io
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from tkinter import Event, Misc, PhotoImage
+from tkinter.ttk import Frame, Label
+from typing import Any, Callable
+
+log = logging.getLogger(__name__)
+
+# Images larger than this are downscaled before being sent.
+# Most vision models resize their inputs to a much smaller size anyway,
+# so sending the full resolution only wastes bandwidth.
+MAX_IMAGE_SIZE = 1344
+THUMBNAIL_SIZE = 96
+
+IMAGE_FILETYPES = [
+    ("Images", "*.png *.jpg *.jpeg *.gif *.webp *.bmp"),
+    ("All files", "*.*"),
+]
+
+
+@dataclass(frozen=True)
+class EncodedImage:
+    name: str
+    digest: str
+    data: str  # Base64-encoded image to send to the server
+    thumbnail: bytes | None  # PNG data, or None if Pillow is not installed
+
+
+def encode_image(
+    data: bytes,
+    *,
+    max_size: int = MAX_IMAGE_SIZE,
+    thumbnail_size: int = THUMBNAIL_SIZE,
+) -> tuple[str, bytes | None]:
+    """Downscale and base64-encode an image, returning it with a PNG thumbnail.
+
+    This is CPU-bound and should not be called on the Tk thread.
+    If Pillow is not installed, the image is encoded as-is without
+    a thumbnail.
+
+    """
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return base64.b64encode(data).decode(), None
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+
+        if max(image.size) > max_size:
+            image.thumbnail((max_size, max_size))
+            data = _save_image(image)
+
+        thumbnail = image.copy()
+        thumbnail.thumbnail((thumbnail_size, thumbnail_size))
+        thumbnail_data = _save_image(thumbnail, format="PNG")
+
+    return base64.b64encode(data).decode(), thumbnail_data
+
+
+def _save_image(image, *, format: str | None = None) -> bytes:
+    if format is None:
+        format = "PNG" if image.mode in ("RGBA", "LA", "P") else "JPEG"
+
+    if format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=format)
+    return buffer.getvalue()
+
+
+class ImageEncoder:
+    """Encodes images in an executor, caching the results by content hash."""
+
+    _cache: dict[str, EncodedImage]
+
+    def __init__(self, executor: concurrent.futures.Executor) -> None:
+        self.executor = executor
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def encode(self, path: Path | str) -> concurrent.futures.Future[EncodedImage]:
+        return self.executor.submit(self._encode_path, Path(path))
+
+    def _encode_path(self, path: Path) -> EncodedImage:
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+
+        with self._lock:
+            image = self._cache.get(digest)
+        if image is not None:
+            return EncodedImage(path.name, digest, image.data, image.thumbnail)
+
+        encoded, thumbnail = encode_image(data)
+        image = EncodedImage(path.name, digest, encoded, thumbnail)
+        with self._lock:
+            self._cache[digest] = image
+        return image
+
+
+class TkImageThumbnail(Label):
+    """Shows an image's thumbnail, or its name if no thumbnail is available."""
+
+    def __init__(self, parent: Misc, image: EncodedImage) -> None:
+        super().__init__(parent)
+
+        self.image = image
+
+        if image.thumbnail is not None:
+            self.photo = PhotoImage(data=image.thumbnail)
+            self.configure(image=self.photo)
+        else:
+            self.configure(text=f"[{image.name}]")
+
+
+class TkAttachments(Frame):
+    """Shows images that have been attached to the next message.
+
+    Images are encoded in the background, and :attr:`pending` will be
+    non-zero until all of them have finished. Clicking an attachment
+    removes it.
+
+    """
+
+    attachments: list[concurrent.futures.Future[EncodedImage]]
+
+    def __init__(
+        self,
+        parent: Misc,
+        encoder: ImageEncoder,
+        *,
+        on_change: Callable[[], Any] = lambda: None,
+    ) -> None:
+        super().__init__(parent)
+
+        self.encoder = encoder
+        self.on_change = on_change
+        self.attachments = []
+        self._slots: dict[concurrent.futures.Future[EncodedImage], Frame] = {}
+
+    @property
+    def pending(self) -> int:
+        return sum(not fut.done() for fut in self.attachments)
+
+    def add(self, path: Path | str) -> None:
+        fut = self.encoder.encode(path)
+        self.attachments.append(fut)
+
+        slot = self._slots[fut] = Frame(self)
+        slot.pack(side="left", padx=(0, 5))
+        Label(slot, text=f"Loading {Path(path).name}...").pack()
+
+        fut.add_done_callback(self._on_encode_done)
+        self.on_change()
+
+    def take(self) -> list[EncodedImage]:
+        """Remove and return every finished attachment."""
+        images = [fut.result() for fut in self.attachments if fut.done()]
+        for fut in self.attachments.copy():
+            self._remove(fut)
+        self.on_change()
+        return images
+
+    def _on_encode_done(self, fut: concurrent.futures.Future[EncodedImage]) -> None:
+        slot = self._slots.get(fut)
+        if slot is None or fut.cancelled():
+            return  # Removed before it could finish
+        elif (exc := fut.exception()) is not None:
+            log.exception("Error occurred while encoding image", exc_info=exc)
+            self._remove(fut)
+            self.on_change()
+            return
+
+        for child in slot.winfo_children():
+            child.destroy()
+
+        thumbnail = TkImageThumbnail(slot, fut.result())
+        thumbnail.bind("<1>", lambda event: self._on_thumbnail_click(event, fut))
+        thumbnail.pack()
+        self.on_change()
+
+    def _on_thumbnail_click(
+        self,
+        event: Event,
+        fut: concurrent.futures.Future[EncodedImage],
+    ) -> None:
+        self._remove(fut)
+        self.on_change()
+
+    def _remove(self, fut: concurrent.futures.Future[EncodedImage]) -> None:
+        self.attachments.remove(fut)
+        self._slots.pop(fut).destroy()
+        fut.cancel()
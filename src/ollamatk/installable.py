@@ -1,12 +1,28 @@
 import asyncio
 import concurrent.futures
+import logging
 import threading
+import time
 from abc import ABC, abstractmethod
 from contextlib import contextmanager
-from typing import Any, Callable, Iterator, Self
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, Literal, Self, TypeVar
 
 from .event_thread import EventThread
 
+log = logging.getLogger(__name__)
+
+T = TypeVar("T", bound="Installable")
+
+
+@dataclass
+class _Installation:
+    task_fut: concurrent.futures.Future[Any]
+    ready_fut: concurrent.futures.Future[float]  # Set to the time it became ready
+    stop_fut: concurrent.futures.Future[None]
+    started_at: float
+    cancel_expected: bool = False
+
 
 class Installable(ABC):
     """An asynchronous resource that can be installed into an :class:`EventThread`.
@@ -40,54 +56,73 @@ class Installable(ABC):
         self.ready_timeout = ready_timeout
         self.stop_timeout = stop_timeout
         self.__lock = threading.Lock()
+        self.__installation = None
 
     @contextmanager
-    def install(self, event_thread: EventThread, /) -> Iterator[Self]:
+    def install(
+        self, event_thread: EventThread, /, *, wait: bool = True
+    ) -> Iterator[Self]:
         """Install this instance in an event thread, setting up any
         asynchronous resources.
+
+        If ``wait`` is False, installation will continue in the background
+        and :meth:`wait_until_ready()` must be called before using the
+        instance. This allows other work to be done while installing.
+
         """
+        installation = self._start_install(event_thread)
+        try:
+            if wait:
+                self.wait_until_ready()
+            yield self
+        finally:
+            self._stop_install(installation)
 
-        def ready_callback() -> asyncio.Future[Any]:
-            ready_fut.set_result(None)
-            return asyncio.shield(asyncio.wrap_future(stop_fut))
+    def wait_until_ready(self) -> None:
+        """Wait until this instance has finished installing.
 
-        def cancel_task() -> None:
-            nonlocal cancel_expected
-            cancel_expected = True
-            task_fut.cancel()
+        The ready timeout is measured from when the installation started,
+        so time spent elsewhere after calling ``install(wait=False)``
+        is also counted.
 
-        cancel_expected = False
+        :raises RuntimeError:
+            The instance is not being installed, or installation
+            finished without becoming ready.
+        :raises TimeoutError:
+            The instance exceeded its ready timeout.
 
-        with self.__installing():
-            ready_fut = concurrent.futures.Future()
-            stop_fut = concurrent.futures.Future()
-            task_fut = event_thread.submit(self._install(ready_callback))
+        """
+        installation = self.__installation
+        if installation is None:
+            raise RuntimeError(f"{type(self).__name__} is not installed")
 
-            try:
-                done, _ = concurrent.futures.wait(
-                    (task_fut, ready_fut),
-                    return_when="FIRST_COMPLETED",
-                    timeout=self.ready_timeout,
-                )
-                if ready_fut not in done:
-                    if task_fut.done():
-                        task_fut.result()  # propagate task exception if any
-                        raise RuntimeError(
-                            f"{type(self).__name__} did not invoke ready callback "
-                            f"during installation"
-                        )
-                    else:
-                        cancel_task()
-                        raise TimeoutError(
-                            f"{type(self).__name__} exceeded "
-                            f"ready_timeout={self.ready_timeout}"
-                        )
-
-                yield self
-            finally:
-                stop_fut.set_result(None)
-                if not cancel_expected:
-                    task_fut.result(timeout=self.stop_timeout)
+        task_fut = installation.task_fut
+        ready_fut = installation.ready_fut
+
+        timeout = self.ready_timeout
+        if timeout is not None:
+            timeout -= time.perf_counter() - installation.started_at
+            timeout = max(0, timeout)
+
+        done, _ = concurrent.futures.wait(
+            (task_fut, ready_fut),
+            return_when="FIRST_COMPLETED",
+            timeout=timeout,
+        )
+        if ready_fut in done:
+            return
+        elif task_fut.done():
+            task_fut.result()  # propagate task exception if any
+            raise RuntimeError(
+                f"{type(self).__name__} did not invoke ready callback "
+                f"during installation"
+            )
+        else:
+            installation.cancel_expected = True
+            task_fut.cancel()
+            raise TimeoutError(
+                f"{type(self).__name__} exceeded ready_timeout={self.ready_timeout}"
+            )
 
     @abstractmethod
     async def _install(
@@ -111,13 +146,177 @@ class Installable(ABC):
         """
         raise NotImplementedError
 
-    @contextmanager
-    def __installing(self) -> Iterator[Self]:
-        """Acquire and hold the install lock."""
+    # Installation is split into separate steps so InstallGroup can
+    # start and stop several instances at once
+
+    def _start_install(self, event_thread: EventThread) -> _Installation:
         if not self.__lock.acquire(blocking=False):
             raise RuntimeError(f"{type(self).__name__} is already installed")
 
+        def ready_callback() -> asyncio.Future[Any]:
+            ready_fut.set_result(time.perf_counter())
+            return asyncio.shield(asyncio.wrap_future(stop_fut))
+
         try:
-            yield self
+            ready_fut = concurrent.futures.Future()
+            stop_fut = concurrent.futures.Future()
+            started_at = time.perf_counter()
+            task_fut = event_thread.submit(self._install(ready_callback))
+        except BaseException:
+            self.__lock.release()
+            raise
+
+        installation = self.__installation = _Installation(
+            task_fut=task_fut,
+            ready_fut=ready_fut,
+            stop_fut=stop_fut,
+            started_at=started_at,
+        )
+        return installation
+
+    def _signal_stop(self, installation: _Installation) -> None:
+        self.__installation = None
+        installation.stop_fut.set_result(None)
+
+    def _wait_until_stopped(self, installation: _Installation) -> None:
+        try:
+            if not installation.cancel_expected:
+                installation.task_fut.result(timeout=self.stop_timeout)
         finally:
             self.__lock.release()
+
+    def _stop_install(self, installation: _Installation) -> None:
+        self._signal_stop(installation)
+        self._wait_until_stopped(installation)
+
+
+@dataclass
+class InstallTiming:
+    name: str
+    level: int
+    """The number of dependencies that had to be installed before this one."""
+    startup: float = 0
+    """Seconds from starting installation to becoming ready."""
+    teardown: float = 0
+    """Seconds from requesting teardown to finishing."""
+
+
+class InstallGroup:
+    """Installs several :class:`Installable` instances in dependency order.
+
+    Example usage::
+        group = InstallGroup()
+        http = group.add(HTTPClient())
+        store = group.add(MyStore(), depends_on=[http])
+        with EventThread() as event_thread, group.install(event_thread):
+            ...
+
+    Instances are grouped into levels, where each level depends only on
+    earlier levels. Every instance in a level is installed concurrently,
+    and teardown happens in reverse order with each level also stopping
+    concurrently. Startup and teardown times are logged and stored in
+    :attr:`timings`.
+
+    """
+
+    timings: dict[str, InstallTiming]
+
+    def __init__(self) -> None:
+        self._dependencies: dict[Installable, tuple[Installable, ...]] = {}
+        self._names: dict[Installable, str] = {}
+        self.timings = {}
+
+    def add(
+        self,
+        installable: T,
+        *,
+        depends_on: Iterable[Installable] = (),
+        name: str | None = None,
+    ) -> T:
+        """Add an instance to the group, returning it for convenience.
+
+        Dependencies must already have been added to the group.
+        Names default to the instance's class name, and must be unique.
+
+        """
+        depends_on = tuple(depends_on)
+        for dependency in depends_on:
+            if dependency not in self._dependencies:
+                raise ValueError(
+                    f"{type(dependency).__name__} must be added before "
+                    f"it can be depended on"
+                )
+
+        name = name or type(installable).__name__
+        if name in self._names.values():
+            raise ValueError(f"{name!r} is already in the group, choose another name")
+
+        self._dependencies[installable] = depends_on
+        self._names[installable] = name
+        return installable
+
+    def levels(self) -> list[list[Installable]]:
+        levels: dict[Installable, int] = {}
+        # Dependencies are always added first, so one pass is enough
+        for installable, dependencies in self._dependencies.items():
+            levels[installable] = max((levels[d] + 1 for d in dependencies), default=0)
+
+        grouped: list[list[Installable]] = [
+            [] for _ in range(max(levels.values(), default=-1) + 1)
+        ]
+        for installable, level in levels.items():
+            grouped[level].append(installable)
+        return grouped
+
+    @contextmanager
+    def install(self, event_thread: EventThread, /) -> Iterator[Self]:
+        started: list[list[tuple[Installable, _Installation]]] = []
+        self.timings = {}
+
+        try:
+            for i, level in enumerate(self.levels()):
+                batch: list[tuple[Installable, _Installation]] = []
+                started.append(batch)
+                for installable in level:
+                    batch.append(
+                        (installable, installable._start_install(event_thread))
+                    )
+                for installable, installation in batch:
+                    installable.wait_until_ready()
+                    name = self._names[installable]
+                    startup = installation.ready_fut.result() - installation.started_at
+                    self.timings[name] = InstallTiming(name, i, startup)
+
+            log.info("Installed %s", self.format_timings("startup"))
+            yield self
+        finally:
+            self._teardown(started)
+
+    def format_timings(self, phase: Literal["startup", "teardown"]) -> str:
+        return ", ".join(
+            f"{timing.name} in {getattr(timing, phase) * 1000:.1f}ms"
+            for timing in self.timings.values()
+        )
+
+    def _teardown(self, started: list[list[tuple[Installable, _Installation]]]) -> None:
+        error: BaseException | None = None
+
+        for batch in reversed(started):
+            # Signal the whole level to stop before waiting on any of them
+            start = time.perf_counter()
+            for installable, installation in batch:
+                installable._signal_stop(installation)
+
+            for installable, installation in batch:
+                try:
+                    installable._wait_until_stopped(installation)
+                except BaseException as e:
+                    error = error or e
+
+                timing = self.timings.get(self._names[installable])
+                if timing is not None:
+                    timing.teardown = time.perf_counter() - start
+
+        log.info("Uninstalled %s", self.format_timings("teardown"))
+        if error is not None:
+            raise error
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import logging
+from collections import deque
 from contextlib import contextmanager, nullcontext
-from tkinter import Text, Toplevel
+from tkinter import Event, Text, Toplevel
 from tkinter.ttk import Button, Scrollbar
 from typing import TYPE_CHECKING, Any, Callable, Iterator, Literal, Self
 
@@ -11,6 +12,8 @@ if TYPE_CHECKING:
 
 LogEventType = Literal["clear", "insert"]
 
+MAX_LOG_MESSAGES = 5000
+
 
 def configure_logging() -> None:
     logging.basicConfig(level=logging.INFO)
@@ -27,16 +30,22 @@ class TkAppLogHandler(logging.Handler):
 
 
 class LogStore:
+    """Keeps the most recent log messages and notifies callbacks of new ones."""
+
     callbacks: list[Callable[[LogEventType, str], Any]]
-    _messages: list[str]
+    _messages: deque[str]
 
-    def __init__(self) -> None:
+    def __init__(self, *, max_messages: int = MAX_LOG_MESSAGES) -> None:
         self.callbacks = []
-        self._messages = []
+        self.max_messages = max_messages
+        self._messages = deque(maxlen=max_messages)
 
     def __iter__(self) -> Iterator[str]:
         return iter(self._messages.copy())
 
+    def __len__(self) -> int:
+        return len(self._messages)
+
     def append(self, message: str) -> None:
         self._messages.append(message)
         self._notify("insert", message)
@@ -87,6 +96,9 @@ class TkLogWindow(Toplevel):
         self.refresh()
         self.text.yview_moveto(1)
         self.app.logs.callbacks.append(self._on_log_update)
+        # Unlike overriding destroy(), this also catches the window being
+        # destroyed from Tcl, such as when its parent is destroyed
+        self.bind("<Destroy>", self._on_destroy, add=True)
 
     def refresh(self) -> None:
         with self.unlock_text():
@@ -97,9 +109,10 @@ class TkLogWindow(Toplevel):
     def do_clear(self) -> None:
         self.app.logs.clear()
 
-    def destroy(self) -> None:
-        self.app.logs.callbacks.remove(self._on_log_update)
-        super().destroy()
+    def _on_destroy(self, event: Event) -> None:
+        # Child widgets also deliver their <Destroy> events here
+        if event.widget is self and self._on_log_update in self.app.logs.callbacks:
+            self.app.logs.callbacks.remove(self._on_log_update)
 
     def _on_log_update(self, type: LogEventType, message: str) -> None:
         with self.unlock_text():
@@ -107,6 +120,14 @@ class TkLogWindow(Toplevel):
                 self.text.delete("1.0", "end")
             elif type == "insert":
                 self.text.insert("end", message + "\n")
+                self._trim_lines()
+
+    def _trim_lines(self) -> None:
+        # Keep about as many lines as the log store keeps messages
+        lines = int(self.text.index("end-1c").split(".")[0]) - 1
+        excess = lines - self.app.logs.max_messages
+        if excess > 0:
+            self.text.delete("1.0", f"{excess + 1}.0")
 
     @contextmanager
     def unlock_text(self, *, autoscroll: bool = True) -> Iterator[Self]:
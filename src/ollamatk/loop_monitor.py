@@ -0,0 +1,150 @@
+"""Detect when the event loop is blocked and report what blocked it.
+
+A heartbeat task measures how late the loop wakes up from each sleep,
+while a watchdog thread checks that the heartbeat keeps running.
+If the heartbeat stops for longer than the stall threshold, the watchdog
+captures the stack of the event loop's thread while it is still blocked,
+pointing directly at the slow callback.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Callable
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class LoopStats:
+    beats: int = 0
+    lag: float = 0
+    """The lag of the most recent heartbeat, in seconds."""
+    max_lag: float = 0
+    total_lag: float = 0
+    stalls: int = 0
+    tasks: int = 0
+    """The number of tasks on the loop, excluding the heartbeat."""
+    in_flight: int = 0
+    """The number of coroutines submitted to the loop that haven't finished."""
+    last_stall_stack: str = ""
+
+    @property
+    def mean_lag(self) -> float:
+        return self.total_lag / self.beats if self.beats > 0 else 0
+
+    def format(self) -> str:
+        return (
+            f"Event loop lag: {self.lag * 1000:.1f}ms "
+            f"(mean {self.mean_lag * 1000:.1f}ms, max {self.max_lag * 1000:.1f}ms), "
+            f"{self.stalls} stall(s), {self.tasks} task(s), "
+            f"{self.in_flight} submission(s) in flight"
+        )
+
+
+class LoopMonitor:
+    """Measures event loop lag and reports stalls with the blocking stack.
+
+    :param interval: How often the heartbeat runs, in seconds.
+    :param lag_threshold: Log a warning for any heartbeat later than this.
+    :param stall_threshold:
+        Capture the loop's stack if no heartbeat occurs for this long.
+    :param report_interval:
+        How often to log a summary of the stats, in seconds,
+        or None to only log them once the monitor stops.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        interval: float = 0.25,
+        lag_threshold: float = 0.1,
+        stall_threshold: float = 0.5,
+        report_interval: float | None = 300,
+    ) -> None:
+        self.interval = interval
+        self.lag_threshold = lag_threshold
+        self.stall_threshold = stall_threshold
+        self.report_interval = report_interval
+        self.stats = LoopStats()
+
+        self._last_beat = time.monotonic()
+        self._loop_thread_id: int | None = None
+        self._stopped = threading.Event()
+        self._watchdog: threading.Thread | None = None
+
+    async def run(self, *, in_flight: Callable[[], int] = lambda: 0) -> None:
+        """Run the heartbeat until cancelled, along with the watchdog thread."""
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._watchdog = threading.Thread(
+            target=self._watch,
+            name="ollamatk-loop-watchdog",
+            daemon=True,
+        )
+        self._watchdog.start()
+
+        try:
+            await self._heartbeat(in_flight)
+        finally:
+            self._stopped.set()
+            log.info(self.stats.format())
+
+    async def _heartbeat(self, in_flight: Callable[[], int]) -> None:
+        last_report = time.monotonic()
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_beat = now
+
+            lag = max(0, now - start - self.interval)
+            stats = self.stats
+            stats.beats += 1
+            stats.lag = lag
+            stats.max_lag = max(stats.max_lag, lag)
+            stats.total_lag += lag
+            stats.tasks = len(asyncio.all_tasks()) - 1
+            stats.in_flight = in_flight()
+
+            if lag > self.lag_threshold:
+                log.warning("Event loop was blocked for %.0fms", lag * 1000)
+
+            interval = self.report_interval
+            if interval is not None and now - last_report >= interval:
+                last_report = now
+                log.info(stats.format())
+
+    def _watch(self) -> None:
+        reported_beat = None
+        while not self._stopped.wait(self.stall_threshold / 4):
+            last_beat = self._last_beat
+            blocked = time.monotonic() - last_beat - self.interval
+            if blocked < self.stall_threshold or last_beat == reported_beat:
+                continue
+
+            # Only report each stall once, while it's still happening
+            reported_beat = last_beat
+            stack = self._capture_loop_stack()
+            self.stats.stalls += 1
+            self.stats.last_stall_stack = stack
+            log.warning(
+                "Event loop has been blocked for over %.0fms:\n%s",
+                blocked * 1000,
+                stack,
+            )
+
+    def _capture_loop_stack(self) -> str:
+        assert self._loop_thread_id is not None
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return ""
+        return "".join(traceback.format_stack(frame))
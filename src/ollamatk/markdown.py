@@ -0,0 +1,361 @@
+"""Render Markdown incrementally as it is streamed in.
+
+Parsing happens one line at a time. Once a line is terminated by a newline,
+it is parsed exactly once and committed, and only the unfinished line at
+the end of the stream is re-parsed when more text arrives. As a result,
+the cost of each token depends on the length of the current line rather
+than the length of the whole message.
+
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+import re
+from dataclasses import dataclass, field
+from tkinter import Event, Misc, Text
+from tkinter.font import Font, nametofont
+from tkinter.ttk import Style
+
+from .highlight import TOKEN_COLOURS, CodeHighlighter, Span
+
+log = logging.getLogger(__name__)
+
+Run = tuple[str, tuple[str, ...]]
+
+FENCE_PATTERN = re.compile(r"^\s*(`{3,}|~{3,})\s*([\w+#.-]*)")
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*)")
+BULLET_PATTERN = re.compile(r"^(\s*)[-*+]\s+(.*)")
+NUMBERED_PATTERN = re.compile(r"^(\s*)(\d+[.)])\s+(.*)")
+QUOTE_PATTERN = re.compile(r"^>\s?(.*)")
+RULE_PATTERN = re.compile(r"^\s*(\*\s*){3,}$|^\s*(-\s*){3,}$|^\s*(_\s*){3,}$")
+INLINE_PATTERN = re.compile(
+    r"(?P<code>`[^`]+`)"
+    r"|(?P<bold>\*\*[^*]+\*\*|__[^_]+__)"
+    r"|(?P<italic>\*[^*\s][^*]*\*|_[^_\s][^_]*_)"
+)
+
+
+@dataclass
+class CodeBlock:
+    language: str
+    start: int
+    """The zero-indexed line where the code starts."""
+    end: int
+    """The zero-indexed line after the code ends."""
+
+
+@dataclass
+class MarkdownUpdate:
+    committed: list[Run] = field(default_factory=list)
+    """Runs for lines that have been completed and will not change."""
+    tail: list[Run] = field(default_factory=list)
+    """Runs for the current unfinished line, replacing the previous tail."""
+    closed_code_blocks: list[CodeBlock] = field(default_factory=list)
+    """Each code block that was closed by a committed line, in order."""
+
+
+class MarkdownStream:
+    """Incrementally parses Markdown into styled runs of text.
+
+    Each run is a ``(text, tags)`` pair where ``tags`` is a tuple of
+    style names, such as ``("bold",)`` or ``("h1",)``.
+
+    """
+
+    def __init__(self) -> None:
+        self._partial = ""
+        self._fence: str | None = None
+        self._fence_language = ""
+        self._fence_start = 0
+        self._lines = 0
+
+    @property
+    def in_code_block(self) -> bool:
+        return self._fence is not None
+
+    def feed(self, delta: str) -> MarkdownUpdate:
+        text = self._partial + delta
+        *lines, self._partial = text.split("\n")
+
+        update = MarkdownUpdate()
+        for line in lines:
+            in_code_block = self.in_code_block
+            language = self._fence_language
+
+            runs = self._parse_line(line)
+            update.committed.extend(runs)
+            self._lines += 1
+
+            if in_code_block and self.in_code_block:
+                # Code blocks include their newlines so the whole block
+                # can be found as a single tagged range
+                update.committed.append(("\n", ("code_block",)))
+            else:
+                update.committed.append(("\n", ()))
+
+            if not in_code_block and self.in_code_block:
+                self._fence_start = self._lines
+            elif in_code_block and not self.in_code_block:
+                block = CodeBlock(language, self._fence_start, self._lines - 1)
+                update.closed_code_blocks.append(block)
+
+        if self._partial:
+            # Parse without affecting state, as this line isn't finished yet
+            fence, language = self._fence, self._fence_language
+            update.tail = self._parse_line(self._partial)
+            self._fence, self._fence_language = fence, language
+
+        return update
+
+    def get_open_code_block(self) -> CodeBlock | None:
+        """Return the code block that has not been closed yet, if any.
+
+        This includes the unfinished line at the end of the stream.
+
+        """
+        if self._fence is None:
+            return None
+
+        end = self._lines + bool(self._partial)
+        return CodeBlock(self._fence_language, self._fence_start, end)
+
+    def _parse_line(self, line: str) -> list[Run]:
+        fence = FENCE_PATTERN.match(line)
+
+        if self._fence is not None:
+            if fence is not None and fence.group(1).startswith(self._fence):
+                self._fence = None
+                return [("", ())]
+            return [(line, ("code_block",))]
+        elif fence is not None:
+            self._fence = fence.group(1)[:3]
+            self._fence_language = fence.group(2)
+            return [("", ())]
+
+        if m := HEADING_PATTERN.match(line):
+            level = min(len(m.group(1)), 3)
+            return parse_inline(m.group(2), (f"h{level}",))
+        elif RULE_PATTERN.match(line):
+            return [("―" * 20, ("rule",))]
+        elif m := BULLET_PATTERN.match(line):
+            indent, content = m.groups()
+            return [(f"{indent}• ", ("list",))] + parse_inline(content, ("list",))
+        elif m := NUMBERED_PATTERN.match(line):
+            indent, number, content = m.groups()
+            return [(f"{indent}{number} ", ("list",))] + parse_inline(
+                content, ("list",)
+            )
+        elif m := QUOTE_PATTERN.match(line):
+            return parse_inline(m.group(1), ("quote",))
+
+        return parse_inline(line)
+
+
+def parse_inline(text: str, tags: tuple[str, ...] = ()) -> list[Run]:
+    """Parse inline code, bold and italic spans within a line."""
+    runs: list[Run] = []
+    position = 0
+
+    for m in INLINE_PATTERN.finditer(text):
+        if m.start() > position:
+            runs.append((text[position : m.start()], tags))
+
+        kind = m.lastgroup
+        assert kind is not None
+        span = m.group()
+        strip = 2 if kind == "bold" else 1
+        runs.append((span[strip:-strip], tags + (kind,)))
+        position = m.end()
+
+    if position < len(text) or not runs:
+        runs.append((text[position:], tags))
+
+    return runs
+
+
+class TkMarkdownText(Text):
+    """A read-only text widget that renders streamed Markdown.
+
+    The widget resizes its height to fit its contents, so it should be
+    placed inside a scrollable container rather than scrolled itself.
+
+    If a highlighter is given, code blocks are highlighted once they are
+    closed or once :meth:`finish()` is called. Highlighting tags are applied
+    in batches between events so long code blocks don't freeze the GUI.
+
+    """
+
+    HIGHLIGHT_BATCH_SIZE = 500
+
+    def __init__(
+        self,
+        parent: Misc,
+        *,
+        highlighter: CodeHighlighter | None = None,
+        **kwargs,
+    ) -> None:
+        kwargs.setdefault("font", "TkDefaultFont")
+        super().__init__(
+            parent,
+            borderwidth=0,
+            cursor="arrow",
+            height=1,
+            highlightthickness=0,
+            relief="flat",
+            state="disabled",
+            width=1,
+            wrap="word",
+            **kwargs,
+        )
+
+        self.stream = MarkdownStream()
+        self.highlighter = highlighter
+        self._height_update = None
+        self._generation = 0  # Incremented whenever the text is replaced
+
+        self._configure_tags()
+        self.mark_set("tail", "end-1c")
+        self.mark_gravity("tail", "left")
+        self.bind("<Configure>", self._on_configure)
+
+    def append(self, delta: str) -> None:
+        update = self.stream.feed(delta)
+
+        self.configure(state="normal")
+        try:
+            self.delete("tail", "end-1c")
+            if update.committed:
+                self._insert_runs("end-1c", update.committed)
+                self.mark_set("tail", "end-1c")
+            if update.tail:
+                self._insert_runs("end-1c", update.tail)
+        finally:
+            self.configure(state="disabled")
+
+        for block in update.closed_code_blocks:
+            self._highlight(block)
+
+        self._schedule_height_update()
+
+    def set_text(self, text: str) -> None:
+        self.stream = MarkdownStream()
+        self._generation += 1
+        self.configure(state="normal")
+        self.delete("1.0", "end")
+        self.mark_set("tail", "1.0")
+        self.configure(state="disabled")
+        self.append(text)
+        self.finish()
+
+    def finish(self) -> None:
+        """Highlight any code block that was left open at the end of the text."""
+        block = self.stream.get_open_code_block()
+        if block is not None:
+            self._highlight(block)
+
+    def _highlight(self, block: CodeBlock) -> None:
+        if self.highlighter is None or block.start >= block.end:
+            return
+
+        # Text widget lines are one-indexed
+        first_line = block.start + 1
+        code = self.get(f"{first_line}.0", f"{block.end + 1}.0")
+        generation = self._generation
+
+        def callback(fut: concurrent.futures.Future[list[Span]]) -> None:
+            if fut.cancelled():
+                return
+            elif (exc := fut.exception()) is not None:
+                return log.exception(
+                    "Error occurred while highlighting code", exc_info=exc
+                )
+            self.after(0, self._apply_spans, fut.result(), first_line, generation)
+
+        self.highlighter.highlight(block.language, code).add_done_callback(callback)
+
+    def _apply_spans(
+        self,
+        spans: list[Span],
+        first_line: int,
+        generation: int,
+        offset: int = 0,
+    ) -> None:
+        if not self.winfo_exists() or generation != self._generation:
+            return
+
+        end = offset + self.HIGHLIGHT_BATCH_SIZE
+        for tag, line, start, stop in spans[offset:end]:
+            line += first_line
+            self.tag_add(tag, f"{line}.{start}", f"{line}.{stop}")
+
+        if end < len(spans):
+            self.after(1, self._apply_spans, spans, first_line, generation, end)
+
+    def _insert_runs(self, index: str, runs: list[Run]) -> None:
+        # Insert every run in a single call, equivalent to
+        # insert(index, text1, tags1, text2, tags2, ...)
+        args = []
+        for text, tags in runs:
+            if text:
+                args.append(text)
+                args.append(tags)
+
+        if args:
+            self.tk.call(str(self), "insert", index, *args)
+
+    def _configure_tags(self) -> None:
+        base = nametofont(self.cget("font"))
+        size = base.actual("size")
+        family = base.actual("family")
+
+        self._fonts = {
+            "bold": Font(self, family=family, size=size, weight="bold"),
+            "italic": Font(self, family=family, size=size, slant="italic"),
+            "code": nametofont("TkFixedFont"),
+            "h1": Font(self, family=family, size=round(size * 1.5), weight="bold"),
+            "h2": Font(self, family=family, size=round(size * 1.3), weight="bold"),
+            "h3": Font(self, family=family, size=round(size * 1.1), weight="bold"),
+        }
+
+        background = Style(self).lookup("TFrame", "background")
+        self.configure(background=background)
+
+        for name, font in self._fonts.items():
+            self.tag_configure(name, font=font)
+
+        self.tag_configure("code", background="#e8e8e8")
+        self.tag_configure(
+            "code_block",
+            background="#e8e8e8",
+            font=self._fonts["code"],
+            lmargin1=10,
+            lmargin2=10,
+        )
+        self.tag_configure("list", lmargin1=10, lmargin2=25)
+        self.tag_configure("quote", foreground="#555555", lmargin1=15, lmargin2=15)
+        self.tag_configure("rule", foreground="#999999")
+
+        for name, colour in TOKEN_COLOURS.items():
+            self.tag_configure(f"hl.{name}", foreground=colour)
+
+        # Inline and highlighting styles should take priority over block styles
+        for name in ("bold", "italic", "code", *(f"hl.{n}" for n in TOKEN_COLOURS)):
+            self.tag_raise(name)
+
+    def _schedule_height_update(self) -> None:
+        # Counting display lines is proportional to the length of the text,
+        # so only do it once per idle period instead of after every token.
+        if self._height_update is None:
+            self._height_update = self.after_idle(self._update_height)
+
+    def _update_height(self) -> None:
+        self._height_update = None
+        lines = self.count("1.0", "end-1c", "displaylines")
+        height = max(1, lines[0] if isinstance(lines, tuple) else lines or 0)
+        if height != int(self.cget("height")):
+            self.configure(height=height)
+
+    def _on_configure(self, event: Event) -> None:
+        self._schedule_height_update()
@@ -1,16 +1,23 @@
 from __future__ import annotations
 
 import importlib.resources
-from dataclasses import dataclass
-from tkinter import Event, PhotoImage
-from tkinter.ttk import Frame, Label
-from typing import TYPE_CHECKING, Any, Collection, Literal
-
+import itertools
+from dataclasses import dataclass, field
+from tkinter import Event, Menu, PhotoImage
+from tkinter.ttk import Button, Frame, Label
+from typing import TYPE_CHECKING, Any, Collection, Iterator, Literal
+
+from .compaction import summary_message
+from .images import EncodedImage, TkImageThumbnail
+from .markdown import TkMarkdownText
 from .scrollable_frame import ScrollableFrame
+from .tree import ConversationTree, MessageNode, common_prefix_length
 from .wrap_label import WrapLabel
 
 if TYPE_CHECKING:
     from .chat import TkChat
+    from .compaction import PromptStats
+    from .http import ToolCall
 
 Role = Literal["system", "user", "assistant", "tool"]
 
@@ -20,22 +27,64 @@ class Message:
     role: Role
     content: str
     hidden: bool = False
+    stopped: bool = False
+    """Whether the response was stopped before it finished."""
+    images: list[EncodedImage] = field(default_factory=list)
+    history_id: int | None = None
+    """The ID of this message in the conversation history, once stored."""
+    tool_calls: list[ToolCall] = field(default_factory=list)
+    tool_name: str | None = None
+    """The name of the tool that returned this message."""
+    latency: float | None = None
+    """How long the tool took to return, in seconds."""
+    prompt_stats: PromptStats | None = None
+    """The size of the prompt this response was generated from."""
+    summary: str | None = None
+    """A summary of the conversation up to and including this message."""
 
     def dump(self) -> dict[str, Any]:
-        return {"role": self.role, "content": self.content}
+        data: dict[str, Any] = {"role": self.role, "content": self.content}
+        if self.images:
+            data["images"] = [image.data for image in self.images]
+        if self.tool_calls:
+            data["tool_calls"] = self.tool_calls
+        if self.tool_name is not None:
+            data["tool_name"] = self.tool_name
+        return data
+
+    def format_role(self) -> str:
+        role = self.role.title()
+        if self.tool_name is not None:
+            role += f" ({self.tool_name}"
+            if self.latency is not None:
+                role += f", {self.latency * 1000:.0f}ms"
+            role += ")"
+        if self.tool_calls:
+            names = ", ".join(call["function"]["name"] for call in self.tool_calls)
+            role += f" (calling {names})"
+        if self.prompt_stats is not None:
+            role += f" ({self.prompt_stats.format()})"
+        if self.summary is not None:
+            role += " (summarized up to here)"
+        role += " (stopped)" * self.stopped
+        role += " (hidden)" * self.hidden
+        return role
 
 
 class TkMessageFrame(Frame):
     def __init__(
         self,
         message_list: TkMessageList,
-        message: Message,
+        node: MessageNode[Message],
         *,
+        id: int,
         side: Literal["left", "right"],
     ) -> None:
-        super().__init__(message_list.inner)
+        super().__init__(message_list.container)
 
-        self.message = message
+        self.id = id
+        self.node = node
+        self.message = message = node.message
         self.message_list = message_list
 
         self.grid_columnconfigure(1, weight=1)
@@ -44,8 +93,31 @@ class TkMessageFrame(Frame):
         left = side == "left"
         anchor = "w" if left else "e"
 
-        self.role_label = Label(self, anchor=anchor, justify=side)
-        self.role_label.grid(row=0, column=1, sticky="ew")
+        self.header = Frame(self)
+        self.header.grid(row=0, column=1, sticky="ew")
+
+        self.role_label = Label(self.header, anchor=anchor, justify=side)
+        self.role_label.pack(side=side)
+
+        # Only shown when the message has alternatives to switch between
+        self.branches = Frame(self.header)
+        self._branches_side: Literal["left", "right"] = "right" if left else "left"
+        self.previous_branch = Button(
+            self.branches,
+            command=lambda: message_list.switch_branch(self, -1),
+            text="<",
+            width=2,
+        )
+        self.previous_branch.pack(side="left")
+        self.branch_label = Label(self.branches)
+        self.branch_label.pack(side="left", padx=5)
+        self.next_branch = Button(
+            self.branches,
+            command=lambda: message_list.switch_branch(self, 1),
+            text=">",
+            width=2,
+        )
+        self.next_branch.pack(side="left")
 
         self.role_icon = Label(self)
         self.role_icon.grid(
@@ -55,75 +127,298 @@ class TkMessageFrame(Frame):
             padx=(0, 5) if left else (5, 0),
         )
 
-        self.content_label = WrapLabel(self, anchor=anchor, justify=side)
-        self.content_label.bind("<1>", self._on_content_label_click)
-        self.content_label.grid(row=1, column=1, sticky="nesw")
+        # Assistant replies are usually written in Markdown
+        self.content: WrapLabel | TkMarkdownText
+        if message.role == "assistant":
+            self.content = TkMarkdownText(
+                self,
+                highlighter=message_list.chat.app.highlighter,
+            )
+        else:
+            self.content = WrapLabel(self, anchor=anchor, justify=side)
+        self.content.bind("<1>", self._on_content_click)
+        self.content.bind("<3>", self._on_content_right_click)
+        self.content.grid(row=1, column=1, sticky="nesw")
+        self._rendered_content = ""
+
+        self.images = Frame(self)
+        self.images.grid(row=2, column=1, sticky=anchor)
+        self._shown_images: list[EncodedImage] = []
 
         self.refresh()
 
     def refresh(self) -> None:
-        role = self.message.role.title() + " (hidden)" * self.message.hidden
-        self.role_label.configure(text=role)
-        self.content_label.configure(text=self.message.content)
+        self.role_label.configure(text=self.message.format_role())
+        self.refresh_branches()
+
+        if self.message.content != self._rendered_content:
+            self._render_content()
 
         if self.message.role == "user":
-            self.role_icon.configure(image=self.message_list.icons["user"])
+            self.role_icon.configure(image=self.message_list.get_icon("user"))
+        else:
+            self.role_icon.configure(image=self.message_list.get_icon("assistant"))
+
+        if self.message.images != self._shown_images:
+            self._refresh_images()
+
+    def refresh_branches(self) -> None:
+        siblings = self.node.siblings
+        if len(siblings) > 1:
+            index = siblings.index(self.node)
+            self.branch_label.configure(text=f"{index + 1}/{len(siblings)}")
+            self.branches.pack(side=self._branches_side)
+        else:
+            self.branches.pack_forget()
+
+    def append_content(self, delta: str) -> None:
+        """Append to the message's content, rendering only the new text."""
+        self.message.content += delta
+        if isinstance(self.content, TkMarkdownText):
+            self.content.append(delta)
+            self._rendered_content = self.message.content
         else:
-            self.role_icon.configure(image=self.message_list.icons["assistant"])
+            self._render_content()
+
+    def finish_content(self) -> None:
+        """Signal that the message's content has finished streaming."""
+        if isinstance(self.content, TkMarkdownText):
+            self.content.finish()
+
+    def _render_content(self) -> None:
+        if isinstance(self.content, TkMarkdownText):
+            self.content.set_text(self.message.content)
+        else:
+            self.content.configure(text=self.message.content)
+        self._rendered_content = self.message.content
+
+    def _refresh_images(self) -> None:
+        for child in self.images.winfo_children():
+            child.destroy()
+
+        for image in self.message.images:
+            TkImageThumbnail(self.images, image).pack(side="left", padx=(0, 5), pady=5)
+
+        self._shown_images = self.message.images.copy()
 
     def destroy(self) -> None:
         super().destroy()
-        self.message_list.messages.remove(self)
+        self.message_list._forget(self)
 
-    def _on_content_label_click(self, event: Event) -> None:
+    def _on_content_click(self, event: Event) -> None:
         self.clipboard_clear()
-        self.clipboard_append(self.content_label["text"])
+        self.clipboard_append(self.message.content)
+
+    def _on_content_right_click(self, event: Event) -> None:
+        chat = self.message_list.chat
+        state = "disabled" if chat.chat_fut is not None else "normal"
+
+        menu = Menu(self)
+        menu.add_command(
+            command=lambda: self.message_list.delete_message(self),
+            label="Delete",
+            state=state,
+        )
+        if self.message.role == "user":
+            menu.add_command(
+                command=lambda: chat.edit(self),
+                label="Edit",
+                state=state,
+            )
+        elif self.message.role == "assistant":
+            menu.add_command(
+                command=lambda: chat.regenerate(self),
+                label="Regenerate",
+                state=state,
+            )
+        menu.tk_popup(event.x_root, event.y_root)
 
 
 class TkMessageList(ScrollableFrame):
-    messages: list[TkMessageFrame]
+    """A scrollable list of message frames.
+
+    Each frame is assigned a stable ID when added. Frames are stored
+    in insertion order and indexed by their ID, along with the grid row
+    they were placed in, allowing individual messages to be removed
+    in constant time without re-gridding the remaining messages.
+
+    Messages are stored in a conversation tree, and only the selected path
+    through it is shown. Switching branches keeps the frames before the
+    fork point and replaces the ones after it.
+
+    """
+
+    tree: ConversationTree[Message]
+    messages: dict[int, TkMessageFrame]
+    rows: dict[int, int]
+    icons: dict[str, PhotoImage]
 
     def __init__(self, chat: TkChat) -> None:
         super().__init__(chat, autoscroll=True, yscroll=True)
 
         self.chat = chat
-        self.messages = []
+        self.tree = ConversationTree()
+        self.messages = {}
+        self.rows = {}
 
         self.inner.grid_columnconfigure(0, weight=1)
+        self._create_container()
+
+        self.icons = {}
 
-        self.icons = load_message_icons()
+        self._ids = itertools.count()
+        self._next_row = 0
+
+    def __iter__(self) -> Iterator[TkMessageFrame]:
+        return iter(list(self.messages.values()))
+
+    def __len__(self) -> int:
+        return len(self.messages)
 
     def add_message(self, message: Message) -> TkMessageFrame:
-        side = "right" if message.role == "user" else "left"
-        frame = TkMessageFrame(self, message, side=side)
-        frame.grid(row=len(self.messages), column=0, sticky="ew")
-        self.messages.append(frame)
+        """Add a message to the end of the selected branch."""
+        return self._add_frame(self.tree.append(message))
+
+    def branch(self, frame: TkMessageFrame, message: Message) -> TkMessageFrame:
+        """Add a message as an alternative to the given frame's message,
+        showing the new branch in its place.
+        """
+        self.tree.branch(frame.node, message)
+        self._render_path()
+        return next(reversed(self.messages.values()))
+
+    def switch_branch(self, frame: TkMessageFrame, offset: int) -> None:
+        if self.chat.chat_fut is not None:
+            return  # The response's frame would be replaced
+
+        self.tree.switch(frame.node, offset)
+        self._render_path()
+
+    def select(self, node: MessageNode[Message]) -> None:
+        """Show the branch through the given message."""
+        self.tree.select(node)
+        self._render_path()
+
+    def load(self, tree: ConversationTree[Message]) -> None:
+        """Replace every message with the given tree, showing its selected path."""
+        self.clear()
+        self.tree = tree
+        self._render_path()
+
+    def delete_message(self, frame: TkMessageFrame) -> None:
+        """Delete a message, keeping any replies to it."""
+        # Summaries cover every message before them, so any after this
+        # one would still include it
+        for node in frame.node.descendants():
+            node.message.summary = None
+
+        replies = frame.node.children
+        self.tree.remove(frame.node)
+        frame.destroy()
+
+        # Replies moved up a level, so they may have more siblings now
+        self._render_path()
+        for other in self.messages.values():
+            if other.node in replies:
+                other.refresh_branches()
+
+    def _render_path(self) -> None:
+        path = self.tree.path()
+        frames = list(self.messages.values())
+        fork = common_prefix_length([frame.node for frame in frames], path)
+        for frame in frames[fork:]:
+            frame.destroy()
+        for node in path[fork:]:
+            self._add_frame(node)
+
+    def _add_frame(self, node: MessageNode[Message]) -> TkMessageFrame:
+        side = "right" if node.message.role == "user" else "left"
+        frame = TkMessageFrame(self, node, id=next(self._ids), side=side)
+
+        # Rows are never reused, so removing a frame leaves behind an empty
+        # row which grid collapses to zero height.
+        row = self._next_row
+        self._next_row += 1
+
+        frame.grid(row=row, column=0, sticky="ew")
+        self.messages[frame.id] = frame
+        self.rows[frame.id] = row
         return frame
 
+    def scroll_to(self, frame: TkMessageFrame) -> None:
+        # Lay out any newly added messages before measuring their position
+        self.update_idletasks()
+        self.scroll_to_widget(frame)
+
+    def get_icon(self, name: str) -> PhotoImage:
+        # Icons are decoded on first use rather than during startup
+        icon = self.icons.get(name)
+        if icon is None:
+            icon = self.icons[name] = load_message_icon(name)
+        return icon
+
+    def get_message(self, id: int) -> TkMessageFrame | None:
+        return self.messages.get(id)
+
+    def remove_message(self, id: int) -> None:
+        frame = self.messages.get(id)
+        if frame is not None:
+            self.delete_message(frame)
+
     def refresh(self) -> None:
-        for message in self.messages:
+        for message in self.messages.values():
             message.refresh()
 
     def clear(self) -> None:
-        for message in self.messages.copy():
-            message.destroy()  # NOTE: this is O(n^2)
+        self.tree.clear()
+        self.messages = {}
+        self.rows = {}
+        self._next_row = 0
+
+        # Destroying the container tears down every message frame at once,
+        # rather than destroying and forgetting each frame individually.
+        self.container.destroy()
+        self._create_container()
 
     def dump(
         self,
         *,
         exclude: Collection[TkMessageFrame] = (),
         include_hidden: bool = False,
+        until: TkMessageFrame | None = None,
+        compact: bool = False,
     ) -> list[dict[str, Any]]:
-        return [
-            frame.message.dump()
-            for frame in self.messages
-            if (include_hidden or not frame.message.hidden) and frame not in exclude
-        ]
+        """Return the messages to send in a chat.
+
+        If compact is True, the latest summary is sent in place of
+        every message it covers.
+
+        """
+        messages = []
+        for frame in self.messages.values():
+            if frame is until:
+                break
+            elif compact and frame.message.summary is not None:
+                messages = [summary_message(frame.message.summary)]
+            elif (include_hidden or not frame.message.hidden) and frame not in exclude:
+                messages.append(frame.message.dump())
+        return messages
+
+    def _create_container(self) -> None:
+        self.container = Frame(self.inner)
+        self.container.grid(row=0, column=0, sticky="nesw")
+        self.container.grid_columnconfigure(0, weight=1)
+
+    def _forget(self, frame: TkMessageFrame) -> None:
+        if self.messages.get(frame.id) is frame:
+            del self.messages[frame.id]
+            del self.rows[frame.id]
+
+
+def load_message_icon(name: str) -> PhotoImage:
+    icons = importlib.resources.files("ollamatk.icons")
+    return PhotoImage(data=icons.joinpath(f"{name}.png").read_bytes())
 
 
 def load_message_icons() -> dict[str, PhotoImage]:
-    icons = importlib.resources.files("ollamatk.icons")
-    return {
-        "assistant": PhotoImage(data=icons.joinpath("assistant.png").read_bytes()),
-        "user": PhotoImage(data=icons.joinpath("user.png").read_bytes()),
-    }
+    return {name: load_message_icon(name) for name in ("assistant", "user")}
@@ -0,0 +1,401 @@
+"""Pull and delete models on each server.
+
+Pull progress is streamed as NDJSON and decoded on the event loop,
+where updates for each layer are combined and only reported a few times
+per second along with the download rate and estimated time remaining.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from tkinter import Event, StringVar, Toplevel, messagebox
+from tkinter.ttk import Button, Entry, Frame, Label, Treeview
+from typing import TYPE_CHECKING, Callable
+
+from .pool import parse_addresses
+from .resources import format_size
+
+if TYPE_CHECKING:
+    from .app import TkApp
+    from .chat import TkChat
+    from .http import HTTPClient, PullResponse
+
+log = logging.getLogger(__name__)
+
+PROGRESS_INTERVAL = 0.25
+RATE_SMOOTHING = 0.3
+
+
+@dataclass(frozen=True)
+class PullStatus:
+    server: str
+    model: str
+    status: str
+    completed: int
+    total: int
+    rate: float
+    """The smoothed download rate, in bytes per second."""
+
+    @property
+    def fraction(self) -> float | None:
+        return self.completed / self.total if self.total > 0 else None
+
+    @property
+    def eta(self) -> float | None:
+        if self.rate <= 0 or self.total <= 0:
+            return None
+        return (self.total - self.completed) / self.rate
+
+    def format_progress(self) -> str:
+        fraction = self.fraction
+        if fraction is None:
+            return ""
+        return (
+            f"{fraction:.0%} "
+            f"({format_size(self.completed)} / {format_size(self.total)})"
+        )
+
+    def format_rate(self) -> str:
+        return f"{format_size(int(self.rate))}/s" if self.rate > 0 else ""
+
+    def format_eta(self) -> str:
+        eta = self.eta
+        if eta is None:
+            return ""
+        minutes, seconds = divmod(int(eta), 60)
+        return f"{minutes}m {seconds:02d}s" if minutes else f"{seconds}s"
+
+
+class PullProgress:
+    """Combines the progress of each layer in a pull and reports
+    it at most once per interval.
+
+    Ollama reports progress separately for each layer digest,
+    so the overall progress is the sum across every digest seen so far.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        server: str,
+        model: str,
+        callback: Callable[[PullStatus], object],
+        interval: float = PROGRESS_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.server = server
+        self.model = model
+        self.callback = callback
+        self.interval = interval
+        self.clock = clock
+        self.updates = 0
+        self.reports = 0
+
+        self._status = "starting"
+        self._layers: dict[str, tuple[int, int]] = {}
+        self._rate = 0.0
+        self._last_report: float | None = None
+        self._last_completed = 0
+
+    def __call__(self, data: PullResponse) -> None:
+        self.updates += 1
+        self._status = data.get("status", self._status)
+        digest = data.get("digest")
+        if digest is not None:
+            self._layers[digest] = (data.get("completed", 0), data.get("total", 0))
+
+        now = self.clock()
+        if self._last_report is None or now - self._last_report >= self.interval:
+            self._report(now)
+
+    def finish(self, status: str) -> None:
+        self._status = status
+        self._report(self.clock())
+
+    @property
+    def completed(self) -> int:
+        return sum(completed for completed, total in self._layers.values())
+
+    @property
+    def total(self) -> int:
+        return sum(total for completed, total in self._layers.values())
+
+    def _report(self, now: float) -> None:
+        completed = self.completed
+        if self._last_report is not None and now > self._last_report:
+            rate = (completed - self._last_completed) / (now - self._last_report)
+            self._rate += RATE_SMOOTHING * (max(rate, 0) - self._rate)
+
+        self._last_report = now
+        self._last_completed = completed
+        self.reports += 1
+        self.callback(
+            PullStatus(
+                server=self.server,
+                model=self.model,
+                status=self._status,
+                completed=completed,
+                total=self.total,
+                rate=self._rate,
+            )
+        )
+
+
+async def pull_model(
+    http: HTTPClient,
+    address: str,
+    model: str,
+    callback: Callable[[PullStatus], object],
+) -> None:
+    progress = PullProgress(server=address, model=model, callback=callback)
+    await http.pull_model(address=address, model=model, progress_callback=progress)
+    progress.finish("done")
+    log.info(
+        "Pulled %s onto %s with %d update(s), reported %d time(s)",
+        model,
+        address,
+        progress.updates,
+        progress.reports,
+    )
+
+
+class TkModelsWindow(Toplevel):
+    """Pulls models onto every server in the current address
+    and deletes them from individual servers.
+    """
+
+    pulls: dict[str, Future[None]]
+
+    def __init__(self, app: TkApp, chat: TkChat) -> None:
+        super().__init__(app)
+
+        self.app = app
+        self.chat = chat
+        self.pulls = {}
+
+        self.title("Models")
+        self.geometry("640x480")
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure("1 3", weight=1)
+
+        self.pull_frame = Frame(self)
+        self.pull_frame.grid(row=0, column=0, sticky="ew", padx=10, pady=(10, 0))
+        self.pull_frame.grid_columnconfigure(0, weight=1)
+
+        self.model_var = StringVar(self)
+        self.model_entry = Entry(self.pull_frame, textvariable=self.model_var)
+        self.model_entry.grid(row=0, column=0, sticky="ew", padx=(0, 10))
+        self.model_entry.bind("<Return>", lambda event: self.do_pull())
+
+        self.pull_button = Button(self.pull_frame, command=self.do_pull, text="Pull")
+        self.pull_button.grid(row=0, column=1, padx=(0, 5))
+
+        self.cancel_button = Button(
+            self.pull_frame,
+            command=self.do_cancel,
+            text="Cancel",
+        )
+        self.cancel_button.grid(row=0, column=2)
+
+        pull_columns = {
+            "model": ("Model", 120),
+            "server": ("Server", 140),
+            "status": ("Status", 100),
+            "progress": ("Progress", 140),
+            "rate": ("Rate", 70),
+            "eta": ("ETA", 60),
+        }
+        self.pull_tree = Treeview(self, columns=list(pull_columns), show="headings")
+        for name, (heading, width) in pull_columns.items():
+            self.pull_tree.heading(name, text=heading)
+            self.pull_tree.column(name, width=width, stretch=name == "progress")
+        self.pull_tree.grid(row=1, column=0, sticky="nesw", padx=10, pady=(5, 0))
+
+        self.local_frame = Frame(self)
+        self.local_frame.grid(row=2, column=0, sticky="ew", padx=10, pady=(10, 0))
+        self.local_frame.grid_columnconfigure(0, weight=1)
+
+        self.status = Label(self.local_frame)
+        self.status.grid(row=0, column=0, sticky="w")
+
+        self.refresh_button = Button(
+            self.local_frame,
+            command=self.refresh,
+            text="Refresh",
+        )
+        self.refresh_button.grid(row=0, column=1, padx=(0, 5))
+
+        self.delete_button = Button(
+            self.local_frame,
+            command=self.do_delete,
+            text="Delete",
+        )
+        self.delete_button.grid(row=0, column=2)
+
+        self.local_tree = Treeview(
+            self,
+            columns=("model", "server"),
+            selectmode="browse",
+            show="headings",
+        )
+        self.local_tree.heading("model", text="Model")
+        self.local_tree.heading("server", text="Server")
+        self.local_tree.grid(row=3, column=0, sticky="nesw", padx=10, pady=(5, 10))
+        self.local_tree.bind("<Delete>", lambda event: self.do_delete())
+        self.pull_tree.bind("<Delete>", lambda event: self.do_cancel())
+        self.pull_tree.bind("<<TreeviewSelect>>", self._on_pull_select)
+
+        self._on_pull_select(None)
+        self.refresh()
+
+    @property
+    def addresses(self) -> list[str]:
+        return parse_addresses(self.chat.settings.ollama_address)
+
+    def do_pull(self) -> None:
+        model = self.model_var.get().strip()
+        if model == "":
+            return
+
+        for address in self.addresses:
+            iid = f"{address}\0{model}"
+            if iid in self.pulls:
+                continue
+
+            values = (model, address, "starting", "", "", "")
+            if self.pull_tree.exists(iid):
+                self.pull_tree.item(iid, values=values)
+            else:
+                self.pull_tree.insert("", "end", iid=iid, values=values)
+
+            coro = pull_model(self.app.http, address, model, self._on_progress)
+            fut = self.pulls[iid] = self.app.event_thread.submit(coro)
+            fut.add_done_callback(lambda fut, iid=iid: self._on_pull_done(fut, iid))
+
+        self.model_var.set("")
+
+    def do_cancel(self) -> None:
+        for iid in self.pull_tree.selection():
+            fut = self.pulls.get(iid)
+            if fut is not None:
+                fut.cancel()
+
+    def do_delete(self) -> None:
+        selection = self.local_tree.selection()
+        if not selection:
+            return
+
+        model, address = self.local_tree.item(selection[0], "values")
+        if not messagebox.askyesno(
+            "Delete Model",
+            f"Delete {model} from {address}?",
+            parent=self,
+        ):
+            return
+
+        coro = self.app.http.delete_model(address=address, model=model)
+        fut = self.app.event_thread.submit(coro)
+        fut.add_done_callback(lambda fut: self._on_delete_done(fut, model))
+
+    def refresh(self) -> None:
+        """List the models installed on each server."""
+        self.status.configure(text="Loading models...")
+        # Every server is listed in one batch, so the tree is only
+        # rebuilt once all of them have responded
+        addresses = self.addresses
+        self.app.submit_many(
+            (self.app.http.list_local_models(address) for address in addresses),
+            lambda fut: self._on_refresh_done(fut, addresses),
+            return_exceptions=True,
+        )
+
+    def destroy(self) -> None:
+        # Pulls are tied to the window showing their progress
+        for fut in list(self.pulls.values()):
+            fut.cancel()
+        super().destroy()
+
+    def _on_progress(self, status: PullStatus) -> None:
+        # Called from the event loop, at most a few times per second per pull
+        iid = f"{status.server}\0{status.model}"
+        values = (
+            status.model,
+            status.server,
+            status.status,
+            status.format_progress(),
+            status.format_rate(),
+            status.format_eta(),
+        )
+        self.pull_tree.item(iid, values=values)
+
+    def _on_pull_done(self, fut: Future[None], iid: str) -> None:
+        self.pulls.pop(iid, None)
+        if not self.pull_tree.exists(iid):
+            return
+
+        values = list(self.pull_tree.item(iid, "values"))
+        if fut.cancelled():
+            values[2] = "cancelled"
+        elif (exc := fut.exception()) is not None:
+            log.exception("Error occurred while pulling model", exc_info=exc)
+            values[2] = "failed"
+        else:
+            values[2] = "done"
+            self.refresh()
+            self.chat.refresh_models()
+
+        values[4:] = ["", ""]
+        self.pull_tree.item(iid, values=values)
+        self._on_pull_select(None)
+
+    def _on_delete_done(self, fut: Future[None], model: str) -> None:
+        if fut.cancelled():
+            return
+        elif (exc := fut.exception()) is not None:
+            self.status.configure(text=f"Failed to delete {model}.")
+            return log.exception("Error occurred while deleting model", exc_info=exc)
+
+        self.refresh()
+        self.chat.refresh_models()
+
+    def _on_refresh_done(
+        self,
+        fut: Future[list[list[str]]],
+        addresses: list[str],
+    ) -> None:
+        if fut.cancelled() or not self.winfo_exists():
+            return
+
+        self.local_tree.delete(*self.local_tree.get_children())
+
+        failed = []
+        for address, models in zip(addresses, fut.result()):
+            # Exceptions are returned in place of a server's models
+            if isinstance(models, BaseException):
+                failed.append(address)
+                log.error(
+                    "Error occurred while listing models on %s",
+                    address,
+                    exc_info=models,
+                )
+                continue
+
+            for model in models:
+                self.local_tree.insert("", "end", values=(model, address))
+
+        count = len(self.local_tree.get_children())
+        if failed:
+            self.status.configure(text=f"Could not list models on {', '.join(failed)}.")
+        else:
+            self.status.configure(text=f"{count} model(s) installed")
+
+    def _on_pull_select(self, event: Event | None) -> None:
+        if any(iid in self.pulls for iid in self.pull_tree.selection()):
+            self.cancel_button.state(["!disabled"])
+        else:
+            self.cancel_button.state(["disabled"])
@@ -0,0 +1,191 @@
+"""Route requests across several Ollama servers.
+
+The address setting may list several servers separated by commas.
+Each request goes to the healthy server with the fewest outstanding
+requests, preferring servers that already have the model loaded,
+and falls over to the next server if a connection can't be made.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterator
+
+if TYPE_CHECKING:
+    import httpx
+
+log = logging.getLogger(__name__)
+
+HEALTH_CHECK_INTERVAL = 15
+HEALTH_CHECK_TIMEOUT = 5
+LATENCY_SMOOTHING = 0.3
+
+
+def parse_addresses(text: str) -> list[str]:
+    """Split a comma or whitespace separated list of addresses."""
+    addresses = (address for address in re.split(r"[,\s]+", text) if address)
+    return list(dict.fromkeys(addresses))
+
+
+def normalize_model_name(model: str) -> str:
+    """Add the default tag to a model name, as Ollama does."""
+    name = model.rpartition("/")[2]
+    return model if ":" in name else f"{model}:latest"
+
+
+@dataclass
+class ServerState:
+    address: str
+    healthy: bool = True
+    """Whether the last request or health check succeeded."""
+    models: set[str] | None = None
+    """The models available on the server, if it has been checked."""
+    loaded: set[str] = field(default_factory=set)
+    """The models currently loaded into memory."""
+    outstanding: int = 0
+    requests: int = 0
+    errors: int = 0
+    latency: float | None = None
+    """The smoothed time to receive response headers, in seconds."""
+    last_error: str = ""
+    last_checked: float | None = None
+
+    def rank(self, model: str | None) -> tuple:
+        if model is None:
+            return (not self.healthy, self.outstanding, self.latency or 0)
+
+        model = normalize_model_name(model)
+        has_model = self.models is None or model in self.models
+        return (
+            not self.healthy,
+            not has_model,
+            model not in self.loaded,
+            self.outstanding,
+            self.latency or 0,
+        )
+
+    def record_latency(self, latency: float) -> None:
+        self.healthy = True
+        self.requests += 1
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += LATENCY_SMOOTHING * (latency - self.latency)
+
+    def record_error(self, error: BaseException | str) -> None:
+        self.errors += 1
+        if isinstance(error, BaseException):
+            error = str(error) or type(error).__name__
+        self.last_error = error
+
+
+class ServerPool:
+    """Tracks the health and load of every server requests are sent to.
+
+    Servers are added the first time they are routed to, and are checked
+    periodically by :meth:`run_health_checks` for as long as it runs.
+
+    """
+
+    servers: dict[str, ServerState]
+
+    def __init__(
+        self,
+        *,
+        check_interval: float = HEALTH_CHECK_INTERVAL,
+        check_timeout: float = HEALTH_CHECK_TIMEOUT,
+    ) -> None:
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self.servers = {}
+
+    def route(self, address: str, model: str | None = None) -> list[ServerState]:
+        """Return the servers listed in an address, in order of preference."""
+        servers = [self._get_server(a) for a in parse_addresses(address)]
+        if not servers:
+            raise ValueError(f"No server address given: {address!r}")
+        return sorted(servers, key=lambda server: server.rank(model))
+
+    @contextmanager
+    def track(self, server: ServerState) -> Iterator[None]:
+        server.outstanding += 1
+        try:
+            yield
+        finally:
+            server.outstanding -= 1
+
+    async def ensure_checked(
+        self,
+        client: httpx.AsyncClient,
+        servers: list[ServerState],
+    ) -> None:
+        """Check any servers that haven't been checked yet."""
+        unchecked = [server for server in servers if server.last_checked is None]
+        if unchecked:
+            await asyncio.gather(*(self.check(client, s) for s in unchecked))
+
+    async def check(self, client: httpx.AsyncClient, server: ServerState) -> None:
+        import httpx
+
+        base = httpx.URL(server.address)
+        try:
+            async with asyncio.timeout(self.check_timeout):
+                tags, ps = await asyncio.gather(
+                    client.get(base.join("/api/tags")),
+                    client.get(base.join("/api/ps")),
+                )
+                tags.raise_for_status()
+                ps.raise_for_status()
+                models = {
+                    normalize_model_name(model["name"])
+                    for model in tags.json()["models"]
+                }
+                loaded = {
+                    normalize_model_name(model["name"]) for model in ps.json()["models"]
+                }
+        # Something other than Ollama may answer with an unexpected body,
+        # which fails to decode (ValueError) or lacks the expected keys
+        except (httpx.HTTPError, TimeoutError, ValueError, KeyError, TypeError) as e:
+            if server.healthy:
+                log.warning("Server %s failed its health check: %s", server.address, e)
+            server.healthy = False
+            server.record_error(e)
+        else:
+            if not server.healthy:
+                log.info("Server %s is healthy again", server.address)
+            server.healthy = True
+            server.models = models
+            server.loaded = loaded
+        finally:
+            server.last_checked = time.monotonic()
+
+    async def run_health_checks(self, client: httpx.AsyncClient) -> None:
+        """Check every known server periodically until cancelled."""
+        while True:
+            await asyncio.sleep(self.check_interval)
+            servers = list(self.servers.values())
+            results = await asyncio.gather(
+                *(self.check(client, s) for s in servers),
+                return_exceptions=True,
+            )
+            # One failed check shouldn't stop every server from being checked
+            for server, result in zip(servers, results):
+                if isinstance(result, Exception):
+                    log.error(
+                        "Error occurred while checking %s",
+                        server.address,
+                        exc_info=result,
+                    )
+                elif isinstance(result, BaseException):
+                    raise result
+
+    def _get_server(self, address: str) -> ServerState:
+        server = self.servers.get(address)
+        if server is None:
+            server = self.servers[address] = ServerState(address)
+        return server
@@ -0,0 +1,295 @@
+"""Sample where the Tk thread and the event thread spend their time.
+
+A background thread periodically captures the stacks of the profiled threads
+with :func:`sys._current_frames()`. Unlike :mod:`cProfile`, this adds no
+cost to each function call and works on several threads at once, so it can
+be left running through a slow response. Samples where a thread is waiting
+for events are counted as idle and left out of the summary.
+"""
+
+from __future__ import annotations
+
+import datetime
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from tkinter import Text, Toplevel
+from tkinter.ttk import Label, Scrollbar
+from types import CodeType
+from typing import TYPE_CHECKING, Iterable, Mapping
+
+if TYPE_CHECKING:
+    from .app import TkApp
+
+log = logging.getLogger(__name__)
+
+SAMPLE_INTERVAL = 0.005
+TOP_FUNCTIONS = 15
+
+# Functions that a thread sits in while it has nothing to do,
+# identified by their file name and qualified name
+IDLE_FUNCTIONS = {
+    ("__init__.py", "Misc.mainloop"),  # tkinter
+    ("selectors.py", "EpollSelector.select"),
+    ("selectors.py", "KqueueSelector.select"),
+    ("selectors.py", "SelectSelector.select"),
+    ("selectors.py", "_PollLikeSelector.select"),
+    ("windows_events.py", "IocpProactor._poll"),
+    ("runners.py", "Runner.run"),  # uvloop, which doesn't poll from Python
+}
+
+Stack = tuple[CodeType, ...]
+
+
+def format_code(code: CodeType) -> str:
+    return f"{code.co_qualname} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+def is_idle(code: CodeType) -> bool:
+    return (Path(code.co_filename).name, code.co_qualname) in IDLE_FUNCTIONS
+
+
+@dataclass(frozen=True)
+class FunctionStats:
+    name: str
+    own: int
+    """The number of samples where this function was running."""
+    total: int
+    """The number of samples where this function was on the stack."""
+
+
+@dataclass
+class ThreadProfile:
+    name: str
+    ident: int
+    stacks: Counter[Stack] = field(default_factory=Counter)
+    """The number of samples of each stack, from the outermost frame inwards."""
+
+    @property
+    def samples(self) -> int:
+        return self.stacks.total()
+
+    @property
+    def idle(self) -> int:
+        return sum(n for stack, n in self.stacks.items() if is_idle(stack[-1]))
+
+    def top_functions(self, limit: int = TOP_FUNCTIONS) -> list[FunctionStats]:
+        """Return the functions that were running for the most busy samples."""
+        own: Counter[CodeType] = Counter()
+        total: Counter[CodeType] = Counter()
+        for stack, n in self.stacks.items():
+            if is_idle(stack[-1]):
+                continue
+            own[stack[-1]] += n
+            for code in set(stack):
+                total[code] += n
+
+        return [
+            FunctionStats(format_code(code), own=n, total=total[code])
+            for code, n in own.most_common(limit)
+        ]
+
+    def format_folded(self) -> Iterable[str]:
+        """Yield each stack in the folded format read by flame graph tools."""
+        for stack, n in self.stacks.most_common():
+            yield ";".join(format_code(code) for code in stack) + f" {n}\n"
+
+
+@dataclass
+class Profile:
+    started_at: datetime.datetime
+    duration: float
+    interval: float
+    sample_time: float
+    """The time spent capturing stacks, in seconds."""
+    threads: list[ThreadProfile]
+
+    @property
+    def overhead(self) -> float:
+        """The fraction of one core spent taking samples."""
+        return self.sample_time / self.duration if self.duration > 0 else 0
+
+    def format_report(self, *, limit: int = TOP_FUNCTIONS) -> str:
+        lines = [
+            f"Profiled for {self.duration:.1f}s every {self.interval * 1000:.0f}ms, "
+            f"sampling took {self.overhead:.1%} of one core"
+        ]
+        for thread in self.threads:
+            samples = thread.samples
+            busy = samples - thread.idle
+            lines.append("")
+            lines.append(
+                f"{thread.name}: {samples} sample(s), "
+                f"busy {busy / samples if samples else 0:.1%}"
+            )
+            top = thread.top_functions(limit)
+            if not top:
+                continue
+
+            lines.append(f"  {'Own':>6} {'Total':>6}  Function")
+            for stats in top:
+                lines.append(
+                    f"  {stats.own / samples:6.1%} {stats.total / samples:6.1%}  "
+                    f"{stats.name}"
+                )
+        return "\n".join(lines)
+
+    def save(self, directory: Path | str) -> list[Path]:
+        """Write the report and each thread's stacks to timestamped files."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        prefix = f"profile-{self.started_at:%Y%m%d-%H%M%S}"
+
+        report_path = directory / f"{prefix}.txt"
+        report_path.write_text(self.format_report() + "\n", encoding="utf-8")
+        paths = [report_path]
+
+        for thread in self.threads:
+            path = directory / f"{prefix}-{thread.name.lower()}.folded"
+            with path.open("w", encoding="utf-8") as f:
+                f.writelines(thread.format_folded())
+            paths.append(path)
+
+        return paths
+
+
+class SamplingProfiler:
+    """Periodically samples the stacks of several threads.
+
+    :param directory:
+        The directory where profiles should be saved,
+        defaulting to a directory inside the data directory.
+    :param interval: How often to sample each thread, in seconds.
+
+    """
+
+    _threads: list[ThreadProfile]
+    _sampler: threading.Thread | None
+
+    def __init__(
+        self,
+        directory: Path | str | None = None,
+        *,
+        interval: float = SAMPLE_INTERVAL,
+    ) -> None:
+        if not directory:
+            from .history import get_data_dir
+
+            directory = get_data_dir() / "profiles"
+
+        self.directory = Path(directory)
+        self.interval = interval
+
+        self._threads = []
+        self._sampler = None
+        self._stopped = threading.Event()
+        self._started_at = datetime.datetime.now()
+        self._start = 0.0
+        self._sample_time = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._sampler is not None
+
+    def start(self, threads: Mapping[str, threading.Thread]) -> None:
+        """Start sampling the given threads, keyed by their display names."""
+        if self._sampler is not None:
+            raise RuntimeError("Profiler is already running")
+
+        self._threads = []
+        for name, thread in threads.items():
+            if thread.ident is None:
+                raise ValueError(f"{name} thread has not been started")
+            self._threads.append(ThreadProfile(name, thread.ident))
+
+        self._started_at = datetime.datetime.now()
+        self._start = time.perf_counter()
+        self._sample_time = 0.0
+        self._stopped.clear()
+        self._sampler = threading.Thread(
+            target=self._run,
+            name="ollamatk-profiler",
+            daemon=True,
+        )
+        self._sampler.start()
+        log.info("Started CPU profiling of %s", ", ".join(threads))
+
+    def stop(self) -> Profile:
+        if self._sampler is None:
+            raise RuntimeError("Profiler is not running")
+
+        self._stopped.set()
+        self._sampler.join()
+        self._sampler = None
+
+        return Profile(
+            started_at=self._started_at,
+            duration=time.perf_counter() - self._start,
+            interval=self.interval,
+            sample_time=self._sample_time,
+            threads=self._threads,
+        )
+
+    def stop_and_save(self) -> Profile:
+        profile = self.stop()
+        paths = profile.save(self.directory)
+        log.info("Saved CPU profile to %s", paths[0])
+        return profile
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            start = time.perf_counter()
+            self._sample()
+            self._sample_time += time.perf_counter() - start
+
+    def _sample(self) -> None:
+        frames = sys._current_frames()
+        for thread in self._threads:
+            frame = frames.get(thread.ident)
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+
+            if stack:
+                stack.reverse()
+                thread.stacks[tuple(stack)] += 1
+
+
+class TkProfileWindow(Toplevel):
+    def __init__(self, app: TkApp, profile: Profile) -> None:
+        super().__init__(app)
+
+        self.app = app
+        self.profile = profile
+
+        self.title("CPU Profile")
+        self.geometry("720x550")
+
+        self.saved = Label(self, text=f"Saved to {app.profiler.directory}")
+        self.saved.pack(side="bottom", anchor="w", padx=10, pady=10)
+
+        self.text = Text(
+            self,
+            font="TkFixedFont",
+            width=0,
+            height=0,
+            wrap="none",
+        )
+        self.text.insert("1.0", profile.format_report())
+        self.text.configure(state="disabled")
+        self.text.pack(
+            side="left",
+            expand=True,
+            fill="both",
+            padx=(10, 0),
+            pady=(10, 0),
+        )
+
+        self.scrollbar = Scrollbar(self, command=self.text.yview)
+        self.text.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(expand=True, fill="y", padx=(0, 10), pady=(10, 0))
@@ -0,0 +1,104 @@
+"""Record and replay chat completion streams.
+
+Recordings are NDJSON files where each line is a ``[offset, line]`` pair,
+``offset`` being the number of seconds since the response headers arrived
+and ``line`` being the raw NDJSON line sent by the server.
+This keeps recordings compact while preserving the original token timing,
+allowing problematic sessions to be reproduced deterministically::
+
+    recorder = ChatRecorder("recordings/")
+    http = HTTPClient(recorder=recorder)
+    ...
+    transport = ReplayTransport("recordings/chat-20240913-120000-000000.ndjson")
+    http = HTTPClient(transport=transport)
+
+"""
+
+import asyncio
+import datetime
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, AsyncIterator, Iterator
+
+import httpx
+
+
+class StreamRecording:
+    """A single recorded stream being written to disk."""
+
+    def __init__(self, file: IO[str]) -> None:
+        self.file = file
+        self._start = time.perf_counter()
+
+    def write(self, line: str) -> None:
+        offset = round(time.perf_counter() - self._start, 6)
+        self.file.write(json.dumps([offset, line], separators=(",", ":")))
+        self.file.write("\n")
+
+
+class ChatRecorder:
+    """Writes each chat completion stream to a new file in a directory."""
+
+    def __init__(self, directory: Path | str) -> None:
+        self.directory = Path(directory)
+
+    @contextmanager
+    def record(self) -> Iterator[StreamRecording]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        now = datetime.datetime.now()
+        path = self.directory / f"chat-{now:%Y%m%d-%H%M%S-%f}.ndjson"
+        with path.open("w", encoding="utf-8") as f:
+            yield StreamRecording(f)
+
+
+def load_recording(path: Path | str) -> list[tuple[float, str]]:
+    """Load a recording into a list of ``(offset, line)`` pairs."""
+    with open(path, encoding="utf-8") as f:
+        return [tuple(json.loads(line)) for line in f if line.strip()]
+
+
+class ReplayStream(httpx.AsyncByteStream):
+    def __init__(self, lines: list[tuple[float, str]], speed: float | None) -> None:
+        self.lines = lines
+        self.speed = speed
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        start = time.perf_counter()
+        for offset, line in self.lines:
+            if self.speed is not None:
+                delay = offset / self.speed - (time.perf_counter() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield line.encode() + b"\n"
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Responds to every chat completion request with a recorded stream.
+
+    :param path: The recording file to replay.
+    :param speed:
+        The playback speed relative to the original recording,
+        e.g. ``2`` to replay twice as fast.
+        If None, lines are replayed as fast as possible.
+
+    """
+
+    def __init__(self, path: Path | str, *, speed: float | None = 1) -> None:
+        if speed is not None and speed <= 0:
+            raise ValueError(f"speed must be positive or None, not {speed!r}")
+
+        self.lines = load_recording(path)
+        self.speed = speed
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path != "/api/chat":
+            return httpx.Response(404, request=request)
+
+        return httpx.Response(
+            200,
+            headers={"Content-Type": "application/x-ndjson"},
+            stream=ReplayStream(self.lines, self.speed),
+            request=request,
+        )
@@ -0,0 +1,300 @@
+"""Monitor which models each server has loaded into memory.
+
+A poller on the event loop lists running models with ``/api/ps``,
+polling quickly while someone is watching or a response is streaming,
+and backing off while idle. Each poll is compared with the last one
+so subscribers only receive the rows that actually changed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from tkinter import Event, Toplevel
+from tkinter.ttk import Label, Treeview
+from typing import TYPE_CHECKING, Callable, Hashable
+
+from .pool import parse_addresses
+
+if TYPE_CHECKING:
+    from .app import TkApp
+    from .http import HTTPClient, RunningModel
+
+log = logging.getLogger(__name__)
+
+FAST_INTERVAL = 1.0
+IDLE_INTERVAL = 30.0
+BACKOFF = 2.0
+
+ModelKey = tuple[str, str]
+"""The server address and name of a loaded model."""
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    server: str
+    name: str
+    size: int
+    size_vram: int
+    expires_at: str
+
+    @property
+    def key(self) -> ModelKey:
+        return self.server, self.name
+
+    @classmethod
+    def from_response(cls, server: str, model: RunningModel) -> LoadedModel:
+        return cls(
+            server=server,
+            name=model["name"],
+            size=model["size"],
+            size_vram=model["size_vram"],
+            expires_at=model["expires_at"],
+        )
+
+
+@dataclass
+class ModelDiff:
+    changed: dict[ModelKey, LoadedModel] = field(default_factory=dict)
+    """Models that were added or whose details changed."""
+    removed: list[ModelKey] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.changed or self.removed)
+
+
+def diff_models(
+    old: dict[ModelKey, LoadedModel],
+    new: dict[ModelKey, LoadedModel],
+) -> ModelDiff:
+    changed = {key: model for key, model in new.items() if old.get(key) != model}
+    removed = [key for key in old if key not in new]
+    return ModelDiff(changed, removed)
+
+
+class ResourcePoller:
+    """Polls servers for loaded models at an adaptive interval.
+
+    Polling is fast while anything is marked active with
+    :meth:`set_active`, and otherwise backs off exponentially
+    up to the idle interval. Both methods for marking activity
+    and subscribing may be called from any thread.
+
+    """
+
+    models: dict[ModelKey, LoadedModel]
+
+    def __init__(
+        self,
+        *,
+        fast_interval: float = FAST_INTERVAL,
+        idle_interval: float = IDLE_INTERVAL,
+        backoff: float = BACKOFF,
+    ) -> None:
+        self.fast_interval = fast_interval
+        self.idle_interval = idle_interval
+        self.backoff = backoff
+        self.models = {}
+        self.polls = 0
+
+        self._lock = threading.Lock()
+        self._active: set[Hashable] = set()
+        self._subscribers: list[Callable[[ModelDiff], object]] = []
+        self._new_subscribers: list[Callable[[ModelDiff], object]] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+
+    def set_active(self, key: Hashable, active: bool) -> None:
+        with self._lock:
+            if active:
+                self._active.add(key)
+            else:
+                self._active.discard(key)
+
+        if active and self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def subscribe(self, callback: Callable[[ModelDiff], object]) -> None:
+        """Call the given function from the event loop with each change.
+
+        After the next poll, the first call includes every loaded model,
+        even if nothing changed.
+
+        """
+        with self._lock:
+            self._new_subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[ModelDiff], object]) -> None:
+        with self._lock:
+            if callback in self._new_subscribers:
+                self._new_subscribers.remove(callback)
+            else:
+                self._subscribers.remove(callback)
+
+    @property
+    def subscribers(self) -> list[Callable[[ModelDiff], object]]:
+        with self._lock:
+            return self._subscribers + self._new_subscribers
+
+    @property
+    def active(self) -> bool:
+        with self._lock:
+            return bool(self._active)
+
+    def next_interval(self, interval: float, changed: bool) -> float:
+        if self.active or changed:
+            return self.fast_interval
+        return min(interval * self.backoff, self.idle_interval)
+
+    async def run(self, http: HTTPClient, get_address: Callable[[], str]) -> None:
+        """Poll the servers in the current address until cancelled."""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        interval = self.fast_interval
+        try:
+            while True:
+                # Clear before polling so activity during the poll isn't missed
+                self._wake.clear()
+                diff = await self.poll(http, parse_addresses(get_address()))
+                interval = self.next_interval(interval, bool(diff))
+
+                try:
+                    async with asyncio.timeout(interval):
+                        await self._wake.wait()
+                except TimeoutError:
+                    pass
+                else:
+                    interval = self.fast_interval
+        finally:
+            self._loop = None
+            self._wake = None
+
+    async def poll(self, http: HTTPClient, addresses: list[str]) -> ModelDiff:
+        results = await asyncio.gather(
+            *(http.list_running_models(address) for address in addresses),
+            return_exceptions=True,
+        )
+
+        models = {}
+        for address, result in zip(addresses, results):
+            if isinstance(result, BaseException):
+                # Forget the models of unreachable servers rather than
+                # showing stale rows
+                log.debug("Could not list models running on %s: %s", address, result)
+                continue
+            for model in result:
+                loaded = LoadedModel.from_response(address, model)
+                models[loaded.key] = loaded
+
+        with self._lock:
+            diff = diff_models(self.models, models)
+            self.models = models
+            self.polls += 1
+            subscribers = list(self._subscribers) if diff else []
+            new_subscribers = self._new_subscribers
+            self._subscribers.extend(new_subscribers)
+            self._new_subscribers = []
+
+        for callback in subscribers:
+            self._notify(callback, diff)
+        for callback in new_subscribers:
+            self._notify(callback, ModelDiff(dict(models)))
+        return diff
+
+    def _notify(self, callback: Callable[[ModelDiff], object], diff: ModelDiff) -> None:
+        # A subscriber failing, such as a window destroyed before it could
+        # unsubscribe, shouldn't stop the poller for everyone else
+        try:
+            callback(diff)
+        except Exception:
+            log.exception(
+                "Error occurred while notifying %r of loaded models", callback
+            )
+
+
+def format_size(size: int) -> str:
+    if size < 1024:
+        return f"{size} B"
+
+    value = float(size)
+    for unit in ("KB", "MB", "GB"):
+        value /= 1024
+        if value < 1024:
+            break
+    return f"{value:.1f} {unit}"
+
+
+def format_expiry(expires_at: str) -> str:
+    try:
+        expires = datetime.fromisoformat(expires_at)
+    except ValueError:
+        return expires_at
+    return expires.astimezone().strftime("%H:%M:%S")
+
+
+class TkResourcesWindow(Toplevel):
+    """Shows the models loaded by each server and their memory usage."""
+
+    def __init__(self, app: TkApp) -> None:
+        super().__init__(app)
+
+        self.app = app
+        self.poller = app.resources
+
+        self.title("Loaded Models")
+        self.geometry("600x240")
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        self.status = Label(self, text="Waiting for servers...")
+        self.status.grid(row=0, column=0, sticky="w", padx=10, pady=(10, 0))
+
+        columns = {
+            "server": ("Server", 160),
+            "model": ("Model", 140),
+            "size": ("Size", 80),
+            "vram": ("VRAM", 80),
+            "expires": ("Unloads At", 80),
+        }
+        self.tree = Treeview(self, columns=list(columns), show="headings")
+        for name, (heading, width) in columns.items():
+            self.tree.heading(name, text=heading)
+            self.tree.column(name, width=width, stretch=name in ("server", "model"))
+        self.tree.grid(row=1, column=0, sticky="nesw", padx=10, pady=10)
+
+        # Diffs are applied from the event loop, like chat stream callbacks
+        self.poller.subscribe(self.apply_diff)
+        self.poller.set_active(self, True)
+        self.bind("<Destroy>", self._on_destroy, add=True)
+
+    def _on_destroy(self, event: Event) -> None:
+        if event.widget is self:
+            self.poller.set_active(self, False)
+            self.poller.unsubscribe(self.apply_diff)
+
+    def apply_diff(self, diff: ModelDiff) -> None:
+        for key in diff.removed:
+            iid = "\0".join(key)
+            if self.tree.exists(iid):
+                self.tree.delete(iid)
+
+        for key, model in diff.changed.items():
+            iid = "\0".join(key)
+            values = (
+                model.server,
+                model.name,
+                format_size(model.size),
+                format_size(model.size_vram),
+                format_expiry(model.expires_at),
+            )
+            if self.tree.exists(iid):
+                self.tree.item(iid, values=values)
+            else:
+                self.tree.insert("", "end", iid=iid, values=values)
+
+        count = len(self.tree.get_children())
+        self.status.configure(text=f"{count} model(s) loaded")
@@ -0,0 +1,172 @@
+"""Schedule requests to each server by priority and concurrency limits.
+
+Interactive requests, like chats the user is waiting on, are always
+started before background requests, like embeddings and warm-ups.
+Background requests are also limited to fewer slots than the server
+allows, leaving at least one slot free for interactive requests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import AsyncIterator
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+@dataclass
+class ServerStats:
+    active: int = 0
+    waiting: int = 0
+    completed: int = 0
+    last_wait: float = 0
+    max_wait: float = 0
+    total_wait: float = 0
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.completed if self.completed > 0 else 0
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: Priority
+    seq: int
+    future: asyncio.Future[None] = field(compare=False)
+
+
+@dataclass
+class _Server:
+    stats: ServerStats = field(default_factory=ServerStats)
+    background: int = 0
+    waiters: list[_Waiter] = field(default_factory=list)
+
+
+class RequestScheduler:
+    """Limits how many requests run at once for each server.
+
+    Slots must be acquired from the same event loop, but stats may be
+    read from any thread for display purposes.
+
+    :param per_server_limit: The maximum number of requests per server.
+    :param background_limit:
+        The maximum number of background requests per server.
+        Defaults to one less than ``per_server_limit``, or 1.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        per_server_limit: int = 2,
+        background_limit: int | None = None,
+    ) -> None:
+        if per_server_limit < 1:
+            raise ValueError("per_server_limit must be at least 1")
+        if background_limit is None:
+            background_limit = max(1, per_server_limit - 1)
+
+        self.per_server_limit = per_server_limit
+        self.background_limit = background_limit
+        self._servers: dict[str, _Server] = {}
+        self._seq = itertools.count()
+
+    def stats(self, server: str) -> ServerStats:
+        state = self._servers.get(server)
+        return state.stats if state is not None else ServerStats()
+
+    def all_stats(self) -> dict[str, ServerStats]:
+        return {name: state.stats for name, state in list(self._servers.items())}
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        server: str,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> AsyncIterator[float]:
+        """Wait for a slot on the given server, yielding how long it took."""
+        state = self._get_server(server)
+        start = time.perf_counter()
+        await self._acquire(state, priority)
+        waited = time.perf_counter() - start
+
+        stats = state.stats
+        stats.last_wait = waited
+        stats.max_wait = max(stats.max_wait, waited)
+        stats.total_wait += waited
+        try:
+            yield waited
+        finally:
+            stats.completed += 1
+            self._release(state, priority)
+
+    async def _acquire(self, state: _Server, priority: Priority) -> None:
+        ahead = any(
+            w.priority <= priority and not w.future.cancelled() for w in state.waiters
+        )
+        if not ahead and self._can_start(state, priority):
+            return self._start(state, priority)
+
+        waiter = _Waiter(
+            priority,
+            next(self._seq),
+            asyncio.get_running_loop().create_future(),
+        )
+        heapq.heappush(state.waiters, waiter)
+        state.stats.waiting += 1
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # The slot was granted just as we were cancelled
+                self._release(state, priority)
+            else:
+                state.stats.waiting -= 1
+            raise
+
+    def _can_start(self, state: _Server, priority: Priority) -> bool:
+        if state.stats.active >= self.per_server_limit:
+            return False
+        elif priority == Priority.BACKGROUND:
+            return state.background < self.background_limit
+        return True
+
+    def _start(self, state: _Server, priority: Priority) -> None:
+        state.stats.active += 1
+        if priority == Priority.BACKGROUND:
+            state.background += 1
+
+    def _release(self, state: _Server, priority: Priority) -> None:
+        state.stats.active -= 1
+        if priority == Priority.BACKGROUND:
+            state.background -= 1
+        self._wake(state)
+
+    def _wake(self, state: _Server) -> None:
+        while state.waiters:
+            waiter = state.waiters[0]
+            if waiter.future.cancelled():
+                heapq.heappop(state.waiters)
+                continue
+            elif not self._can_start(state, waiter.priority):
+                break
+
+            heapq.heappop(state.waiters)
+            state.stats.waiting -= 1
+            self._start(state, waiter.priority)
+            waiter.future.set_result(None)
+
+    def _get_server(self, server: str) -> _Server:
+        state = self._servers.get(server)
+        if state is None:
+            state = self._servers[server] = _Server()
+        return state
@@ -56,6 +56,17 @@ class ScrollableFrame(Frame):
         self.__update_rate = 125
         self.__update_loop()
 
+    def scroll_to_widget(self, widget: Widget) -> None:
+        """Scroll vertically so the top of the given descendant is visible."""
+        height = self.inner.winfo_reqheight()
+        if height <= 0:
+            return
+
+        y = widget.winfo_rooty() - self.inner.winfo_rooty()
+        self.__canvas.yview_moveto(y / height)
+        # Prevent autoscroll from jumping back to the bottom
+        self.__last_scroll_edges = self.__get_scroll_edges()
+
     def __on_inner_configure(self, event: Event):
         background = self.__style.lookup(self.inner.winfo_class(), "background")
         self.__canvas.configure(background=background)
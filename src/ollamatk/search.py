@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from tkinter import Event, StringVar, Text, Toplevel
+from tkinter.ttk import Button, Entry, Frame, Label, Radiobutton, Scrollbar, Treeview
+from typing import TYPE_CHECKING, Literal
+
+from .history import MATCH_END, MATCH_START, StoredMessage
+
+if TYPE_CHECKING:
+    from .chat import TkChat
+    from .history import ConversationHistory
+    from .http import HTTPClient
+    from .semantic import SemanticIndex
+
+log = logging.getLogger(__name__)
+
+SNIPPET_LENGTH = 80
+
+SearchMode = Literal["keyword", "semantic"]
+
+
+@dataclass(frozen=True)
+class SearchRow:
+    message: StoredMessage
+    score: str
+    snippet: str
+    terms: tuple[str, ...] = ()
+    """Matched terms to highlight when previewing the message."""
+
+
+async def sync_and_search(
+    index: SemanticIndex,
+    http: HTTPClient,
+    address: str,
+    query: str,
+) -> list[SearchRow]:
+    await index.sync(http, address)
+    results = await index.search(http, address, query)
+    return [
+        SearchRow(
+            result.message,
+            f"{result.score:.3f}",
+            shorten(result.message.content),
+        )
+        for result in results
+    ]
+
+
+def search_keywords(history: ConversationHistory, query: str) -> list[SearchRow]:
+    rows = []
+    for match in history.search_text(query):
+        terms = []
+        snippet = []
+        for i, part in enumerate(match.snippet.split(MATCH_START)):
+            term, end, rest = part.partition(MATCH_END)
+            if i > 0 and end:
+                terms.append(term)
+                snippet.append(f"[{term}]{rest}")
+            else:
+                snippet.append(part)
+
+        rows.append(
+            SearchRow(
+                match.message,
+                "",
+                " ".join("".join(snippet).split()),
+                tuple(dict.fromkeys(terms)),
+            )
+        )
+    return rows
+
+
+def shorten(text: str) -> str:
+    text = " ".join(text.split())
+    if len(text) > SNIPPET_LENGTH:
+        text = text[: SNIPPET_LENGTH - 3] + "..."
+    return text
+
+
+class TkSearchWindow(Toplevel):
+    search_fut: Future[list[SearchRow]] | None
+
+    def __init__(self, chat: TkChat) -> None:
+        super().__init__(chat)
+
+        self.chat = chat
+        self.rows: dict[str, SearchRow] = {}
+        self.search_fut = None
+        self._search_started = 0.0
+
+        self.title("Search")
+        self.geometry("640x480")
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(2, weight=2)
+        self.grid_rowconfigure(3, weight=1)
+
+        self.query_frame = Frame(self)
+        self.query_frame.grid(row=0, column=0, sticky="ew", padx=10, pady=(10, 0))
+        self.query_frame.grid_columnconfigure(0, weight=1)
+
+        self.query_var = StringVar(self)
+        self.query = Entry(self.query_frame, textvariable=self.query_var)
+        self.query.grid(row=0, column=0, sticky="ew", padx=(0, 10))
+        self.query.bind("<Return>", lambda event: self.do_search())
+        self.query.focus_set()
+
+        self.mode_var = StringVar(self, value="keyword")
+        self.keyword_mode = Radiobutton(
+            self.query_frame,
+            text="Keyword",
+            value="keyword",
+            variable=self.mode_var,
+        )
+        self.keyword_mode.grid(row=0, column=1, padx=(0, 5))
+        self.semantic_mode = Radiobutton(
+            self.query_frame,
+            text="Semantic",
+            value="semantic",
+            variable=self.mode_var,
+        )
+        self.semantic_mode.grid(row=0, column=2, padx=(0, 10))
+
+        self.search_button = Button(
+            self.query_frame,
+            command=self.do_search,
+            text="Search",
+        )
+        self.search_button.grid(row=0, column=3)
+
+        self.status = Label(self)
+        self.status.grid(row=1, column=0, sticky="w", padx=10, pady=(5, 0))
+
+        self.tree = Treeview(
+            self,
+            columns=("score", "role", "snippet"),
+            selectmode="browse",
+            show="headings",
+        )
+        self.tree.heading("score", text="Score")
+        self.tree.heading("role", text="Role")
+        self.tree.heading("snippet", text="Message")
+        self.tree.column("score", stretch=False, width=60)
+        self.tree.column("role", stretch=False, width=80)
+        self.tree.grid(row=2, column=0, sticky="nesw", padx=10, pady=(5, 0))
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<Double-1>", lambda event: self.do_open())
+        self.tree.bind("<Return>", lambda event: self.do_open())
+
+        self.preview = Text(
+            self,
+            font="TkDefaultFont",
+            height=0,
+            state="disabled",
+            width=0,
+            wrap="word",
+        )
+        self.preview.tag_configure("match", background="#fff3a0")
+        self.preview.grid(row=3, column=0, sticky="nesw", padx=10, pady=10)
+
+        self.scrollbar = Scrollbar(self, command=self.preview.yview)
+        self.preview.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.grid(row=3, column=1, sticky="ns", padx=(0, 10), pady=10)
+
+    @property
+    def mode(self) -> SearchMode:
+        return "semantic" if self.mode_var.get() == "semantic" else "keyword"
+
+    def do_search(self) -> None:
+        query = self.query_var.get().strip()
+        if query == "" or self.search_fut is not None:
+            return
+
+        if self.mode == "semantic":
+            fut = self._search_semantic(query)
+        else:
+            fut = self.chat.app.workers.submit(
+                search_keywords,
+                self.chat.app.history,
+                query,
+            )
+
+        if fut is None:
+            return
+
+        self.status.configure(text="Searching...")
+        self.search_button.state(["disabled"])
+        self._search_started = time.perf_counter()
+        self.search_fut = fut
+        fut.add_done_callback(self._on_search_done)
+
+    def do_open(self) -> None:
+        """Jump to the selected message in the chat window."""
+        selection = self.tree.selection()
+        if not selection:
+            return
+
+        row = self.rows[selection[0]]
+        if not self.chat.show_history_message(row.message):
+            self.status.configure(text="Wait for the current response to finish first.")
+
+    def destroy(self) -> None:
+        if self.search_fut is not None:
+            self.search_fut.cancel()
+        super().destroy()
+
+    def show_rows(self, rows: list[SearchRow]) -> None:
+        self.tree.delete(*self.tree.get_children())
+        self.rows = {}
+
+        for row in rows:
+            item = self.tree.insert(
+                "",
+                "end",
+                values=(row.score, row.message.role.title(), row.snippet),
+            )
+            self.rows[item] = row
+
+    def _search_semantic(self, query: str) -> Future[list[SearchRow]] | None:
+        settings = self.chat.settings
+        try:
+            index = self.chat.app.get_semantic_index(settings.embedding_model)
+        except ImportError:
+            self.status.configure(
+                text="Semantic search requires the optional search extra."
+            )
+            return None
+
+        coro = sync_and_search(
+            index,
+            self.chat.app.http,
+            settings.ollama_address,
+            query,
+        )
+        return self.chat.app.event_thread.submit(coro)
+
+    def _on_search_done(self, fut: Future[list[SearchRow]]) -> None:
+        self.search_fut = None
+        if fut.cancelled():
+            return
+
+        self.search_button.state(["!disabled"])
+        if (exc := fut.exception()) is not None:
+            self.status.configure(text="Search failed. Check logs for more details.")
+            return log.exception("Error occurred while searching", exc_info=exc)
+
+        rows = fut.result()
+        elapsed = (time.perf_counter() - self._search_started) * 1000
+        self.show_rows(rows)
+        self.status.configure(text=f"{len(rows)} result(s) in {elapsed:.0f}ms")
+
+    def _on_select(self, event: Event) -> None:
+        selection = self.tree.selection()
+        if not selection:
+            return
+
+        row = self.rows[selection[0]]
+        self.preview.configure(state="normal")
+        self.preview.delete("1.0", "end")
+        self.preview.insert("1.0", row.message.content)
+        for term in row.terms:
+            self._highlight_term(term)
+        self.preview.configure(state="disabled")
+
+    def _highlight_term(self, term: str) -> None:
+        index = "1.0"
+        while index := self.preview.search(term, index, "end", nocase=True):
+            end = f"{index}+{len(term)}c"
+            self.preview.tag_add("match", index, end)
+            index = end
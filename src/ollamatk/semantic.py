@@ -0,0 +1,128 @@
+"""Semantic search over conversation history using Ollama embeddings.
+
+Messages are embedded lazily rather than as soon as they are stored,
+since loading an embedding model may evict the chat model from memory.
+Each sync only embeds messages added since the last one, in batches.
+
+NumPy is required, which is installed with the ``search`` extra.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .history import ConversationHistory, StoredMessage
+from .scheduler import Priority
+from .vectors import VectorIndex
+
+if TYPE_CHECKING:
+    from .http import HTTPClient
+
+log = logging.getLogger(__name__)
+
+EMBED_BATCH_SIZE = 32
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    message: StoredMessage
+    score: float
+
+
+class SemanticIndex:
+    """Embeds stored messages and answers queries by cosine similarity.
+
+    Vectors are kept in a separate directory for each embedding model,
+    so switching between models doesn't discard previous work.
+
+    """
+
+    def __init__(
+        self,
+        history: ConversationHistory,
+        directory: Path | str | None,
+        *,
+        model: str,
+    ) -> None:
+        if directory is not None:
+            directory = Path(directory) / re.sub(r"[^\w.-]", "_", model)
+
+        self.history = history
+        self.model = model
+        self.vectors = VectorIndex(directory, model=model)
+        self._sync_lock: asyncio.Lock | None = None
+
+    async def sync(
+        self,
+        http: HTTPClient,
+        address: str,
+        *,
+        batch_size: int = EMBED_BATCH_SIZE,
+    ) -> int:
+        """Embed any messages that haven't been indexed yet.
+
+        Returns the number of messages that were added to the index.
+
+        """
+        # Prevent concurrent syncs from embedding the same messages twice
+        if self._sync_lock is None:
+            self._sync_lock = asyncio.Lock()
+
+        added = 0
+        async with self._sync_lock:
+            last_id = self.vectors.max_id
+            while True:
+                messages = await asyncio.to_thread(
+                    self.history.get_messages_after, last_id, limit=batch_size
+                )
+                if not messages:
+                    break
+
+                last_id = messages[-1].id
+                messages = [m for m in messages if m.content.strip()]
+                if not messages:
+                    continue
+
+                embeddings = await http.embed(
+                    address=address,
+                    model=self.model,
+                    inputs=[m.content for m in messages],
+                )
+                ids = [m.id for m in messages]
+                await asyncio.to_thread(self.vectors.add, ids, embeddings)
+                added += len(messages)
+
+        if added > 0:
+            log.info("Indexed %d message(s) with %s", added, self.model)
+        return added
+
+    async def search(
+        self,
+        http: HTTPClient,
+        address: str,
+        query: str,
+        *,
+        k: int = 10,
+    ) -> list[SearchResult]:
+        """Return up to ``k`` stored messages most similar to the query."""
+        (embedding,) = await http.embed(
+            address=address,
+            model=self.model,
+            inputs=[query],
+            priority=Priority.INTERACTIVE,
+        )
+        matches = await asyncio.to_thread(self.vectors.search, embedding, k=k)
+        return await asyncio.to_thread(self._get_results, matches)
+
+    def _get_results(self, matches: list[tuple[int, float]]) -> list[SearchResult]:
+        results = []
+        for id, score in matches:
+            message = self.history.get_message(id)
+            if message is not None:
+                results.append(SearchResult(message, score))
+        return results
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from tkinter import Toplevel
+from tkinter.ttk import Label, Treeview
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .app import TkApp
+    from .pool import ServerState
+
+REFRESH_INTERVAL = 1000
+
+
+def format_server_row(server: ServerState) -> tuple[str, ...]:
+    if server.last_checked is None and server.requests == 0 and server.errors == 0:
+        status = "Unknown"
+    else:
+        status = "Healthy" if server.healthy else "Unreachable"
+
+    latency = ""
+    if server.latency is not None:
+        latency = f"{server.latency * 1000:.0f}ms"
+
+    return (
+        server.address,
+        status,
+        str(server.outstanding),
+        str(server.requests),
+        str(server.errors),
+        latency,
+        ", ".join(sorted(server.loaded)),
+        server.last_error,
+    )
+
+
+class TkServersWindow(Toplevel):
+    """Shows the health, load and latency of each server."""
+
+    def __init__(self, app: TkApp) -> None:
+        super().__init__(app)
+
+        self.app = app
+        self._refresh_id: str | None = None
+
+        self.title("Servers")
+        self.geometry("720x240")
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        self.hint = Label(
+            self,
+            text="Separate addresses with commas to balance chats across servers.",
+        )
+        self.hint.grid(row=0, column=0, sticky="w", padx=10, pady=(10, 0))
+
+        columns = {
+            "address": ("Address", 160),
+            "status": ("Status", 80),
+            "outstanding": ("Active", 50),
+            "requests": ("Requests", 60),
+            "errors": ("Errors", 50),
+            "latency": ("Latency", 60),
+            "loaded": ("Loaded Models", 120),
+            "error": ("Last Error", 120),
+        }
+        self.tree = Treeview(self, columns=list(columns), show="headings")
+        for name, (heading, width) in columns.items():
+            self.tree.heading(name, text=heading)
+            self.tree.column(name, width=width, stretch=name in ("loaded", "error"))
+        self.tree.grid(row=1, column=0, sticky="nesw", padx=10, pady=10)
+
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Update each server's row, repeating until the window is closed."""
+        # Stats are updated by the event loop, but reading them here
+        # is good enough for display
+        for server in list(self.app.http.pool.servers.values()):
+            values = format_server_row(server)
+            if self.tree.exists(server.address):
+                self.tree.item(server.address, values=values)
+            else:
+                self.tree.insert("", "end", iid=server.address, values=values)
+
+        self._refresh_id = self.after(REFRESH_INTERVAL, self.refresh)
+
+    def destroy(self) -> None:
+        if self._refresh_id is not None:
+            self.after_cancel(self._refresh_id)
+            self._refresh_id = None
+        super().destroy()
@@ -1,12 +1,17 @@
 from dataclasses import dataclass
-from tkinter import Misc, StringVar
-from tkinter.ttk import Combobox, Entry, Frame
+from tkinter import BooleanVar, Misc, StringVar
+from tkinter.ttk import Checkbutton, Combobox, Entry, Frame
 
 
 @dataclass
 class Settings:
     ollama_address: str = "http://localhost:11434"
     ollama_model: str = "llama3.1"
+    embedding_model: str = "nomic-embed-text"
+    tools_enabled: bool = False
+    compaction_enabled: bool = False
+    summary_model: str = ""
+    """The model for summarizing older messages, or the chat model if empty."""
 
 
 class TkSettingsControls(Frame):
@@ -25,28 +30,75 @@ class TkSettingsControls(Frame):
         self.model = Combobox(self, textvariable=self.model_var)
         self.model.grid(row=0, column=1)
 
+        # Not every model supports tools, so they're opt-in
+        self.tools_var = BooleanVar(self)
+        self.tools = Checkbutton(self, text="Tools", variable=self.tools_var)
+        self.tools.grid(row=0, column=2, padx=(10, 0))
+
+        self.compaction_var = BooleanVar(self)
+        self.compaction = Checkbutton(
+            self,
+            text="Compact",
+            variable=self.compaction_var,
+        )
+        self.compaction.grid(row=0, column=3, padx=(10, 0))
+
+        # Summaries can come from a smaller model than the chat's
+        self.summary_model_var = StringVar(self)
+        self.summary_model = Combobox(
+            self,
+            textvariable=self.summary_model_var,
+            width=16,
+        )
+        self.summary_model.grid(row=0, column=4, padx=(5, 0))
+
         self.refresh()
 
         self.address_var.trace_add("write", self._on_address_var_write)
         self.model_var.trace_add("write", self._on_model_var_write)
+        self.tools_var.trace_add("write", self._on_tools_var_write)
+        self.compaction_var.trace_add("write", self._on_compaction_var_write)
+        self.summary_model_var.trace_add("write", self._on_summary_model_var_write)
 
     def refresh(self) -> None:
         self.address_var.set(self.settings.ollama_address)
         self.model_var.set(self.settings.ollama_model)
+        self.tools_var.set(self.settings.tools_enabled)
+        self.compaction_var.set(self.settings.compaction_enabled)
+        self.summary_model_var.set(self.settings.summary_model)
+        self._refresh_summary_model()
 
     def set_model_options(self, options: list[str]) -> None:
         self.model.configure(values=options)
+        # An empty choice goes back to summarizing with the chat model
+        self.summary_model.configure(values=["", *options])
 
     def disable(self) -> None:
         self.address.state(["disabled"])
         self.model.state(["disabled"])
+        self.tools.state(["disabled"])
 
     def enable(self) -> None:
         self.address.state(["!disabled"])
         self.model.state(["!disabled"])
+        self.tools.state(["!disabled"])
 
     def _on_address_var_write(self, name1: str, name2: str, op: str) -> None:
         self.settings.ollama_address = self.address_var.get()
 
     def _on_model_var_write(self, name1: str, name2: str, op: str) -> None:
         self.settings.ollama_model = self.model_var.get()
+
+    def _on_tools_var_write(self, name1: str, name2: str, op: str) -> None:
+        self.settings.tools_enabled = self.tools_var.get()
+
+    def _on_compaction_var_write(self, name1: str, name2: str, op: str) -> None:
+        self.settings.compaction_enabled = self.compaction_var.get()
+        self._refresh_summary_model()
+
+    def _on_summary_model_var_write(self, name1: str, name2: str, op: str) -> None:
+        self.settings.summary_model = self.summary_model_var.get().strip()
+
+    def _refresh_summary_model(self) -> None:
+        state = "!disabled" if self.settings.compaction_enabled else "disabled"
+        self.summary_model.state([state])
@@ -0,0 +1,135 @@
+"""Measure how long the application takes to start.
+
+This module must remain cheap to import as it is loaded before
+anything else during startup.
+"""
+
+import importlib.abc
+import importlib.machinery
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Any, Iterator, Sequence
+
+log = logging.getLogger(__name__)
+
+# The time it should take to import ollamatk.__main__ from a cold start.
+# Heavier modules like tkinter and httpx should only be imported once main()
+# is running, so this budget covers little more than the interpreter's
+# own standard library imports.
+IMPORT_TARGET = 0.1
+
+
+class _TimedLoader(importlib.abc.Loader):
+    def __init__(self, loader: importlib.abc.Loader, timer: "ImportTimer") -> None:
+        self.loader = loader
+        self.timer = timer
+
+    def create_module(self, spec: importlib.machinery.ModuleSpec) -> ModuleType | None:
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module: ModuleType) -> None:
+        start = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.timer.timings[module.__name__] = time.perf_counter() - start
+            # Restore the original loader so resource readers keep working
+            if module.__spec__ is not None:
+                module.__spec__.loader = self.loader
+            module.__loader__ = self.loader
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.loader, name)
+
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    """Records the cumulative time spent executing each imported module.
+
+    Times are cumulative, meaning a module's time includes the time
+    spent importing its own dependencies for the first time.
+
+    """
+
+    timings: dict[str, float]
+
+    def __init__(self) -> None:
+        self.timings = {}
+
+    def start(self) -> None:
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def stop(self) -> None:
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(
+        self,
+        fullname: str,
+        path: Sequence[str] | None,
+        target: ModuleType | None = None,
+    ) -> importlib.machinery.ModuleSpec | None:
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            elif spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                spec.loader = _TimedLoader(spec.loader, self)
+            return spec
+
+        return None
+
+
+class StartupProfiler:
+    """Records the duration of each startup phase along with import times.
+
+    If disabled, phases are still timed but imports are not,
+    and no report is logged.
+
+    """
+
+    phases: dict[str, float]
+
+    def __init__(self, *, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.phases = {}
+        self.imports = ImportTimer()
+        self.start = time.perf_counter()
+
+        if enabled:
+            self.imports.start()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def report(self, *, top: int = 10) -> str:
+        lines = [f"Startup finished in {self.elapsed() * 1000:.1f} ms", "Phases:"]
+        for name, duration in self.phases.items():
+            lines.append(f"  {name:<24} {duration * 1000:8.1f} ms")
+
+        if self.imports.timings:
+            lines.append("Slowest imports (cumulative):")
+            timings = sorted(self.imports.timings.items(), key=lambda t: -t[1])
+            for name, duration in timings[:top]:
+                lines.append(f"  {name:<24} {duration * 1000:8.1f} ms")
+
+        return "\n".join(lines)
+
+    def finish(self) -> None:
+        self.imports.stop()
+        if self.enabled:
+            log.info("%s", self.report())
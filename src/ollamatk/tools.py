@@ -0,0 +1,349 @@
+"""Let models call Python functions while responding.
+
+Tools are registered with a JSON schema describing their parameters,
+which is inferred from type annotations when not given explicitly.
+When a response asks for tools to be called, every call is run at once
+in an executor, each with its own timeout, and the results are sent back
+to the model as ``tool`` messages until it responds without calling any.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import inspect
+import json
+import logging
+import threading
+import time
+import typing
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Iterator, TypeVar, overload
+
+if TYPE_CHECKING:
+    from .http import DoneStreamingChat, HTTPClient, StreamingChat, ToolCall
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_TOOL_TIMEOUT = 10
+MAX_TOOL_ROUNDS = 5
+
+JSON_TYPES: dict[Any, str] = {
+    str: "string",
+    int: "integer",
+    float: "number",
+    bool: "boolean",
+    list: "array",
+    dict: "object",
+}
+
+
+def infer_parameters(function: Callable[..., Any]) -> dict[str, Any]:
+    """Describe a function's parameters as a JSON schema object."""
+    hints = typing.get_type_hints(function)
+    properties: dict[str, Any] = {}
+    required = []
+    for name, param in inspect.signature(function).parameters.items():
+        if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+            continue
+
+        hint = hints.get(name, str)
+        json_type = JSON_TYPES.get(typing.get_origin(hint) or hint)
+        properties[name] = {"type": json_type} if json_type else {}
+        if param.default is param.empty:
+            required.append(name)
+
+    return {"type": "object", "properties": properties, "required": required}
+
+
+@dataclass(frozen=True)
+class Tool:
+    name: str
+    description: str
+    parameters: dict[str, Any]
+    """A JSON schema object describing the function's keyword arguments."""
+    function: Callable[..., Any]
+    timeout: float = DEFAULT_TOOL_TIMEOUT
+
+    def schema(self) -> dict[str, Any]:
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description,
+                "parameters": self.parameters,
+            },
+        }
+
+
+@dataclass(frozen=True)
+class ToolResult:
+    name: str
+    content: str
+    latency: float
+    """How long the tool took to return, in seconds."""
+    error: bool = False
+
+    def dump(self) -> dict[str, Any]:
+        return {"role": "tool", "content": self.content, "tool_name": self.name}
+
+
+class ToolRegistry:
+    """Declares the functions a model may call.
+
+    Functions can be registered directly or with a decorator::
+
+        tools = ToolRegistry()
+
+        @tools.register(timeout=5)
+        def get_weather(city: str) -> str:
+            \"\"\"Get the current weather in a city.\"\"\"
+
+    """
+
+    tools: dict[str, Tool]
+
+    def __init__(self) -> None:
+        self.tools = {}
+
+    def __iter__(self) -> Iterator[Tool]:
+        return iter(list(self.tools.values()))
+
+    def __len__(self) -> int:
+        return len(self.tools)
+
+    @overload
+    def register(
+        self,
+        function: Callable[..., Any],
+        *,
+        name: str | None = None,
+        description: str | None = None,
+        parameters: dict[str, Any] | None = None,
+        timeout: float = DEFAULT_TOOL_TIMEOUT,
+    ) -> Callable[..., Any]: ...
+
+    @overload
+    def register(
+        self,
+        function: None = None,
+        *,
+        name: str | None = None,
+        description: str | None = None,
+        parameters: dict[str, Any] | None = None,
+        timeout: float = DEFAULT_TOOL_TIMEOUT,
+    ) -> Callable[[Callable[..., Any]], Callable[..., Any]]: ...
+
+    def register(
+        self,
+        function: Callable[..., Any] | None = None,
+        *,
+        name: str | None = None,
+        description: str | None = None,
+        parameters: dict[str, Any] | None = None,
+        timeout: float = DEFAULT_TOOL_TIMEOUT,
+    ) -> Any:
+        """Register a function as a tool, returning the function unchanged.
+
+        :param name: The tool's name, defaulting to the function's name.
+        :param description:
+            What the tool does, defaulting to the function's docstring.
+        :param parameters:
+            A JSON schema object for the function's arguments,
+            defaulting to one inferred from its type annotations.
+        :param timeout: How long to wait for the function to return.
+
+        """
+        if function is None:
+            return partial(
+                self.register,
+                name=name,
+                description=description,
+                parameters=parameters,
+                timeout=timeout,
+            )
+
+        tool = Tool(
+            name=name or function.__name__,
+            description=description or inspect.getdoc(function) or "",
+            parameters=parameters or infer_parameters(function),
+            function=function,
+            timeout=timeout,
+        )
+        self.tools[tool.name] = tool
+        return function
+
+    def schemas(self) -> list[dict[str, Any]]:
+        return [tool.schema() for tool in self.tools.values()]
+
+    async def run(
+        self,
+        calls: list[ToolCall],
+        executor: Executor | None = None,
+    ) -> list[ToolResult]:
+        """Run each tool call concurrently, returning their results in order."""
+        return list(await asyncio.gather(*(self.call(c, executor) for c in calls)))
+
+    async def call(
+        self,
+        call: ToolCall,
+        executor: Executor | None = None,
+    ) -> ToolResult:
+        """Run a single tool call in the given executor.
+
+        Errors and timeouts are returned as results so the model can see
+        what went wrong. A timed out function can't be interrupted,
+        so it keeps running in the executor until it returns, which is
+        why :class:`ToolExecutor` gives every call its own thread.
+
+        """
+        name = call["function"]["name"]
+        arguments = call["function"].get("arguments") or {}
+        start = time.perf_counter()
+
+        tool = self.tools.get(name)
+        if tool is None:
+            return ToolResult(name, f"Error: there is no tool named {name!r}", 0, True)
+
+        loop = asyncio.get_running_loop()
+        try:
+            # Some models encode the arguments as a string
+            if isinstance(arguments, str):
+                arguments = json.loads(arguments)
+
+            async with asyncio.timeout(tool.timeout):
+                function = partial(tool.function, **arguments)
+                result = await loop.run_in_executor(executor, function)
+        except TimeoutError:
+            content = f"Error: {name} did not finish within {tool.timeout}s"
+            error = True
+        except Exception as e:
+            log.exception("Error occurred while running tool %s", name)
+            content = f"Error: {e}"
+            error = True
+        else:
+            if isinstance(result, str):
+                content = result
+            else:
+                content = json.dumps(result, default=str)
+            error = False
+
+        latency = time.perf_counter() - start
+        log.info("Ran tool %s in %.1fms", name, latency * 1000)
+        return ToolResult(name, content, latency, error)
+
+
+class ToolExecutor(Executor):
+    """Runs each tool call in its own daemon thread.
+
+    Unlike a thread pool, a call that never returns doesn't take up a worker
+    shared with other work, and doesn't keep the process alive at exit,
+    since :class:`~concurrent.futures.ThreadPoolExecutor` joins its threads
+    even after ``shutdown(wait=False)``.
+
+    """
+
+    def __init__(self, *, name: str = "ollamatk-tool") -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def submit(self, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> Future[T]:
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Cannot run tools after shutdown")
+
+            fut: Future[T] = Future()
+            thread = threading.Thread(
+                target=self._run,
+                args=(fut, partial(fn, *args, **kwargs)),
+                name=self.name,
+                daemon=True,
+            )
+            thread.start()
+            return fut
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        # Calls that are still running are abandoned rather than waited on
+        with self._lock:
+            self._shutdown = True
+
+    @staticmethod
+    def _run(fut: Future[T], call: Callable[[], T]) -> None:
+        if not fut.set_running_or_notify_cancel():
+            return
+
+        try:
+            result = call()
+        except BaseException as e:
+            fut.set_exception(e)
+        else:
+            fut.set_result(result)
+
+
+def get_current_time() -> str:
+    """Get the current local date and time in ISO 8601 format."""
+    return datetime.datetime.now().astimezone().isoformat(timespec="seconds")
+
+
+def create_default_tools() -> ToolRegistry:
+    tools = ToolRegistry()
+    tools.register(get_current_time)
+    return tools
+
+
+async def generate_with_tools(
+    http: HTTPClient,
+    tools: ToolRegistry,
+    *,
+    address: str,
+    model: str,
+    messages: list[dict[str, Any]],
+    stream_callback: Callable[[StreamingChat], Any],
+    connect_callback: Callable[[], Any] = lambda: True,
+    results_callback: Callable[[list[ToolResult]], Any] = lambda results: None,
+    executor: Executor | None = None,
+    max_rounds: int = MAX_TOOL_ROUNDS,
+) -> DoneStreamingChat | None:
+    """Generate a chat completion, running any tools the model calls
+    and sending their results back until it gives a final response.
+
+    The results of each round of calls are passed to ``results_callback``,
+    after which a new response is streamed. Once ``max_rounds`` is reached,
+    the model has to respond without calling any more tools.
+
+    """
+    for i in range(max_rounds + 1):
+        content: list[str] = []
+        calls: list[ToolCall] = []
+
+        def on_chunk(data: StreamingChat) -> None:
+            content.append(data["message"]["content"])
+            calls.extend(data["message"].get("tool_calls") or ())
+            stream_callback(data)
+
+        done = await http.generate_chat_completion(
+            address=address,
+            model=model,
+            messages=messages,
+            stream_callback=on_chunk,
+            connect_callback=connect_callback,
+            tools=tools.schemas() if i < max_rounds and len(tools) else None,
+        )
+        if not calls or i == max_rounds:
+            return done
+
+        results = await tools.run(calls, executor)
+        call_message = {
+            "role": "assistant",
+            "content": "".join(content),
+            "tool_calls": calls,
+        }
+        messages = [*messages, call_message, *(r.dump() for r in results)]
+        results_callback(results)
+
+    raise AssertionError("unreachable")
@@ -0,0 +1,158 @@
+"""Store a conversation as a tree of messages.
+
+Editing or regenerating a message adds a sibling branch instead of
+replacing it, so every branch shares the messages before its fork point.
+Messages are never copied or modified when branching, meaning memory
+scales with the number of distinct messages rather than the number
+of branches times their length.
+"""
+
+from __future__ import annotations
+
+from typing import Generic, Iterator, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+class _Branches(Generic[T]):
+    children: list[MessageNode[T]]
+    selected: MessageNode[T] | None
+    """The child that continues the selected path."""
+
+    def __init__(self) -> None:
+        self.children = []
+        self.selected = None
+
+    def descendants(self) -> Iterator[MessageNode[T]]:
+        """Yield every node below this one on any branch, depth first."""
+        pending = list(reversed(self.children))
+        while pending:
+            node = pending.pop()
+            yield node
+            pending.extend(reversed(node.children))
+
+
+class MessageNode(_Branches[T]):
+    def __init__(self, message: T, parent: _Branches[T]) -> None:
+        super().__init__()
+        self.message = message
+        self.parent = parent
+
+    def __repr__(self) -> str:
+        return f"MessageNode({self.message!r})"
+
+    @property
+    def siblings(self) -> list[MessageNode[T]]:
+        """Every branch at this node's position, including itself."""
+        return self.parent.children
+
+    def ancestors(self) -> list[MessageNode[T]]:
+        """Return the nodes before this one, from the first message."""
+        ancestors = []
+        parent = self.parent
+        while isinstance(parent, MessageNode):
+            ancestors.append(parent)
+            parent = parent.parent
+        ancestors.reverse()
+        return ancestors
+
+
+class ConversationTree(_Branches[T]):
+    """A tree of messages where one path from the root is selected.
+
+    Each node remembers which of its children was last selected,
+    so switching back to a branch restores the rest of its path.
+
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[MessageNode[T]]:
+        """Yield every node in the tree, depth first."""
+        return self.descendants()
+
+    def path(self) -> list[MessageNode[T]]:
+        """Return the selected path, from the first message to the last."""
+        path = []
+        node = self.selected
+        while node is not None:
+            path.append(node)
+            node = node.selected
+        return path
+
+    def append(self, message: T) -> MessageNode[T]:
+        """Add a message to the end of the selected path."""
+        parent: _Branches[T] = self
+        while parent.selected is not None:
+            parent = parent.selected
+        return self._add(message, parent)
+
+    def add(self, message: T, parent: MessageNode[T] | None = None) -> MessageNode[T]:
+        """Add a reply to the given node, or a first message if there is
+        no parent, and select it.
+        """
+        return self._add(message, parent if parent is not None else self)
+
+    def branch(self, node: MessageNode[T], message: T) -> MessageNode[T]:
+        """Add a message as an alternative to the given node and select it."""
+        new = self._add(message, node.parent)
+        self.select(new)
+        return new
+
+    def select(self, node: MessageNode[T]) -> None:
+        """Select the path through the given node."""
+        current: _Branches[T] = node
+        while isinstance(current, MessageNode):
+            current.parent.selected = current
+            current = current.parent
+
+    def switch(self, node: MessageNode[T], offset: int) -> MessageNode[T]:
+        """Select the sibling at the given offset from a node, wrapping around."""
+        siblings = node.siblings
+        sibling = siblings[(siblings.index(node) + offset) % len(siblings)]
+        self.select(sibling)
+        return sibling
+
+    def remove(self, node: MessageNode[T]) -> None:
+        """Remove a single message, moving its replies up in its place."""
+        parent = node.parent
+        index = parent.children.index(node)
+        parent.children[index : index + 1] = node.children
+        for child in node.children:
+            child.parent = parent
+
+        if parent.selected is node:
+            parent.selected = node.selected
+            if parent.selected is None and parent.children:
+                parent.selected = parent.children[min(index, len(parent.children) - 1)]
+
+        node.children = []
+        node.selected = None
+        self._size -= 1
+
+    def clear(self) -> None:
+        self.children = []
+        self.selected = None
+        self._size = 0
+
+    def _add(self, message: T, parent: _Branches[T]) -> MessageNode[T]:
+        node = MessageNode(message, parent)
+        parent.children.append(node)
+        parent.selected = node
+        self._size += 1
+        return node
+
+
+def common_prefix_length(a: Sequence[object], b: Sequence[object]) -> int:
+    """Return how many leading items two sequences share by identity."""
+    length = 0
+    for x, y in zip(a, b):
+        if x is not y:
+            break
+        length += 1
+    return length
@@ -0,0 +1,228 @@
+"""A compact index of normalized float32 vectors backed by NumPy.
+
+NumPy is an optional dependency, installed with the ``search`` extra.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Sequence
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class VectorIndex:
+    """Stores vectors with integer IDs for cosine similarity search.
+
+    Vectors are normalized when added, so searching only requires a single
+    matrix-vector product. If a directory is given, vectors and IDs are
+    appended to raw files inside it and memory-mapped when loaded,
+    avoiding the need to read the whole index into memory.
+
+    Indexes are tied to the model that produced their vectors. If the index
+    is loaded with a different model, its existing vectors are discarded.
+
+    """
+
+    def __init__(self, directory: Path | str | None = None, *, model: str) -> None:
+        import numpy as np
+
+        self.directory = Path(directory) if directory is not None else None
+        self.model = model
+        self.dimensions = 0
+        self.ids = np.empty(0, dtype=np.int64)
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+        self._lock = threading.Lock()
+
+        if self.directory is not None:
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def max_id(self) -> int:
+        return int(self.ids.max()) if len(self.ids) > 0 else 0
+
+    def add(self, ids: Sequence[int], vectors: Sequence[Sequence[float]]) -> None:
+        import numpy as np
+
+        if len(ids) == 0:
+            return
+
+        new_ids = np.asarray(ids, dtype=np.int64)
+        new_vectors = normalize(np.asarray(vectors, dtype=np.float32))
+
+        with self._lock:
+            if self.dimensions == 0:
+                self.dimensions = new_vectors.shape[1]
+                self.vectors = np.empty((0, self.dimensions), dtype=np.float32)
+            elif new_vectors.shape[1] != self.dimensions:
+                raise ValueError(
+                    f"Expected vectors with {self.dimensions} dimensions, "
+                    f"got {new_vectors.shape[1]}"
+                )
+
+            if self.directory is not None:
+                self._append_files(new_ids, new_vectors)
+                self._load_files()
+            else:
+                self.ids = np.concatenate((self.ids, new_ids))
+                self.vectors = np.concatenate((self.vectors, new_vectors))
+
+    def remove(self, ids: Sequence[int]) -> None:
+        import numpy as np
+
+        with self._lock:
+            keep = ~np.isin(self.ids, np.asarray(ids, dtype=np.int64))
+            if keep.all():
+                return
+
+            kept_ids, kept_vectors = self.ids[keep], self.vectors[keep]
+            if self.directory is not None:
+                # Removal is rare enough that rewriting the files is acceptable
+                self._replace_files(kept_ids, kept_vectors)
+                self._load_files()
+            else:
+                self.ids, self.vectors = kept_ids, kept_vectors
+
+    def search(
+        self,
+        query: Sequence[float],
+        *,
+        k: int = 10,
+    ) -> list[tuple[int, float]]:
+        """Return up to ``k`` ``(id, score)`` pairs most similar to the query."""
+        import numpy as np
+
+        with self._lock:
+            ids, vectors = self.ids, self.vectors
+
+        if len(ids) == 0:
+            return []
+
+        query_vector = normalize(np.asarray(query, dtype=np.float32))
+        scores = vectors @ query_vector
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+    def clear(self) -> None:
+        import numpy as np
+
+        with self._lock:
+            self.dimensions = 0
+            self.ids = np.empty(0, dtype=np.int64)
+            self.vectors = np.empty((0, 0), dtype=np.float32)
+            if self.directory is not None:
+                for path in self._paths():
+                    path.unlink(missing_ok=True)
+
+    def _paths(self) -> tuple[Path, Path, Path]:
+        assert self.directory is not None
+        return (
+            self.directory / "index.json",
+            self.directory / "ids.i64",
+            self.directory / "vectors.f32",
+        )
+
+    def _load(self) -> None:
+        meta_path, _, _ = self._paths()
+        try:
+            meta = json.loads(meta_path.read_text("utf-8"))
+        except FileNotFoundError:
+            return
+
+        if meta.get("model") != self.model:
+            return self.clear()
+
+        self.dimensions = meta["dimensions"]
+        self._load_files()
+        self._truncate_files()
+
+    def _load_files(self) -> None:
+        import numpy as np
+
+        _, ids_path, vectors_path = self._paths()
+        ids = _memmap(ids_path, np.int64)
+        vectors = _memmap(vectors_path, np.float32)
+
+        count = min(len(ids), len(vectors) // max(self.dimensions, 1))
+        self.ids = ids[:count]
+        self.vectors = vectors[: count * self.dimensions].reshape(
+            count, self.dimensions
+        )
+
+    def _truncate_files(self) -> None:
+        """Drop anything left after the last complete pair of ID and vector.
+
+        Appends go to the end of both files, so anything left unpaired by
+        an interrupted write would pair every later ID with the wrong vector.
+
+        """
+        import numpy as np
+
+        _, ids_path, vectors_path = self._paths()
+        ids_size = self.ids.nbytes
+        vectors_size = self.vectors.nbytes
+        if (
+            _file_size(ids_path) == ids_size
+            and _file_size(vectors_path) == vectors_size
+        ):
+            return
+
+        self._replace_files(np.array(self.ids), np.array(self.vectors))
+        self._load_files()
+
+    def _append_files(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        meta_path, ids_path, vectors_path = self._paths()
+        assert self.directory is not None
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        meta = {"model": self.model, "dimensions": self.dimensions}
+        meta_path.write_text(json.dumps(meta), "utf-8")
+
+        # Write vectors first so an interrupted write usually leaves behind
+        # extra vectors rather than IDs without vectors. Either way, the files
+        # are truncated to their complete pairs when the index is next loaded
+        with vectors_path.open("ab") as f:
+            f.write(vectors.tobytes())
+        with ids_path.open("ab") as f:
+            f.write(ids.tobytes())
+
+    def _replace_files(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        # Truncating a file that is still memory-mapped by a concurrent
+        # search would crash it, so new files are swapped in instead
+        _, ids_path, vectors_path = self._paths()
+        for path, array in ((vectors_path, vectors), (ids_path, ids)):
+            tmp_path = path.with_suffix(path.suffix + ".tmp")
+            tmp_path.write_bytes(array.tobytes())
+            os.replace(tmp_path, path)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    import numpy as np
+
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, np.finfo(np.float32).tiny)
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def _memmap(path: Path, dtype) -> np.ndarray:
+    import numpy as np
+
+    if not path.exists() or path.stat().st_size == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r")
@@ -1,11 +1,251 @@
-from typing import Iterator
+import asyncio
+import json
+from typing import Any, Callable, Iterator, Mapping, Sequence
 
 import pytest
 
 from ollamatk.event_thread import EventThread
 
+BENCHMARK_RESULTS = pytest.StashKey[list[str]]()
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption(
+        "--benchmark",
+        action="store_true",
+        help="run benchmarks and report their measurements",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.addinivalue_line("markers", "benchmark: only run with --benchmark")
+    config.stash[BENCHMARK_RESULTS] = []
+
+
+def pytest_collection_modifyitems(
+    config: pytest.Config,
+    items: list[pytest.Item],
+) -> None:
+    if config.getoption("--benchmark"):
+        return
+
+    skip = pytest.mark.skip(reason="benchmarks only run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+def pytest_terminal_summary(
+    terminalreporter: pytest.TerminalReporter,
+    config: pytest.Config,
+) -> None:
+    results = config.stash[BENCHMARK_RESULTS]
+    if results:
+        terminalreporter.section("benchmarks")
+        for line in results:
+            terminalreporter.write_line(line)
+
+
+@pytest.fixture
+def report(request: pytest.FixtureRequest) -> Callable[[str], None]:
+    """Report a benchmark's measurement at the end of the test session."""
+    results = request.config.stash[BENCHMARK_RESULTS]
+    return lambda line: results.append(f"{request.node.name}: {line}")
+
 
 @pytest.fixture
 def event_thread() -> Iterator[EventThread]:
     with EventThread() as event_thread:
         yield event_thread
+
+
+def embed_letters(text: str) -> list[float]:
+    """Embed text as the frequency of each letter, for predictable similarity."""
+    text = text.lower()
+    return [float(text.count(c)) for c in "abcdefghijklmnopqrstuvwxyz"]
+
+
+class StandInServer:
+    """A minimal Ollama-like HTTP/1.1 server for testing connection handling."""
+
+    connections: int
+    requests: list[str]
+    aborted_streams: int
+    loaded_models: list[str]
+
+    def __init__(
+        self,
+        *,
+        tokens: Sequence[str] = ("Hello", " world!"),
+        token_delay: float = 0,
+        models: Sequence[str] = ("test",),
+        tool_calls: Sequence[Mapping[str, Any]] = (),
+    ) -> None:
+        self.tokens = list(tokens)
+        self.token_delay = token_delay
+        self.models = list(models)
+        self.tool_calls = list(tool_calls)
+        self.last_chat: dict[str, Any] = {}
+        self.loaded_models = []
+        self.connections = 0
+        self.requests = []
+        self.aborted_streams = 0
+        self.port = 0
+
+    @property
+    def address(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def start(self) -> asyncio.Server:
+        server = await asyncio.start_server(self._handle_connection, "127.0.0.1", 0)
+        self.port = server.sockets[0].getsockname()[1]
+        return server
+
+    async def _handle_connection(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        self.connections += 1
+        try:
+            while await self._handle_request(reader, writer):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> bool:
+        request_line = await reader.readline()
+        if not request_line:
+            return False
+
+        method, path, _ = request_line.decode().split(" ", 2)
+        self.requests.append(path)
+
+        content_length = 0
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode().partition(":")
+            if name.lower() == "content-length":
+                content_length = int(value)
+        payload = await reader.readexactly(content_length)
+
+        if path == "/api/tags":
+            models = [{"name": name} for name in self.models]
+            body = json.dumps({"models": models}).encode()
+        elif path == "/api/ps":
+            models = [
+                {
+                    "name": name,
+                    "model": name,
+                    "size": 4 << 30,
+                    "size_vram": 3 << 30,
+                    "expires_at": "2024-09-12T12:00:00Z",
+                }
+                for name in self.loaded_models
+            ]
+            body = json.dumps({"models": models}).encode()
+        elif path == "/api/chat" and json.loads(payload)["model"] not in self.models:
+            body = b""  # Like Ollama, respond with 404 for unknown models
+        elif path == "/api/chat":
+            self.last_chat = chat = json.loads(payload)
+            lines = []
+            if (
+                self.tool_calls
+                and chat.get("tools")
+                and chat["messages"][-1]["role"] != "tool"
+            ):
+                # Call tools until their results are sent back
+                message = {
+                    "role": "assistant",
+                    "content": "",
+                    "tool_calls": self.tool_calls,
+                }
+                lines.append({"model": "test", "message": message, "done": False})
+            else:
+                for token in self.tokens:
+                    message = {"role": "assistant", "content": token}
+                    lines.append({"model": "test", "message": message, "done": False})
+            lines.append(
+                {
+                    "model": "test",
+                    "done": True,
+                    "total_duration": 2000,
+                    "load_duration": 0,
+                    "prompt_eval_count": 1,
+                    "prompt_eval_duration": 1000,
+                    "eval_count": len(self.tokens),
+                    "eval_duration": 1000,
+                }
+            )
+            body = "\n".join(json.dumps(line) for line in lines).encode()
+            if self.token_delay > 0:
+                return await self._stream_lines(writer, body)
+        elif path == "/api/pull":
+            model = json.loads(payload)["model"]
+            lines: list[dict[str, Any]] = [{"status": "pulling manifest"}]
+            for completed in range(0, 101, 10):
+                lines.append(
+                    {
+                        "status": "pulling layer",
+                        "digest": "sha256:layer",
+                        "total": 100,
+                        "completed": completed,
+                    }
+                )
+            lines.append({"status": "success"})
+            self.models.append(model)
+            body = "\n".join(json.dumps(line) for line in lines).encode()
+            if self.token_delay > 0:
+                return await self._stream_lines(writer, body)
+        elif path == "/api/delete":
+            model = json.loads(payload)["model"]
+            body = b"{}" if model in self.models else b""
+            if model in self.models:
+                self.models.remove(model)
+        elif path == "/api/embed":
+            inputs = json.loads(payload)["input"]
+            embeddings = [embed_letters(text) for text in inputs]
+            body = json.dumps({"model": "test", "embeddings": embeddings}).encode()
+        else:
+            body = b""
+
+        status = "200 OK" if body else "404 Not Found"
+        writer.write(
+            f"HTTP/1.1 {status}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"\r\n".encode() + body
+        )
+        await writer.drain()
+        return True
+
+    async def _stream_lines(self, writer: asyncio.StreamWriter, body: bytes) -> bool:
+        # Like Ollama, stop generating once the client disconnects
+        writer.write(
+            f"HTTP/1.1 200 OK\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Content-Type: application/x-ndjson\r\n"
+            f"\r\n".encode()
+        )
+        try:
+            for line in body.splitlines(keepends=True):
+                writer.write(line)
+                await writer.drain()
+                await asyncio.sleep(self.token_delay)
+        except ConnectionError:
+            self.aborted_streams += 1
+            raise
+        return True
+
+
+@pytest.fixture
+def server(event_thread: EventThread) -> Iterator[StandInServer]:
+    server = StandInServer()
+    asyncio_server = event_thread.submit(server.start()).result(timeout=1)
+    yield server
+    event_thread.loop.call_soon_threadsafe(asyncio_server.close)
@@ -0,0 +1,91 @@
+import io
+import json
+import subprocess
+import sys
+from typing import TYPE_CHECKING
+
+import pytest
+
+from ollamatk.batch import read_prompts, run_batch
+from ollamatk.event_thread import EventThread
+from ollamatk.http import HTTPClient
+
+if TYPE_CHECKING:
+    from .conftest import StandInServer
+
+
+def test_read_prompts() -> None:
+    file = io.StringIO('{"prompt": "a"}\n\n{"id": "b", "messages": []}\n')
+    assert list(read_prompts(file)) == [
+        {"id": 0, "prompt": "a"},
+        {"id": "b", "messages": []},
+    ]
+
+    file = io.StringIO("a\nb\n")
+    assert list(read_prompts(file, format="text")) == [
+        {"id": 0, "prompt": "a"},
+        {"id": 1, "prompt": "b"},
+    ]
+
+    with pytest.raises(ValueError):
+        list(read_prompts(io.StringIO("[]")))
+
+
+def test_run_batch(event_thread: EventThread, server: "StandInServer") -> None:
+    prompts = [{"id": i, "prompt": str(i)} for i in range(20)]
+    output = io.StringIO()
+
+    with HTTPClient().install(event_thread) as http:
+        coro = run_batch(
+            http,
+            iter(prompts),
+            address=server.address,
+            model="test",
+            concurrency=3,
+            output=output,
+        )
+        summary = event_thread.submit(coro).result(timeout=5)
+
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert sorted(result["id"] for result in results) == list(range(20))
+    assert all(result["content"] == "".join(server.tokens) for result in results)
+    assert all(result["metrics"]["eval_count"] == 2 for result in results)
+    assert all(result["error"] is None for result in results)
+
+    assert summary.requests == 20
+    assert summary.failures == 0
+    assert summary.eval_tokens == 40
+    assert server.connections <= 3
+
+
+def test_run_batch_errors(event_thread: EventThread) -> None:
+    output = io.StringIO()
+
+    with HTTPClient().install(event_thread) as http:
+        coro = run_batch(
+            http,
+            iter([{"id": 0, "prompt": ""}]),
+            address="http://127.0.0.1:1",
+            model="test",
+            concurrency=1,
+            output=output,
+        )
+        summary = event_thread.submit(coro).result(timeout=5)
+
+    (result,) = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert result["error"].startswith("ConnectError")
+    assert summary.failures == 1
+
+
+def test_batch_does_not_import_tkinter() -> None:
+    code = (
+        "import sys, ollamatk.batch, ollamatk.event_thread, ollamatk.http; "
+        "print('tkinter' in sys.modules)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    assert result.stdout.strip() == "False"
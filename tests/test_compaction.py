@@ -0,0 +1,62 @@
+from ollamatk.compaction import (
+    SUMMARY_INSTRUCTIONS,
+    PromptStats,
+    find_compaction_point,
+    summarize,
+    summary_message,
+)
+from ollamatk.event_thread import EventThread
+from ollamatk.http import DoneStreamingChat, HTTPClient
+
+from .conftest import StandInServer
+
+
+def test_find_compaction_point() -> None:
+    assert find_compaction_point([]) is None
+    assert find_compaction_point([False] * 5) is None
+    assert find_compaction_point([False] * 6) == 1
+    assert find_compaction_point([False] * 10) == 5
+
+    # Only messages after the latest summary need summarizing
+    summarized = [False] * 10
+    summarized[5] = True
+    assert find_compaction_point(summarized) is None
+    assert find_compaction_point(summarized + [False] * 4) == 9
+
+
+def test_prompt_stats_from_response() -> None:
+    done: DoneStreamingChat = {
+        "model": "test",
+        "created_at": "",
+        "done": True,
+        "total_duration": 0,
+        "load_duration": 0,
+        "prompt_eval_count": 5000,
+        "prompt_eval_duration": 1_250_000_000,
+        "eval_count": 10,
+        "eval_duration": 0,
+    }
+    stats = PromptStats.from_response(done)
+    assert stats == PromptStats(tokens=5000, eval_duration=1.25)
+    assert stats.format() == "5000 prompt tokens in 1.25s"
+
+
+def test_summarize_includes_earlier_summary(
+    event_thread: EventThread,
+    server: StandInServer,
+) -> None:
+    messages = [
+        summary_message("The user's name is Alice."),
+        {"role": "user", "content": "What's my name?"},
+        {"role": "assistant", "content": "Alice."},
+    ]
+    with HTTPClient().install(event_thread) as http:
+        coro = summarize(http, address=server.address, model="test", messages=messages)
+        summary = event_thread.submit(coro).result(timeout=5)
+
+    assert summary == "Hello world!"
+    instructions, transcript = server.last_chat["messages"]
+    assert instructions == {"role": "system", "content": SUMMARY_INSTRUCTIONS}
+    assert transcript["content"].startswith("System: Summary of the conversation")
+    assert "The user's name is Alice." in transcript["content"]
+    assert transcript["content"].endswith("User: What's my name?\n\nAssistant: Alice.")
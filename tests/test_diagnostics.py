@@ -0,0 +1,133 @@
+import itertools
+import tracemalloc
+from pathlib import Path
+from tkinter import TclError
+from typing import Iterator
+
+import pytest
+
+from ollamatk.app import TkApp
+from ollamatk.chat import TkChat
+from ollamatk.diagnostics import compare_traces, format_change, measure_growth
+from ollamatk.event_thread import EventThread
+from ollamatk.history import ConversationHistory
+from ollamatk.http import HTTPClient
+from ollamatk.logging import LogStore, TkLogWindow
+from ollamatk.messages import Message
+
+from .conftest import StandInServer
+
+CONVERSATIONS = 50
+
+
+@pytest.fixture
+def app() -> Iterator[TkApp]:
+    with EventThread() as event_thread:
+        try:
+            app = TkApp(event_thread)
+        except TclError as e:
+            pytest.skip(f"Tk can't create a window: {e}")
+
+        yield app
+        # Like main(), destroying the app stops the event thread first
+        app.destroy()
+        app.mainloop()
+
+
+def test_compare_traces_finds_growing_allocations() -> None:
+    tracemalloc.start()
+    try:
+        old = tracemalloc.take_snapshot()
+        retained = [bytes(1000) for _ in range(100)]
+        new = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    diffs = compare_traces(old, new)
+    assert diffs[0].location.startswith(__file__)
+    assert diffs[0].size_diff >= 100_000
+    assert diffs[0].count_diff >= 100
+    assert len(retained) == 100
+
+
+def test_log_store_discards_oldest_messages() -> None:
+    logs = LogStore(max_messages=3)
+    for i in range(5):
+        logs.append(str(i))
+    assert list(logs) == ["2", "3", "4"]
+    assert len(logs) == 3
+
+
+def test_format_change() -> None:
+    assert format_change(5, None) == "5"
+    assert format_change(5, 5) == "5"
+    assert format_change(5, 3) == "5 (+2)"
+    assert format_change(3, 5) == "3 (-2)"
+
+
+def test_memory_is_stable_across_conversations(
+    tmp_path: Path,
+    event_thread: EventThread,
+    server: StandInServer,
+) -> None:
+    logs = LogStore(max_messages=20)
+    history = ConversationHistory(tmp_path / "history.db")
+    ids = itertools.count()
+
+    def converse() -> None:
+        tokens = []
+        coro = http.generate_chat_completion(
+            address=server.address,
+            model="test",
+            messages=[{"role": "user", "content": "Hello!"}],
+            stream_callback=lambda data: tokens.append(data["message"]["content"]),
+        )
+        event_thread.submit(coro).result(timeout=5)
+
+        # Don't count requests recorded by the stand-in server as growth
+        server.requests.clear()
+        conversation = f"conversation-{next(ids)}"
+        history.add_message(conversation, "user", "Hello!")
+        history.add_message(conversation, "assistant", "".join(tokens))
+        logs.append(f"Finished {conversation}")
+
+    with HTTPClient().install(event_thread) as http:
+        growth = measure_growth(converse, iterations=CONVERSATIONS, warmup=5)
+
+    history.close()
+    # Anything holding onto whole messages or responses would grow far faster
+    assert growth < 2048
+
+
+def test_widgets_are_released_across_conversations(app: TkApp) -> None:
+    chat = app.frame
+    assert isinstance(chat, TkChat)
+
+    def converse() -> None:
+        chat.message_list.add_message(Message("user", "Hello!"))
+        chat.message_list.add_message(Message("assistant", "Hi **there**!"))
+        window = TkLogWindow(app)
+        app.logs.append("Finished conversation")
+        app.update()
+
+        window.destroy()
+        chat.message_list.clear()
+        app.update()
+
+    for _ in range(5):
+        converse()
+    try:
+        before = app.diagnostics.take_snapshot()
+        growth = measure_growth(converse, iterations=CONVERSATIONS, warmup=0)
+        after = app.diagnostics.take_snapshot()
+    finally:
+        tracemalloc.stop()  # Started by the first snapshot
+
+    assert not after.stale_widgets
+    assert not after.stale_callbacks
+    assert after.widgets["TkMessageFrame"] == 0
+    assert after.widgets["TkLogWindow"] == 0
+    assert after.widgets == before.widgets
+    # A leaked frame or window would leave several commands behind each time
+    assert after.tcl_commands - before.tcl_commands < CONVERSATIONS
+    assert growth < 4096
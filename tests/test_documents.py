@@ -0,0 +1,75 @@
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from ollamatk.documents import DocumentIndex, iter_chunks, read_document
+from ollamatk.event_thread import EventThread
+from ollamatk.http import HTTPClient
+
+if TYPE_CHECKING:
+    from .conftest import StandInServer
+
+
+def test_chunks_overlap_and_split_on_words() -> None:
+    text = " ".join(f"word{i}" for i in range(500))
+    chunks = list(iter_chunks(text.encode(), size=200, overlap=50))
+
+    assert all(len(chunk) <= 200 for chunk in chunks)
+    assert all(not chunk.startswith(" ") for chunk in chunks)
+    assert chunks[0].split()[0] == "word0"
+    assert chunks[-1].split()[-1] == "word499"
+    # The start of each chunk should repeat the end of the last one
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.split()[1] in previous
+
+
+def test_read_document_handles_multibyte_boundaries(tmp_path: Path) -> None:
+    path = tmp_path / "doc.txt"
+    path.write_text("é" * 5000, "utf-8")
+
+    digest, chunks = read_document(path, size=1000, overlap=100)
+    assert len(digest) == 64
+    assert "".join(chunks).replace("é", "") == ""
+
+    empty = tmp_path / "empty.txt"
+    empty.touch()
+    assert read_document(empty)[1] == []
+
+
+def test_ingest_is_noop_for_unchanged_files(
+    event_thread: EventThread,
+    server: "StandInServer",
+    tmp_path: Path,
+) -> None:
+    zs = tmp_path / "zs.txt"
+    zs.write_text("zzz " * 100)
+    bs = tmp_path / "bs.txt"
+    bs.write_text("bbb " * 100)
+
+    index = DocumentIndex(model="test", batch_size=1)
+    with HTTPClient().install(event_thread) as http:
+        ingest = lambda path: event_thread.submit(
+            index.ingest(http, server.address, path)
+        ).result(timeout=5)
+
+        assert ingest(zs) is True
+        assert ingest(bs) is True
+        embeds = server.requests.count("/api/embed")
+        assert ingest(zs) is False
+        assert server.requests.count("/api/embed") == embeds
+
+        bs.write_text("bbb zzz " * 100)
+        assert ingest(bs) is True
+        assert len(index.chunks) == 2
+
+        messages = [{"role": "user", "content": "zz"}]
+        coro = index.inject_context(http, server.address, messages)
+        messages = event_thread.submit(coro).result(timeout=5)
+
+    assert [m["role"] for m in messages] == ["system", "user"]
+    assert messages[0]["content"].index("zs.txt") < messages[0]["content"].index(
+        "bs.txt"
+    )
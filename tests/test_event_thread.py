@@ -1,11 +1,24 @@
 import asyncio
 import collections
 import concurrent.futures
+import json
+import queue
+import time
 from typing import Any, Callable, Hashable, TypeVar
 
 import pytest
 
-from ollamatk.event_thread import EventThread
+from ollamatk.event_thread import (
+    EventThread,
+    ExecutorKind,
+    LoopPolicy,
+    create_executor,
+    get_loop_factory,
+)
+from ollamatk.http import HTTPClient
+from ollamatk.loop_monitor import LoopMonitor
+
+from .conftest import StandInServer
 
 T = TypeVar("T")
 
@@ -78,3 +91,228 @@ def test_event_thread_exits_after_exception() -> None:
     assert isinstance(task.events[1], asyncio.CancelledError)
     assert task_fut.cancelled()  # type: ignore  # should always be defined
     assert task.events[2] == "end"
+
+
+def block_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+def test_loop_monitor_reports_stall_with_stack() -> None:
+    monitor = LoopMonitor(interval=0.01, lag_threshold=0.05, stall_threshold=0.1)
+    with EventThread(monitor=monitor) as event_thread:
+
+        async def blocking_task() -> None:
+            block_loop(0.4)
+
+        event_thread.submit(asyncio.sleep(0.05)).result(timeout=1)
+        event_thread.submit(blocking_task()).result(timeout=2)
+        event_thread.submit(asyncio.sleep(0.05)).result(timeout=1)
+
+    stats = monitor.stats
+    assert stats.stalls == 1
+    assert "block_loop" in stats.last_stall_stack
+    assert stats.max_lag >= 0.3
+    assert stats.beats > 0
+
+
+def test_loop_monitor_reports_stats_periodically(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    monitor = LoopMonitor(interval=0.01, report_interval=0.05)
+    with caplog.at_level("INFO", logger="ollamatk.loop_monitor"):
+        with EventThread(monitor=monitor) as event_thread:
+            event_thread.submit(asyncio.sleep(0.2)).result(timeout=1)
+
+    reports = [r for r in caplog.records if r.getMessage().startswith("Event loop lag")]
+    # One report for each interval plus a final one when stopped
+    assert len(reports) >= 3
+
+
+def test_event_thread_counts_submissions_in_flight() -> None:
+    monitor = LoopMonitor(interval=0.01)
+    with EventThread(monitor=monitor) as event_thread:
+        event = asyncio.Event()
+        futures = [event_thread.submit(event.wait()) for _ in range(3)]
+        assert event_thread.in_flight == 3
+
+        time.sleep(0.1)
+        assert monitor.stats.in_flight == 3
+        assert monitor.stats.tasks >= 3
+
+        event_thread.loop.call_soon_threadsafe(event.set)
+        for fut in futures:
+            fut.result(timeout=1)
+        assert event_thread.in_flight == 0
+
+
+def get_loop_policies() -> list[LoopPolicy]:
+    policies: list[LoopPolicy] = ["asyncio"]
+    try:
+        import uvloop  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        policies.append("uvloop")
+    return policies
+
+
+@pytest.mark.parametrize("policy", get_loop_policies())
+def test_event_thread_loop_policy(policy: LoopPolicy) -> None:
+    loop_factory = get_loop_factory(policy)
+    with EventThread(loop_factory=loop_factory) as event_thread:
+        loop_type = type(event_thread.loop).__module__
+        assert (loop_type.startswith("uvloop")) == (policy == "uvloop")
+
+
+@pytest.mark.parametrize("kind", ["thread", "process"])
+def test_event_thread_executor(kind: ExecutorKind) -> None:
+    executor = create_executor(kind, max_workers=2)
+    with EventThread(executor=executor) as event_thread:
+        coro = event_thread.run_in_executor(json.loads, "[1, 2, 3]")
+        assert event_thread.submit(coro).result(timeout=30) == [1, 2, 3]
+
+        # Process pools can't run to_thread() calls, so they shouldn't
+        # replace the default executor
+        coro = asyncio.to_thread(sum, [1, 2, 3])
+        assert event_thread.submit(coro).result(timeout=5) == 6
+
+    with pytest.raises(RuntimeError):
+        executor.submit(sum, [])
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("policy", get_loop_policies())
+def test_benchmark_submit_round_trip(
+    policy: LoopPolicy,
+    report: Callable[[str], None],
+) -> None:
+    n = 2000
+    with EventThread(loop_factory=get_loop_factory(policy)) as event_thread:
+        start = time.perf_counter()
+        for _ in range(n):
+            event_thread.submit(asyncio.sleep(0)).result(timeout=1)
+        elapsed = time.perf_counter() - start
+
+    report(f"{elapsed / n * 1e6:.1f}us per submit() round trip")
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("policy", get_loop_policies())
+def test_benchmark_stream_throughput(
+    policy: LoopPolicy,
+    report: Callable[[str], None],
+) -> None:
+    server = StandInServer(tokens=["token "] * 5000)
+    tokens = 0
+
+    def stream_callback(data: Any) -> None:
+        nonlocal tokens
+        tokens += 1
+
+    with EventThread(loop_factory=get_loop_factory(policy)) as event_thread:
+        event_thread.submit(server.start()).result(timeout=1)
+        with HTTPClient().install(event_thread) as http:
+            coro = http.generate_chat_completion(
+                address=server.address,
+                model="test",
+                messages=[],
+                stream_callback=stream_callback,
+            )
+            start = time.perf_counter()
+            event_thread.submit(coro).result(timeout=30)
+            elapsed = time.perf_counter() - start
+
+    assert tokens == len(server.tokens)
+    report(f"{tokens / elapsed:.0f} tokens/s streamed")
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("kind", ["thread", "process"])
+def test_benchmark_executor_decoding(
+    kind: ExecutorKind,
+    report: Callable[[str], None],
+) -> None:
+    payloads = [json.dumps({"tokens": ["token"] * 20000})] * 16
+    executor = create_executor(kind, max_workers=4)
+
+    async def decode_all(event_thread: EventThread) -> None:
+        async with asyncio.TaskGroup() as tg:
+            for payload in payloads:
+                tg.create_task(event_thread.run_in_executor(json.loads, payload))
+
+    with EventThread(executor=executor) as event_thread:
+        # Start the workers before timing
+        event_thread.submit(event_thread.run_in_executor(len, "")).result(timeout=30)
+        start = time.perf_counter()
+        event_thread.submit(decode_all(event_thread)).result(timeout=30)
+        elapsed = time.perf_counter() - start
+
+    report(f"{elapsed * 1000:.1f}ms decoding in the executor")
+
+
+def test_event_thread_submit_many() -> None:
+    async def double(n: int) -> int:
+        await asyncio.sleep(0)
+        return n * 2
+
+    async def fail() -> int:
+        raise ValueError("test")
+
+    with EventThread() as event_thread:
+        fut = event_thread.submit_many(double(n) for n in range(5))
+        assert fut.result(timeout=1) == [0, 2, 4, 6, 8]
+
+        notified: queue.SimpleQueue[concurrent.futures.Future] = queue.SimpleQueue()
+        fut = event_thread.submit_many(
+            (double(n) for n in range(3)),
+            on_done=notified.put,
+        )
+        assert notified.get(timeout=1) is fut
+        assert fut.result() == [0, 2, 4]
+        assert notified.empty()
+
+        fut = event_thread.submit_many([double(1), fail()], return_exceptions=True)
+        results = fut.result(timeout=1)
+        assert results[0] == 2 and isinstance(results[1], ValueError)
+
+        task = InfiniteTask()
+        start_fut = task.create_future_for_event("start")
+        fut = event_thread.submit_many([task.start()])
+        start_fut.result(timeout=1)
+        end_fut = task.create_future_for_event("end")
+        fut.cancel()
+        end_fut.result(timeout=1)
+        assert isinstance(task.events[1], asyncio.CancelledError)
+
+
+def test_benchmark_submit_many() -> None:
+    # Measure until every result has been delivered to this thread,
+    # like the Tk thread receiving a notification for each submission
+    n = 2000
+    notifications: queue.SimpleQueue[concurrent.futures.Future] = queue.SimpleQueue()
+    individual = batched = float("inf")
+
+    # Take the best of several runs to keep other work from skewing either side
+    with EventThread() as event_thread:
+        for _ in range(3):
+            start = time.perf_counter()
+            for _ in range(n):
+                fut = event_thread.submit(asyncio.sleep(0))
+                fut.add_done_callback(notifications.put)
+            for _ in range(n):
+                notifications.get(timeout=5)
+            individual = min(individual, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            event_thread.submit_many(
+                (asyncio.sleep(0) for _ in range(n)),
+                on_done=notifications.put,
+            )
+            notifications.get(timeout=5).result()
+            batched = min(batched, time.perf_counter() - start)
+
+    print(
+        f"{n} coroutines: submit()={individual * 1000:.1f}ms "
+        f"submit_many()={batched * 1000:.1f}ms"
+    )
+    assert batched < individual
@@ -0,0 +1,50 @@
+import concurrent.futures
+from typing import Iterator
+
+import pytest
+
+from ollamatk import highlight
+from ollamatk.highlight import CodeHighlighter, Span, lex_code
+
+
+@pytest.fixture
+def executor() -> Iterator[concurrent.futures.ThreadPoolExecutor]:
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        yield executor
+
+
+def test_lex_code() -> None:
+    pytest.importorskip("pygments")
+    spans = lex_code("python", 'def f():\n    """a\n    b"""\n    return 1')
+    assert ("hl.Keyword", 0, 0, 3) in spans
+    assert ("hl.Name.Function", 0, 4, 5) in spans
+    assert ("hl.Literal.String", 1, 4, 8) in spans
+    assert ("hl.Literal.String", 2, 0, 8) in spans
+    assert ("hl.Keyword", 3, 4, 10) in spans
+
+
+def test_lex_unknown_language() -> None:
+    assert lex_code("not-a-real-language", "code") == []
+
+
+def test_code_highlighter_cache(
+    executor: concurrent.futures.Executor,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    calls = 0
+
+    def lex_code(language: str, code: str) -> list[Span]:
+        nonlocal calls
+        calls += 1
+        return [("hl.Keyword", 0, 0, len(code))]
+
+    monkeypatch.setattr(highlight, "lex_code", lex_code)
+
+    highlighter = CodeHighlighter(executor)
+    first = highlighter.highlight("python", "pass").result(timeout=1)
+    second = highlighter.highlight("Python", "pass").result(timeout=1)
+    other = highlighter.highlight("python", "return").result(timeout=1)
+
+    assert calls == 2
+    assert first == second == [("hl.Keyword", 0, 0, 4)]
+    assert other == [("hl.Keyword", 0, 0, 6)]
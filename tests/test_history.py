@@ -0,0 +1,145 @@
+from pathlib import Path
+
+from ollamatk.chat import build_conversation_tree, get_history_ancestors, write_history
+from ollamatk.history import MATCH_END, MATCH_START, ConversationHistory
+from ollamatk.messages import Message
+from ollamatk.tree import ConversationTree, MessageNode
+
+
+def test_messages_after_are_batched_in_order(tmp_path: Path) -> None:
+    history = ConversationHistory(tmp_path / "history.db")
+    ids = [history.add_message("a", "user", str(i)) for i in range(5)]
+    assert ids == sorted(ids)
+
+    batches = list(history.iter_messages_after(ids[0]))
+    assert [m.content for batch in batches for m in batch] == ["1", "2", "3", "4"]
+
+    batch = history.get_messages_after(ids[1], limit=2)
+    assert [m.id for m in batch] == ids[2:4]
+
+
+def test_history_persists(tmp_path: Path) -> None:
+    history = ConversationHistory(tmp_path / "history.db")
+    id = history.add_message("a", "assistant", "Hello world!")
+    history.close()
+
+    history = ConversationHistory(tmp_path / "history.db")
+    message = history.get_message(id)
+    assert message is not None
+    assert (message.conversation, message.role, message.content) == (
+        "a",
+        "assistant",
+        "Hello world!",
+    )
+
+
+def test_search_text_matches_terms_and_phrases(tmp_path: Path) -> None:
+    history = ConversationHistory(tmp_path / "history.db")
+    history.add_message("a", "user", "How do I sort a list in Python?")
+    history.add_message("a", "assistant", "Use sorted() to sort any iterable.")
+    history.add_message("b", "user", "What is a linked list?")
+
+    matches = history.search_text("sort")
+    assert len(matches) == 2
+    assert all(MATCH_START + "sort" + MATCH_END in m.snippet for m in matches)
+
+    matches = history.search_text('"linked list"')
+    assert [m.message.conversation for m in matches] == ["b"]
+
+    # Query syntax should be treated literally rather than raising errors
+    assert history.search_text('list AND "unterminated') == []
+    assert len(history.search_text("list -")) == 2
+
+
+def test_search_text_indexes_existing_messages(tmp_path: Path) -> None:
+    history = ConversationHistory(tmp_path / "history.db")
+    history.add_message("a", "user", "Hello world!")
+    with history._conn:
+        history._conn.execute("DROP TABLE message_fts")
+    history.close()
+
+    history = ConversationHistory(tmp_path / "history.db")
+    assert len(history.search_text("world")) == 1
+
+
+def test_tool_calls_are_stored(tmp_path: Path) -> None:
+    history = ConversationHistory(tmp_path / "history.db")
+    calls = [{"function": {"name": "get_current_time", "arguments": {}}}]
+    history.add_message("a", "assistant", "", tool_calls=calls)
+    history.add_message("a", "tool", "12:00", tool_name="get_current_time")
+    history.add_message("a", "assistant", "It's noon.")
+
+    call, result, answer = history.get_conversation("a")
+    assert (call.tool_calls, call.tool_name) == (calls, None)
+    assert (result.tool_calls, result.tool_name) == (None, "get_current_time")
+    assert (answer.tool_calls, answer.tool_name) == (None, None)
+    assert history.search_text("12:00")[0].message == result
+
+
+def test_older_databases_are_upgraded(tmp_path: Path) -> None:
+    history = ConversationHistory(tmp_path / "history.db")
+    history.add_message("a", "user", "Hello world!")
+    with history._conn:
+        history._conn.execute("ALTER TABLE message DROP COLUMN tool_calls")
+        history._conn.execute("ALTER TABLE message DROP COLUMN tool_name")
+    history.close()
+
+    history = ConversationHistory(tmp_path / "history.db")
+    history.add_message("a", "tool", "12:00", tool_name="get_current_time")
+    old, new = history.get_conversation("a")
+    assert (old.content, old.tool_name) == ("Hello world!", None)
+    assert new.tool_name == "get_current_time"
+
+
+def test_older_messages_are_chained_when_upgraded(tmp_path: Path) -> None:
+    history = ConversationHistory(tmp_path / "history.db")
+    a1 = history.add_message("a", "user", "1")
+    b1 = history.add_message("b", "user", "1")
+    a2 = history.add_message("a", "assistant", "2")
+    history.add_message("b", "assistant", "2")
+    with history._conn:
+        history._conn.execute("ALTER TABLE message DROP COLUMN parent_id")
+    history.close()
+
+    history = ConversationHistory(tmp_path / "history.db")
+    assert [m.parent_id for m in history.get_conversation("a")] == [None, a1]
+    assert [m.parent_id for m in history.get_conversation("b")] == [None, b1]
+
+    tree = build_conversation_tree(history.get_conversation("a"))
+    assert [node.message.history_id for node in tree.path()] == [a1, a2]
+
+
+def save(history: ConversationHistory, nodes: list[MessageNode[Message]]) -> None:
+    entries = [(node.message, get_history_ancestors(node)) for node in nodes]
+    write_history(history, "a", entries)
+
+
+def test_branches_are_restored(tmp_path: Path) -> None:
+    history = ConversationHistory(tmp_path / "history.db")
+    tree: ConversationTree[Message] = ConversationTree()
+    question = tree.append(Message("user", "Q"))
+    answer = tree.append(Message("assistant", "A"))
+    save(history, [question, answer])
+    save(history, [tree.branch(answer, Message("assistant", "A2"))])
+
+    # Prompts whose response failed aren't stored, so the next one
+    # replies to the last message that was
+    tree.append(Message("user", "Failed"))
+    tree.append(Message("assistant", "Error"))
+    save(history, [tree.append(Message("user", "Q2"))])
+
+    edit = tree.branch(question, Message("user", "Q-edit"))
+    save(history, [edit, tree.append(Message("assistant", "A-edit"))])
+
+    stored = history.get_conversation("a")
+    assert len(stored) == 6
+
+    # The latest branch at each fork is shown by default
+    loaded = build_conversation_tree(stored)
+    assert [node.message.content for node in loaded.path()] == ["Q-edit", "A-edit"]
+    assert [node.message.content for node in loaded.children] == ["Q", "Q-edit"]
+
+    loaded = build_conversation_tree(stored, selected=answer.message.history_id)
+    assert [node.message.content for node in loaded.path()] == ["Q", "A"]
+    loaded.switch(loaded.path()[-1], 1)
+    assert [node.message.content for node in loaded.path()] == ["Q", "A2", "Q2"]
@@ -0,0 +1,85 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+from typing import Iterator
+
+import httpx
+import pytest
+
+from ollamatk.event_thread import EventThread
+from ollamatk.http import HTTPClient
+
+from .conftest import StandInServer
+
+
+@pytest.fixture
+def http(event_thread: EventThread) -> Iterator[HTTPClient]:
+    with HTTPClient().install(event_thread) as http:
+        yield http
+
+
+def test_warm_up_reuses_connection(
+    event_thread: EventThread,
+    http: HTTPClient,
+    server: StandInServer,
+) -> None:
+    models = event_thread.submit(http.warm_up(server.address)).result(timeout=5)
+    assert models == ["test"]
+
+    tokens = []
+    coro = http.generate_chat_completion(
+        address=server.address,
+        model="test",
+        messages=[],
+        stream_callback=lambda data: tokens.append(data["message"]["content"]),
+    )
+    event_thread.submit(coro).result(timeout=5)
+
+    assert tokens == server.tokens
+    assert server.requests == ["/api/tags", "/api/chat"]
+    assert server.connections == 1
+
+
+def test_cancelling_stream_releases_connection(event_thread: EventThread) -> None:
+    server = StandInServer(tokens=["token"] * 100, token_delay=0.02)
+    asyncio_server = event_thread.submit(server.start()).result(timeout=1)
+
+    # With a single connection, any leaked stream would block the next request
+    limits = httpx.Limits(max_connections=1)
+    received = threading.Event()
+    closed_at = concurrent.futures.Future()
+
+    async def generate(http: HTTPClient) -> None:
+        try:
+            await http.generate_chat_completion(
+                address=server.address,
+                model="test",
+                messages=[],
+                stream_callback=lambda data: received.set(),
+            )
+        except asyncio.CancelledError:
+            closed_at.set_result(time.perf_counter())
+            raise
+
+    try:
+        with HTTPClient(limits=limits).install(event_thread) as http:
+            fut = event_thread.submit(generate(http))
+            assert received.wait(timeout=5)
+
+            start = time.perf_counter()
+            fut.cancel()
+            latency = closed_at.result(timeout=1) - start
+            assert latency < 0.1
+
+            coro = asyncio.wait_for(http.list_local_models(server.address), timeout=1)
+            assert event_thread.submit(coro).result(timeout=2) == ["test"]
+
+        # The server should notice the disconnect and stop streaming
+        deadline = time.perf_counter() + 1
+        while server.aborted_streams == 0 and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        assert server.aborted_streams == 1
+        assert server.connections == 2
+    finally:
+        event_thread.loop.call_soon_threadsafe(asyncio_server.close)
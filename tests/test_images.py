@@ -0,0 +1,73 @@
+import base64
+import concurrent.futures
+import io
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from ollamatk import images
+from ollamatk.images import MAX_IMAGE_SIZE, THUMBNAIL_SIZE, ImageEncoder, encode_image
+
+
+@pytest.fixture
+def executor() -> Iterator[concurrent.futures.ThreadPoolExecutor]:
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        yield executor
+
+
+def make_image(size: tuple[int, int]) -> bytes:
+    Image = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "red").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_encode_image_downscales() -> None:
+    Image = pytest.importorskip("PIL.Image")
+    data = make_image((MAX_IMAGE_SIZE * 2, MAX_IMAGE_SIZE))
+
+    encoded, thumbnail = encode_image(data)
+
+    with Image.open(io.BytesIO(base64.b64decode(encoded))) as image:
+        assert image.size == (MAX_IMAGE_SIZE, MAX_IMAGE_SIZE // 2)
+
+    assert thumbnail is not None
+    with Image.open(io.BytesIO(thumbnail)) as image:
+        assert image.format == "PNG"
+        assert max(image.size) == THUMBNAIL_SIZE
+
+
+def test_encode_small_image_unchanged() -> None:
+    data = make_image((16, 16))
+    encoded, thumbnail = encode_image(data)
+    assert base64.b64decode(encoded) == data
+
+
+def test_image_encoder_cache(
+    executor: concurrent.futures.Executor,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    calls = 0
+
+    def encode_image(data: bytes) -> tuple[str, bytes | None]:
+        nonlocal calls
+        calls += 1
+        return base64.b64encode(data).decode(), None
+
+    monkeypatch.setattr(images, "encode_image", encode_image)
+
+    first = tmp_path / "first.png"
+    second = tmp_path / "second.png"
+    first.write_bytes(b"image")
+    second.write_bytes(b"image")
+
+    encoder = ImageEncoder(executor)
+    first_image = encoder.encode(first).result(timeout=1)
+    second_image = encoder.encode(second).result(timeout=1)
+
+    assert calls == 1
+    assert first_image.name == "first.png"
+    assert second_image.name == "second.png"
+    assert first_image.data == second_image.data == base64.b64encode(b"image").decode()
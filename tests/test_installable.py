@@ -1,11 +1,12 @@
 import asyncio
 import concurrent.futures
+import time
 from typing import Any, Callable
 
 import pytest
 
 from ollamatk.event_thread import EventThread
-from ollamatk.installable import Installable
+from ollamatk.installable import InstallGroup, Installable
 
 
 class NullInstallable(Installable):
@@ -124,3 +125,91 @@ def test_installable_cancel_propagation() -> None:
                 event_thread.stop()
                 event_thread.join(timeout=0.1)
                 assert not event_thread.is_alive()
+
+
+def test_installable_without_waiting(event_thread: EventThread) -> None:
+    installable = LongInstallable(ready_delay=0.1)
+    with installable.install(event_thread, wait=False):
+        start = time.perf_counter()
+        installable.wait_until_ready()
+        assert time.perf_counter() - start > 0.05
+
+
+def test_installable_ready_timeout_includes_background_time(
+    event_thread: EventThread,
+) -> None:
+    installable = LongInstallable(ready_delay=0.3, ready_timeout=0.2)
+    with pytest.raises(TimeoutError):
+        with installable.install(event_thread, wait=False):
+            time.sleep(0.2)
+            start = time.perf_counter()
+            try:
+                installable.wait_until_ready()
+            finally:
+                assert time.perf_counter() - start < 0.1
+
+
+def test_installable_wait_until_ready_not_installed() -> None:
+    with pytest.raises(RuntimeError):
+        NullInstallable().wait_until_ready()
+
+
+class OrderedInstallable(LongInstallable):
+    def __init__(self, name: str, events: list[str], **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.name = name
+        self.events = events
+
+    async def _install(self, ready_callback: Callable[[], asyncio.Future[Any]]) -> Any:
+        self.events.append(f"start {self.name}")
+        try:
+            await super()._install(ready_callback)
+        finally:
+            self.events.append(f"stop {self.name}")
+
+
+def test_install_group_order_and_concurrency(event_thread: EventThread) -> None:
+    events = []
+    group = InstallGroup()
+    a = OrderedInstallable("a", events, ready_delay=0.2, stop_delay=0.2)
+    b = OrderedInstallable("b", events, ready_delay=0.2, stop_delay=0.2)
+    c = OrderedInstallable("c", events)
+    group.add(a, name="a")
+    group.add(b, name="b")
+    group.add(c, depends_on=[a, b], name="c")
+    assert group.levels() == [[a, b], [c]]
+
+    start = time.perf_counter()
+    with group.install(event_thread):
+        # a and b should be installed at the same time
+        assert time.perf_counter() - start < 0.35
+        assert events == ["start a", "start b", "start c"]
+
+        start = time.perf_counter()
+    assert time.perf_counter() - start < 0.35
+    assert events[3] == "stop c"
+    assert sorted(events[4:]) == ["stop a", "stop b"]
+
+    assert group.timings["c"].level == 1
+    assert group.timings["c"].startup < 0.1
+    assert group.timings["a"].startup >= 0.2
+
+
+def test_install_group_tears_down_after_failure(event_thread: EventThread) -> None:
+    group = InstallGroup()
+    a = group.add(NullInstallable())
+    group.add(FaultyInstallable(), depends_on=[a])
+
+    with pytest.raises(Exception, match="test"), group.install(event_thread):
+        assert False, "Install exception did not propagate to caller"
+    assert a.events == ["start", "end"]
+
+
+def test_install_group_requires_dependencies_first() -> None:
+    group = InstallGroup()
+    with pytest.raises(ValueError):
+        group.add(NullInstallable(), depends_on=[NullInstallable()])
+
+    group.add(NullInstallable())
+    with pytest.raises(ValueError):
+        group.add(NullInstallable())
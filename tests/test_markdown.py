@@ -0,0 +1,112 @@
+from ollamatk.markdown import CodeBlock, MarkdownStream, Run, parse_inline
+
+
+def render(stream: MarkdownStream, deltas: list[str]) -> list[Run]:
+    """Simulate how a text widget applies each update."""
+    committed: list[Run] = []
+    tail: list[Run] = []
+    for delta in deltas:
+        update = stream.feed(delta)
+        committed.extend(update.committed)
+        tail = update.tail
+    return [run for run in committed + tail if run[0]]
+
+
+def tokenize(text: str, size: int = 3) -> list[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+MARKDOWN = """\
+# Title
+Some **bold** and *italic* text with `code`.
+
+- First item
+- Second item
+1. Numbered
+
+```python
+def main():
+    print("# not a heading")
+```
+> Quoted
+"""
+
+
+def test_parse_inline() -> None:
+    assert parse_inline("a **b** c") == [("a ", ()), ("b", ("bold",)), (" c", ())]
+    assert parse_inline("`x` _y_") == [("x", ("code",)), (" ", ()), ("y", ("italic",))]
+    assert parse_inline("", ("h1",)) == [("", ("h1",))]
+
+
+def test_markdown_blocks() -> None:
+    runs = render(MarkdownStream(), [MARKDOWN])
+    assert ("Title", ("h1",)) in runs
+    assert ("bold", ("bold",)) in runs
+    assert ("italic", ("italic",)) in runs
+    assert ("code", ("code",)) in runs
+    assert ("• ", ("list",)) in runs
+    assert ("1. ", ("list",)) in runs
+    assert ('    print("# not a heading")', ("code_block",)) in runs
+    assert ("Quoted", ("quote",)) in runs
+    assert not any("```" in text for text, tags in runs)
+
+
+def test_markdown_streaming_matches_whole() -> None:
+    whole = render(MarkdownStream(), [MARKDOWN])
+    for size in (1, 2, 5, 13):
+        assert render(MarkdownStream(), tokenize(MARKDOWN, size)) == whole
+
+
+def test_markdown_tail_is_provisional() -> None:
+    stream = MarkdownStream()
+    assert stream.feed("```").tail == [("", ())]
+    assert not stream.in_code_block
+
+    update = stream.feed("py\ncode")
+    assert stream.in_code_block
+    assert update.tail == [("code", ("code_block",))]
+
+
+def test_markdown_per_token_cost_is_independent_of_length() -> None:
+    # Count how many characters are parsed for tokens at the start and end
+    # of a long message. If every token re-parsed the whole message,
+    # the later tokens would parse orders of magnitude more text.
+    paragraph = "Some **bold** text and `code` in a line of prose.\n"
+    tokens = tokenize(paragraph * 4000, 4)
+    window = 2000
+
+    stream = MarkdownStream()
+    parse_line = stream._parse_line
+    parsed = 0
+
+    def count_parse_line(line: str) -> list[Run]:
+        nonlocal parsed
+        parsed += len(line)
+        return parse_line(line)
+
+    stream._parse_line = count_parse_line
+
+    def count_parsed(tokens: list[str]) -> int:
+        nonlocal parsed
+        parsed = 0
+        for token in tokens:
+            stream.feed(token)
+        return parsed
+
+    early = count_parsed(tokens[:window])
+    stream.feed("".join(tokens[window:-window]))
+    late = count_parsed(tokens[-window:])
+
+    # Only the current line is re-parsed, so each token costs at most a line
+    assert late <= len(paragraph) * window
+    assert late < early * 2
+
+
+def test_markdown_code_block_lines() -> None:
+    stream = MarkdownStream()
+    update = stream.feed("Intro\n```py\na = 1\nb = 2\n```\n")
+    assert update.closed_code_blocks == [CodeBlock("py", 2, 4)]
+    assert stream.get_open_code_block() is None
+
+    stream.feed("~~~\nc = 3\nd")
+    assert stream.get_open_code_block() == CodeBlock("", 6, 8)
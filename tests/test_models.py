@@ -0,0 +1,102 @@
+import asyncio
+import threading
+
+import pytest
+
+from ollamatk.event_thread import EventThread
+from ollamatk.http import HTTPClient, PullResponse
+from ollamatk.models import PullProgress, PullStatus, pull_model
+
+from .conftest import StandInServer
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def layer(digest: str, completed: int, total: int) -> PullResponse:
+    return {
+        "status": f"pulling {digest}",
+        "digest": digest,
+        "completed": completed,
+        "total": total,
+    }
+
+
+def test_progress_is_coalesced_across_layers() -> None:
+    clock = FakeClock()
+    statuses: list[PullStatus] = []
+    progress = PullProgress(
+        server="server",
+        model="test",
+        callback=statuses.append,
+        interval=0.25,
+        clock=clock,
+    )
+
+    # A binary fraction keeps the clock exact
+    for i in range(64):
+        clock.now = i / 64
+        progress(layer("a", i, 100))
+        progress(layer("b", 0, 300))
+
+    # 128 updates over one second should only be reported 4 times
+    assert progress.updates == 128
+    assert len(statuses) == 4
+    assert statuses[-1].completed == 48
+    assert statuses[-1].total == 400
+
+    progress.finish("done")
+    status = statuses[-1]
+    assert status.status == "done"
+    assert status.completed == 63
+    assert status.rate > 0
+    assert status.eta == pytest.approx((400 - 63) / status.rate)
+    assert status.format_progress() == "16% (63 B / 400 B)"
+
+
+def test_pull_and_delete_model(
+    event_thread: EventThread,
+    server: StandInServer,
+) -> None:
+    statuses: list[PullStatus] = []
+    with HTTPClient().install(event_thread) as http:
+        coro = pull_model(http, server.address, "new", statuses.append)
+        event_thread.submit(coro).result(timeout=5)
+        assert statuses[-1].status == "done"
+        assert statuses[-1].completed == statuses[-1].total == 100
+
+        models = event_thread.submit(http.list_local_models(server.address))
+        assert models.result(timeout=5) == ["test", "new"]
+
+        coro = http.delete_model(address=server.address, model="new")
+        event_thread.submit(coro).result(timeout=5)
+        models = event_thread.submit(http.list_local_models(server.address))
+        assert models.result(timeout=5) == ["test"]
+
+
+def test_concurrent_pulls_can_be_cancelled(event_thread: EventThread) -> None:
+    server = StandInServer(token_delay=0.05)
+    asyncio_server = event_thread.submit(server.start()).result(timeout=1)
+    started = threading.Event()
+
+    def on_status(status: PullStatus) -> None:
+        if status.model == "slow" and status.completed > 0:
+            started.set()
+
+    with HTTPClient().install(event_thread) as http:
+        slow = event_thread.submit(pull_model(http, server.address, "slow", on_status))
+        fast = event_thread.submit(pull_model(http, server.address, "fast", on_status))
+        assert started.wait(timeout=5)
+
+        slow.cancel()
+        fast.result(timeout=5)
+        assert slow.cancelled()
+
+    event_thread.submit(asyncio.sleep(0.1)).result(timeout=1)
+    assert server.aborted_streams == 1
+    event_thread.loop.call_soon_threadsafe(asyncio_server.close)
@@ -0,0 +1,183 @@
+import asyncio
+import socket
+from typing import Iterator
+
+import httpx
+import pytest
+
+from ollamatk.event_thread import EventThread
+from ollamatk.http import HTTPClient
+from ollamatk.pool import ServerPool, parse_addresses
+
+from .conftest import StandInServer
+
+
+@pytest.fixture
+def servers(event_thread: EventThread) -> Iterator[list[StandInServer]]:
+    servers = [StandInServer(), StandInServer()]
+    asyncio_servers = [
+        event_thread.submit(server.start()).result(timeout=1) for server in servers
+    ]
+    yield servers
+    for asyncio_server in asyncio_servers:
+        event_thread.loop.call_soon_threadsafe(asyncio_server.close)
+
+
+def get_unused_address() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def chat(event_thread: EventThread, http: HTTPClient, address: str) -> None:
+    coro = http.generate_chat_completion(
+        address=address,
+        model="test",
+        messages=[],
+        stream_callback=lambda data: None,
+    )
+    event_thread.submit(coro).result(timeout=5)
+
+
+def test_parse_addresses() -> None:
+    text = "http://a:1, http://b:2 http://a:1,,"
+    assert parse_addresses(text) == ["http://a:1", "http://b:2"]
+
+
+def test_route_prefers_loaded_models_then_least_outstanding() -> None:
+    pool = ServerPool()
+    a, b, c = pool.route("a, b, c")
+    a.models = {"llama:latest"}
+    b.models = {"llama:latest"}
+    b.loaded = {"llama:latest"}
+    c.models = set()
+    b.outstanding = 3
+
+    assert [s.address for s in pool.route("a, b, c", "llama")] == ["b", "a", "c"]
+
+    b.healthy = False
+    assert [s.address for s in pool.route("a, b, c", "llama")] == ["a", "c", "b"]
+
+    a.outstanding = 1
+    assert [s.address for s in pool.route("a, b, c")] == ["c", "a", "b"]
+
+
+def test_health_checks_find_loaded_models(
+    event_thread: EventThread,
+    servers: list[StandInServer],
+) -> None:
+    servers[1].loaded_models = ["test"]
+    address = ",".join(server.address for server in servers)
+
+    with HTTPClient().install(event_thread) as http:
+        chat(event_thread, http, address)
+        chat(event_thread, http, address)
+
+    first, second = (http.pool.servers[server.address] for server in servers)
+    assert first.models == second.models == {"test:latest"}
+    assert second.loaded == {"test:latest"}
+    assert second.requests == 2
+    assert first.requests == 0
+    assert sorted(servers[0].requests) == ["/api/ps", "/api/tags"]
+
+
+def test_failover_on_connect_error(
+    event_thread: EventThread,
+    server: StandInServer,
+) -> None:
+    dead = get_unused_address()
+
+    with HTTPClient().install(event_thread) as http:
+        # Pretend the dead server was healthy so it's tried first
+        event_thread.submit(
+            http.pool.ensure_checked(http.client, http.pool.route(server.address))
+        ).result(timeout=5)
+        state = http.pool.route(dead)[0]
+        state.last_checked = 0
+        state.models = {"test:latest"}
+        state.loaded = {"test:latest"}
+
+        chat(event_thread, http, f"{dead},{server.address}")
+
+    assert not state.healthy
+    assert state.errors == 1
+    assert http.pool.servers[server.address].requests == 1
+    assert server.requests.count("/api/chat") == 1
+
+
+def test_error_responses_are_recorded(
+    event_thread: EventThread,
+    server: StandInServer,
+) -> None:
+    with HTTPClient().install(event_thread) as http:
+        coro = http.generate_chat_completion(
+            address=server.address,
+            model="missing",
+            messages=[],
+            stream_callback=lambda data: None,
+        )
+        with pytest.raises(httpx.HTTPStatusError):
+            event_thread.submit(coro).result(timeout=5)
+
+    state = http.pool.servers[server.address]
+    assert state.healthy
+    assert state.requests == 1
+    assert state.errors == 1
+    assert state.last_error == "404 Not Found for /api/chat"
+
+
+async def start_html_server() -> asyncio.Server:
+    """Start a server that answers every request with a web page."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        await reader.readuntil(b"\r\n\r\n")
+        body = b"<html>Not Ollama</html>"
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n"
+            b"Content-Length: %d\r\nConnection: close\r\n\r\n%s" % (len(body), body)
+        )
+        await writer.drain()
+        writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+def test_failover_on_unexpected_health_check_response(
+    event_thread: EventThread,
+    server: StandInServer,
+) -> None:
+    html_server = event_thread.submit(start_html_server()).result(timeout=1)
+    try:
+        port = html_server.sockets[0].getsockname()[1]
+        html = f"http://127.0.0.1:{port}"
+        with HTTPClient().install(event_thread) as http:
+            chat(event_thread, http, f"{html},{server.address}")
+    finally:
+        event_thread.loop.call_soon_threadsafe(html_server.close)
+
+    state = http.pool.servers[html]
+    assert not state.healthy
+    assert state.errors == 1
+    assert server.requests.count("/api/chat") == 1
+
+
+def test_health_checks_survive_failures(event_thread: EventThread) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "broken":
+            raise RuntimeError("transport failed")
+        return httpx.Response(200, json={"models": []})
+
+    pool = ServerPool(check_interval=0.01)
+    good, broken = pool.route("http://good, http://broken")
+
+    async def run_checks() -> None:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            task = asyncio.create_task(pool.run_health_checks(client))
+            await asyncio.sleep(0.1)
+            assert not task.done()
+            task.cancel()
+
+    event_thread.submit(run_checks()).result(timeout=5)
+    assert good.healthy and good.models == set()
+    assert good.last_checked is not None and broken.last_checked is not None
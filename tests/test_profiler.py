@@ -0,0 +1,69 @@
+import threading
+import time
+from pathlib import Path
+
+from ollamatk.event_thread import EventThread
+from ollamatk.profiler import SamplingProfiler
+
+
+def spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_profiler_samples_each_thread(tmp_path: Path) -> None:
+    stop = threading.Event()
+    busy = threading.Thread(target=spin, args=(stop,))
+    busy.start()
+
+    profiler = SamplingProfiler(tmp_path, interval=0.001)
+    try:
+        with EventThread() as event_thread:
+            profiler.start({"Busy": busy, "Event": event_thread})
+            assert profiler.running
+            time.sleep(0.3)
+            profile = profiler.stop()
+    finally:
+        stop.set()
+        busy.join()
+
+    assert not profiler.running
+    busy_profile, event_profile = profile.threads
+    assert busy_profile.samples > 0
+    assert busy_profile.idle == 0
+    assert busy_profile.top_functions(1)[0].name.startswith("spin (")
+
+    # The event loop has nothing to do, so it should be waiting for events
+    assert event_profile.samples > 0
+    assert event_profile.idle / event_profile.samples > 0.9
+
+    report = profile.format_report()
+    assert "Busy: " in report
+    assert "spin (test_profiler.py:" in report
+
+
+def test_profile_is_saved_to_timestamped_files(tmp_path: Path) -> None:
+    stop = threading.Event()
+    busy = threading.Thread(target=spin, args=(stop,))
+    busy.start()
+
+    profiler = SamplingProfiler(tmp_path / "profiles", interval=0.001)
+    try:
+        profiler.start({"Busy": busy})
+        time.sleep(0.1)
+        profile = profiler.stop_and_save()
+    finally:
+        stop.set()
+        busy.join()
+
+    prefix = f"profile-{profile.started_at:%Y%m%d-%H%M%S}"
+    folded, report = sorted((tmp_path / "profiles").iterdir())
+    assert report.name == f"{prefix}.txt"
+    assert folded.name == f"{prefix}-busy.folded"
+
+    lines = folded.read_text().splitlines()
+    assert (
+        sum(int(line.rpartition(" ")[2]) for line in lines)
+        == profile.threads[0].samples
+    )
+    assert any(";spin (" in line for line in lines)
@@ -0,0 +1,100 @@
+import json
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from ollamatk.event_thread import EventThread
+from ollamatk.http import HTTPClient, StreamingChat
+from ollamatk.recording import ChatRecorder, ReplayTransport, load_recording
+
+ADDRESS = "http://ollama.invalid"
+
+
+def make_chat_lines(tokens: list[str]) -> list[str]:
+    lines = []
+    for token in tokens:
+        message = {"role": "assistant", "content": token}
+        lines.append(json.dumps({"model": "test", "message": message, "done": False}))
+    lines.append(json.dumps({"model": "test", "done": True}))
+    return lines
+
+
+def make_mock_transport(lines: list[str]) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content="\n".join(lines).encode())
+
+    return httpx.MockTransport(handler)
+
+
+def run_chat(event_thread: EventThread, http: HTTPClient) -> list[str]:
+    tokens = []
+
+    def stream_callback(data: StreamingChat) -> None:
+        tokens.append(data["message"]["content"])
+
+    with http.install(event_thread):
+        coro = http.generate_chat_completion(
+            address=ADDRESS,
+            model="test",
+            messages=[],
+            stream_callback=stream_callback,
+        )
+        event_thread.submit(coro).result(timeout=5)
+
+    return tokens
+
+
+def record_chat(event_thread: EventThread, path: Path, tokens: list[str]) -> Path:
+    transport = make_mock_transport(make_chat_lines(tokens))
+    http = HTTPClient(transport=transport, recorder=ChatRecorder(path))
+    assert run_chat(event_thread, http) == tokens
+
+    (recording,) = path.iterdir()
+    return recording
+
+
+def test_record_chat(event_thread: EventThread, tmp_path: Path) -> None:
+    tokens = ["Hello", ", ", "world!"]
+    recording = record_chat(event_thread, tmp_path, tokens)
+
+    entries = load_recording(recording)
+    assert [line for offset, line in entries] == make_chat_lines(tokens)
+
+    offsets = [offset for offset, line in entries]
+    assert offsets == sorted(offsets)
+
+
+def test_replay_chat(event_thread: EventThread, tmp_path: Path) -> None:
+    tokens = [str(i) for i in range(100)]
+    recording = record_chat(event_thread, tmp_path, tokens)
+
+    http = HTTPClient(transport=ReplayTransport(recording, speed=None))
+    assert run_chat(event_thread, http) == tokens
+
+
+def test_replay_chat_speed(event_thread: EventThread, tmp_path: Path) -> None:
+    recording = tmp_path / "recording.ndjson"
+    lines = make_chat_lines(["a", "b"])
+    offsets = [0, 0.1, 0.2]
+    recording.write_text(
+        "\n".join(json.dumps([offset, line]) for offset, line in zip(offsets, lines))
+    )
+
+    def time_replay(speed: float | None) -> float:
+        http = HTTPClient(transport=ReplayTransport(recording, speed=speed))
+        start = time.perf_counter()
+        assert run_chat(event_thread, http) == ["a", "b"]
+        return time.perf_counter() - start
+
+    assert time_replay(1) >= 0.2
+    assert time_replay(4) < 0.2
+    assert time_replay(None) < 0.1
+
+
+def test_replay_invalid_speed(tmp_path: Path) -> None:
+    recording = tmp_path / "recording.ndjson"
+    recording.write_text("")
+    with pytest.raises(ValueError):
+        ReplayTransport(recording, speed=0)
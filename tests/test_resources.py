@@ -0,0 +1,104 @@
+import queue
+import time
+
+from ollamatk.event_thread import EventThread
+from ollamatk.http import HTTPClient
+from ollamatk.resources import (
+    LoadedModel,
+    ModelDiff,
+    ResourcePoller,
+    diff_models,
+    format_size,
+)
+
+from .conftest import StandInServer
+
+
+def model(name: str, expires_at: str = "soon") -> LoadedModel:
+    return LoadedModel("server", name, 100, 50, expires_at)
+
+
+def test_diff_only_includes_changed_rows() -> None:
+    a, b, c = model("a"), model("b"), model("c")
+    old = {a.key: a, b.key: b}
+    b2 = model("b", expires_at="later")
+    new = {a.key: a, b2.key: b2, c.key: c}
+
+    diff = diff_models(old, new)
+    assert diff.changed == {b2.key: b2, c.key: c}
+    assert diff.removed == []
+
+    diff = diff_models(new, {a.key: a})
+    assert diff.changed == {}
+    assert sorted(diff.removed) == [b.key, c.key]
+    assert not diff_models(old, old)
+
+
+def test_interval_backs_off_while_idle() -> None:
+    poller = ResourcePoller(fast_interval=1, idle_interval=5, backoff=2)
+    assert poller.next_interval(1, changed=False) == 2
+    assert poller.next_interval(4, changed=False) == 5
+    assert poller.next_interval(4, changed=True) == 1
+
+    poller.set_active("window", True)
+    assert poller.next_interval(4, changed=False) == 1
+    poller.set_active("window", False)
+    assert poller.next_interval(4, changed=False) == 5
+
+
+def test_format_size() -> None:
+    assert format_size(512) == "512 B"
+    assert format_size(3 << 30) == "3.0 GB"
+    assert format_size(1536) == "1.5 KB"
+
+
+def test_poller_sends_snapshot_then_changes(
+    event_thread: EventThread,
+    server: StandInServer,
+) -> None:
+    server.loaded_models = ["test"]
+    poller = ResourcePoller(fast_interval=10, idle_interval=10)
+    diffs: queue.Queue[ModelDiff] = queue.Queue()
+
+    with HTTPClient().install(event_thread) as http:
+        poller.subscribe(diffs.put)
+        fut = event_thread.submit(poller.run(http, lambda: server.address))
+
+        snapshot = diffs.get(timeout=5)
+        assert [m.name for m in snapshot.changed.values()] == ["test"]
+
+        # Waking the poller should poll again right away despite the interval
+        server.loaded_models = []
+        start = time.perf_counter()
+        poller.set_active("other", True)
+        diff = diffs.get(timeout=5)
+        assert time.perf_counter() - start < 1
+        assert diff.removed == [(server.address, "test")]
+        assert diff.changed == {}
+
+        assert poller.polls >= 2
+        fut.cancel()
+
+
+def test_poller_survives_failing_subscriber(
+    event_thread: EventThread,
+    server: StandInServer,
+) -> None:
+    server.loaded_models = ["test"]
+    poller = ResourcePoller(fast_interval=10, idle_interval=10)
+    diffs: queue.Queue[ModelDiff] = queue.Queue()
+
+    def fail(diff: ModelDiff) -> None:
+        raise RuntimeError("window was destroyed")
+
+    with HTTPClient().install(event_thread) as http:
+        poller.subscribe(fail)
+        poller.subscribe(diffs.put)
+        fut = event_thread.submit(poller.run(http, lambda: server.address))
+        diffs.get(timeout=5)
+
+        server.loaded_models = []
+        poller.set_active("other", True)
+        assert diffs.get(timeout=5).removed == [(server.address, "test")]
+        assert not fut.done()
+        fut.cancel()
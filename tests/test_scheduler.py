@@ -0,0 +1,163 @@
+import asyncio
+import gc
+
+import pytest
+
+from ollamatk.event_thread import EventThread
+from ollamatk.http import HTTPClient, get_server_key
+from ollamatk.scheduler import Priority, RequestScheduler
+
+from .conftest import StandInServer
+
+
+class Job:
+    def __init__(self, scheduler: RequestScheduler, server: str = "a") -> None:
+        self.scheduler = scheduler
+        self.server = server
+        self.order: list[str] = []
+        self.releases: dict[str, asyncio.Event] = {}
+
+    async def run(self, name: str, priority: Priority) -> None:
+        release = self.releases[name] = asyncio.Event()
+        async with self.scheduler.slot(self.server, priority):
+            self.order.append(name)
+            await release.wait()
+
+
+async def settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_interactive_requests_run_before_background(
+    event_thread: EventThread,
+) -> None:
+    async def main() -> list[str]:
+        scheduler = RequestScheduler(per_server_limit=1)
+        job = Job(scheduler)
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(job.run("warm-up", Priority.BACKGROUND))
+            await settle()
+            tg.create_task(job.run("embed", Priority.BACKGROUND))
+            await settle()
+            tg.create_task(job.run("chat", Priority.INTERACTIVE))
+            await settle()
+
+            assert scheduler.stats("a").waiting == 2
+            job.releases["warm-up"].set()
+            await settle()
+            job.releases["chat"].set()
+            await settle()
+            job.releases["embed"].set()
+
+        assert scheduler.stats("a").completed == 3
+        return job.order
+
+    order = event_thread.submit(main()).result(timeout=5)
+    assert order == ["warm-up", "chat", "embed"]
+
+
+def test_background_requests_leave_a_slot_free(event_thread: EventThread) -> None:
+    async def main() -> None:
+        scheduler = RequestScheduler(per_server_limit=2)
+        job = Job(scheduler)
+        other = Job(scheduler, server="b")
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(job.run("embed-1", Priority.BACKGROUND))
+            tg.create_task(job.run("embed-2", Priority.BACKGROUND))
+            tg.create_task(other.run("embed-3", Priority.BACKGROUND))
+            await settle()
+            assert job.order == ["embed-1"]
+            assert other.order == ["embed-3"]
+
+            tg.create_task(job.run("chat", Priority.INTERACTIVE))
+            await settle()
+            assert job.order == ["embed-1", "chat"]
+            assert scheduler.stats("a").active == 2
+
+            for release in [*job.releases.values(), *other.releases.values()]:
+                release.set()
+
+        assert job.order == ["embed-1", "chat", "embed-2"]
+
+    event_thread.submit(main()).result(timeout=5)
+
+
+def test_cancelled_waiters_release_their_place(event_thread: EventThread) -> None:
+    async def main() -> None:
+        scheduler = RequestScheduler(per_server_limit=1)
+        job = Job(scheduler)
+        first = asyncio.create_task(job.run("first", Priority.INTERACTIVE))
+        await settle()
+        second = asyncio.create_task(job.run("second", Priority.INTERACTIVE))
+        await settle()
+
+        second.cancel()
+        await settle()
+        assert scheduler.stats("a").waiting == 0
+
+        job.releases["first"].set()
+        await first
+        assert scheduler.stats("a").active == 0
+
+        async with scheduler.slot("a") as waited:
+            assert waited < 0.1
+
+    event_thread.submit(main()).result(timeout=5)
+
+
+def test_invalid_limit() -> None:
+    with pytest.raises(ValueError):
+        RequestScheduler(per_server_limit=0)
+
+
+def test_http_client_schedules_requests(
+    event_thread: EventThread,
+    server: StandInServer,
+) -> None:
+    scheduler = RequestScheduler()
+    with HTTPClient(scheduler=scheduler).install(event_thread) as http:
+        event_thread.submit(http.warm_up(server.address)).result(timeout=5)
+        coro = http.generate_chat_completion(
+            address=server.address,
+            model="test",
+            messages=[],
+            stream_callback=lambda data: None,
+        )
+        event_thread.submit(coro).result(timeout=5)
+
+    stats = scheduler.stats(get_server_key(server.address))
+    assert stats.completed == 2
+    assert stats.active == 0
+    assert get_server_key("http://localhost:11434/api/chat") == (
+        "http://localhost:11434"
+    )
+
+
+def test_cancelled_request_releases_its_server(
+    event_thread: EventThread,
+    server: StandInServer,
+) -> None:
+    scheduler = RequestScheduler(per_server_limit=1)
+    key = get_server_key(server.address)
+
+    async def cancel_while_waiting(http: HTTPClient) -> int:
+        async with scheduler.slot(key, Priority.INTERACTIVE):
+            task = asyncio.create_task(http.warm_up(server.address))
+            await settle()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        return http.pool.servers[server.address].outstanding
+
+    # Without explicit cleanup, the count would only drop once the
+    # abandoned request was garbage collected
+    gc.disable()
+    try:
+        with HTTPClient(scheduler=scheduler).install(event_thread) as http:
+            outstanding = event_thread.submit(cancel_while_waiting(http)).result(5)
+    finally:
+        gc.enable()
+
+    assert outstanding == 0
+    assert scheduler.stats(key).waiting == 0
@@ -0,0 +1,44 @@
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from ollamatk.event_thread import EventThread
+from ollamatk.history import ConversationHistory
+from ollamatk.http import HTTPClient
+from ollamatk.semantic import SemanticIndex
+
+if TYPE_CHECKING:
+    from .conftest import StandInServer
+
+
+def test_sync_only_embeds_new_messages(
+    event_thread: EventThread,
+    server: "StandInServer",
+    tmp_path: Path,
+) -> None:
+    history = ConversationHistory(tmp_path / "history.db")
+    history.add_message("a", "user", "zzz zzz")
+    history.add_message("a", "assistant", "")
+    history.add_message("a", "assistant", "aaa aaa")
+    index = SemanticIndex(history, tmp_path / "vectors", model="test")
+
+    with HTTPClient().install(event_thread) as http:
+        sync = lambda: event_thread.submit(
+            index.sync(http, server.address, batch_size=2)
+        ).result(timeout=5)
+
+        assert sync() == 2
+        assert server.requests.count("/api/embed") == 2
+        assert sync() == 0
+        assert server.requests.count("/api/embed") == 2
+
+        history.add_message("b", "user", "abc")
+        assert sync() == 1
+
+        coro = index.search(http, server.address, "zzc", k=2)
+        results = event_thread.submit(coro).result(timeout=5)
+
+    assert [r.message.content for r in results] == ["zzz zzz", "abc"]
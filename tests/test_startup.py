@@ -0,0 +1,76 @@
+import importlib
+import importlib.resources
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from ollamatk.startup import IMPORT_TARGET, ImportTimer, StartupProfiler
+
+
+@pytest.fixture
+def package_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    package = tmp_path / "startup_test_package"
+    package.mkdir()
+    (package / "__init__.py").write_text("import time\ntime.sleep(0.05)\n")
+    (package / "data.txt").write_text("Hello world!")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield package
+    sys.modules.pop("startup_test_package", None)
+
+
+def test_import_timer(package_path: Path) -> None:
+    timer = ImportTimer()
+    timer.start()
+    try:
+        module = importlib.import_module("startup_test_package")
+    finally:
+        timer.stop()
+
+    assert timer not in sys.meta_path
+    assert timer.timings["startup_test_package"] >= 0.05
+
+    # Resource readers should still work after timing the import
+    files = importlib.resources.files(module)
+    assert files.joinpath("data.txt").read_text() == "Hello world!"
+
+
+def test_startup_profiler_report(package_path: Path) -> None:
+    profiler = StartupProfiler()
+    with profiler.phase("import package"):
+        importlib.import_module("startup_test_package")
+    profiler.finish()
+
+    report = profiler.report()
+    assert "import package" in report
+    assert "startup_test_package" in report
+
+
+def test_main_import_is_lightweight() -> None:
+    code = textwrap.dedent("""
+        import sys, time
+        start = time.perf_counter()
+        import ollamatk.__main__
+        print(time.perf_counter() - start)
+        print(",".join(sys.modules))
+        """)
+    # Take the best of a few runs to avoid measuring disk cache misses
+    runs = [
+        subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.splitlines()
+        for _ in range(3)
+    ]
+
+    elapsed = min(float(duration) for duration, modules in runs)
+    assert elapsed < IMPORT_TARGET
+
+    modules = runs[0][1].split(",")
+    assert "tkinter" not in modules
+    assert "httpx" not in modules
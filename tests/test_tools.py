@@ -0,0 +1,155 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ollamatk.event_thread import EventThread
+from ollamatk.http import HTTPClient, StreamingChat, ToolCall
+from ollamatk.tools import ToolExecutor, ToolRegistry, ToolResult, generate_with_tools
+
+from .conftest import StandInServer
+
+
+def call(name: str, **arguments: object) -> ToolCall:
+    return {"function": {"name": name, "arguments": arguments}}
+
+
+def add(a: int, b: int = 0) -> int:
+    """Add two numbers."""
+    return a + b
+
+
+def test_tool_schema_is_inferred() -> None:
+    def search(query: str, limit: int = 5, *tags: str, **options: bool) -> list:
+        return []
+
+    tools = ToolRegistry()
+    tools.register(add)
+    tools.register(search, description="Search for something.")
+
+    add_schema, search_schema = tools.schemas()
+    assert add_schema == {
+        "type": "function",
+        "function": {
+            "name": "add",
+            "description": "Add two numbers.",
+            "parameters": {
+                "type": "object",
+                "properties": {"a": {"type": "integer"}, "b": {"type": "integer"}},
+                "required": ["a"],
+            },
+        },
+    }
+    assert search_schema["function"]["description"] == "Search for something."
+    assert search_schema["function"]["parameters"]["properties"] == {
+        "query": {"type": "string"},
+        "limit": {"type": "integer"},
+    }
+
+
+def test_tool_calls_run_concurrently(event_thread: EventThread) -> None:
+    tools = ToolRegistry()
+
+    @tools.register
+    def wait(seconds: float) -> str:
+        time.sleep(seconds)
+        return "done"
+
+    @tools.register(timeout=0.1)
+    def hang() -> None:
+        time.sleep(0.5)
+
+    @tools.register(name="fail")
+    def raise_error() -> None:
+        raise ValueError("broken")
+
+    calls = [
+        call("wait", seconds=0.2),
+        call("wait", seconds=0.2),
+        call("hang"),
+        call("fail"),
+        call("missing"),
+        call("add", a=1),
+    ]
+    tools.register(add)
+
+    with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+        start = time.perf_counter()
+        fut = event_thread.submit(tools.run(calls, executor))
+        results = fut.result(timeout=5)
+        elapsed = time.perf_counter() - start
+
+    # Each tool would take at least 0.5s to run one after another
+    assert elapsed < 0.4
+    assert [r.content for r in results[:2]] == ["done", "done"]
+    assert all(r.latency >= 0.2 for r in results[:2])
+    assert results[2].error and "did not finish within 0.1s" in results[2].content
+    assert results[3] == ToolResult("fail", "Error: broken", results[3].latency, True)
+    assert results[4].error and "no tool named 'missing'" in results[4].content
+    assert not results[5].error and results[5].content == "1"
+
+
+def test_tool_executor_abandons_hung_calls(event_thread: EventThread) -> None:
+    tools = ToolRegistry()
+    release = threading.Event()
+
+    @tools.register(timeout=0.1)
+    def hang() -> None:
+        release.wait()
+
+    executor = ToolExecutor()
+    try:
+        fut = event_thread.submit(tools.run([call("hang")], executor))
+        (result,) = fut.result(timeout=5)
+        assert result.error
+
+        (thread,) = [t for t in threading.enumerate() if t.name == executor.name]
+        assert thread.daemon  # So it won't keep the process alive
+
+        start = time.perf_counter()
+        executor.shutdown(wait=True)
+        assert time.perf_counter() - start < 0.1
+        with pytest.raises(RuntimeError):
+            executor.submit(hang)
+    finally:
+        release.set()
+
+
+def test_tool_results_are_sent_back(event_thread: EventThread) -> None:
+    server = StandInServer(tool_calls=[call("add", a=1, b=2), call("add", a=3)])
+    asyncio_server = event_thread.submit(server.start()).result(timeout=1)
+
+    tools = ToolRegistry()
+    tools.register(add)
+    chunks: list[StreamingChat] = []
+    rounds: list[list[ToolResult]] = []
+
+    with HTTPClient().install(event_thread) as http:
+        coro = generate_with_tools(
+            http,
+            tools,
+            address=server.address,
+            model="test",
+            messages=[{"role": "user", "content": "What is 1 + 2 and 3 + 0?"}],
+            stream_callback=chunks.append,
+            results_callback=rounds.append,
+        )
+        done = event_thread.submit(coro).result(timeout=5)
+
+    assert done is not None and done["done"]
+    assert [[r.content for r in results] for results in rounds] == [["3", "3"]]
+    assert chunks[0]["message"].get("tool_calls") == server.tool_calls
+    assert "".join(c["message"]["content"] for c in chunks) == "Hello world!"
+
+    user, call_message, *tool_messages = server.last_chat["messages"]
+    assert call_message["tool_calls"] == server.tool_calls
+    assert tool_messages == [
+        {"role": "tool", "content": "3", "tool_name": "add"},
+        {"role": "tool", "content": "3", "tool_name": "add"},
+    ]
+    assert server.last_chat["tools"] == tools.schemas()
+
+    event_thread.loop.call_soon_threadsafe(asyncio_server.close)
+    event_thread.submit(asyncio.sleep(0)).result(timeout=1)
@@ -0,0 +1,76 @@
+from ollamatk.tree import ConversationTree, common_prefix_length
+
+
+def contents(tree: ConversationTree[str]) -> list[str]:
+    return [node.message for node in tree.path()]
+
+
+def test_branches_share_their_prefix() -> None:
+    tree: ConversationTree[str] = ConversationTree()
+    nodes = [tree.append(str(i)) for i in range(100)]
+
+    # Regenerate the last message many times and edit a message halfway
+    for i in range(50):
+        tree.branch(nodes[-1], f"99-{i}")
+    edit = tree.branch(nodes[50], "50-edit")
+    tree.append("51-edit")
+
+    assert len(tree) == len(list(tree)) == 152
+    assert contents(tree)[48:] == ["48", "49", "50-edit", "51-edit"]
+
+    path = tree.path()
+    assert common_prefix_length(path, nodes) == 50
+    assert all(a is b for a, b in zip(path, nodes[:50]))
+
+    # Switching back to the original message restores the rest of its path
+    tree.switch(edit, -1)
+    assert contents(tree)[-2:] == ["98", "99-49"]
+    assert len(nodes[-1].siblings) == 51
+    tree.switch(tree.path()[-1], 1)
+    assert contents(tree)[-1] == "99"
+
+
+def test_remove_keeps_replies() -> None:
+    tree: ConversationTree[str] = ConversationTree()
+    a = tree.append("a")
+    b = tree.append("b")
+    tree.append("c")
+    tree.branch(b, "b2")
+
+    tree.remove(a)
+    assert contents(tree) == ["b2"]
+    assert [node.message for node in tree.children] == ["b", "b2"]
+    assert b.parent is tree
+
+    tree.remove(tree.path()[0])
+    assert contents(tree) == ["b", "c"]
+    assert len(tree) == 2
+
+    tree.clear()
+    assert contents(tree) == []
+    assert len(tree) == 0
+
+
+def test_ancestors_and_descendants() -> None:
+    tree: ConversationTree[str] = ConversationTree()
+    a = tree.append("a")
+    b = tree.append("b")
+    c = tree.append("c")
+    b2 = tree.branch(b, "b2")
+    d = tree.append("d")
+
+    assert d.ancestors() == [a, b2]
+    assert a.ancestors() == []
+    assert list(a.descendants()) == [b, c, b2, d]
+    assert list(tree) == [a, *a.descendants()]
+
+    # Removing a message takes it out of its replies' ancestors
+    tree.remove(b2)
+    assert d.ancestors() == [a]
+
+
+def test_common_prefix_length() -> None:
+    a, b, c = object(), object(), object()
+    assert common_prefix_length([a, b, c], [a, b]) == 2
+    assert common_prefix_length([a, b], [a, c]) == 1
+    assert common_prefix_length([], [a]) == 0
@@ -0,0 +1,67 @@
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from ollamatk.vectors import VectorIndex
+
+
+def test_search_ranks_by_cosine_similarity() -> None:
+    index = VectorIndex(model="test")
+    index.add([1, 2, 3], [[1, 0], [0, 1], [1, 1]])
+
+    results = index.search([10, 1], k=2)
+    assert [id for id, score in results] == [1, 3]
+    assert results[0][1] == pytest.approx(10 / (101**0.5), rel=1e-5)
+
+
+def test_index_is_memory_mapped_and_appended(tmp_path: Path) -> None:
+    index = VectorIndex(tmp_path, model="test")
+    index.add([1], [[1, 0, 0]])
+    index.add([2, 3], [[0, 1, 0], [0, 0, 1]])
+
+    index = VectorIndex(tmp_path, model="test")
+    assert len(index) == 3
+    assert index.max_id == 3
+    assert index.search([0, 0, 1], k=1)[0][0] == 3
+
+
+def test_unpaired_vectors_are_truncated(tmp_path: Path) -> None:
+    index = VectorIndex(tmp_path, model="test")
+    index.add([1], [[1, 0, 0]])
+
+    # As if a write was interrupted after the vector but before its ID
+    with (tmp_path / "vectors.f32").open("ab") as f:
+        f.write(bytes(3 * 4))
+
+    index = VectorIndex(tmp_path, model="test")
+    index.add([3], [[0, 0, 1]])
+    assert index.search([0, 0, 1], k=1) == [(3, 1.0)]
+    assert (tmp_path / "vectors.f32").stat().st_size == 2 * 3 * 4
+
+
+def test_changing_model_discards_vectors(tmp_path: Path) -> None:
+    VectorIndex(tmp_path, model="a").add([1], [[1, 0]])
+    index = VectorIndex(tmp_path, model="b")
+    assert len(index) == 0
+    assert index.search([1, 0]) == []
+
+
+def test_dimension_mismatch_raises() -> None:
+    index = VectorIndex(model="test")
+    index.add([1], [[1, 0]])
+    with pytest.raises(ValueError):
+        index.add([2], [[1, 0, 0]])
+
+
+@pytest.mark.parametrize("persist", [False, True])
+def test_remove_vectors(tmp_path: Path, persist: bool) -> None:
+    index = VectorIndex(tmp_path if persist else None, model="test")
+    index.add([1, 2, 3], [[1, 0], [0, 1], [1, 1]])
+    index.remove([1, 3])
+    assert [id for id, score in index.search([1, 0])] == [2]
+
+    if persist:
+        index = VectorIndex(tmp_path, model="test")
+        assert len(index) == 1